@@ -5,9 +5,10 @@ from django.contrib import messages
 from .models import (
     User, Restaurant, Location, Ingredient,
     Food, FoodChange, ConfirmationToken,
-    SupportMessage
+    SupportMessage, ApprovalPolicy
 )
 from .services.restaurant_service import RestaurantService
+from .services.approval_service import ApprovalService
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +22,12 @@ def approve_foods(modeladmin, request, queryset):
     # Count already approved items to exclude them
     already_approved = queryset.filter(is_approved=True).count()
 
-    # Update all selected items to approved status
-    updated_count = queryset.filter(is_approved=False).update(is_approved=True)
-
-    # Update affected restaurants' hazard levels
+    # Update all selected items to approved status with a single UPDATE
+    pending_ids = list(queryset.filter(
+        is_approved=False).values_list('id', flat=True))
     restaurant_ids = set(queryset.values_list('restaurant_id', flat=True))
-    for restaurant_id in restaurant_ids:
-        RestaurantService.update_restaurant_hazard_level(restaurant_id)
+    updated_count = ApprovalService.mark_foods_approved(
+        pending_ids, restaurant_ids)
 
     if already_approved > 0:
         messages.warning(
@@ -107,6 +107,11 @@ class FoodChangeAdmin(admin.ModelAdmin):
     list_filter = ('is_deletion', 'new_is_approved')
     filter_horizontal = ('new_ingredients', 'new_approved_supervisors')
 
+
+@admin.register(ApprovalPolicy)
+class ApprovalPolicyAdmin(admin.ModelAdmin):
+    list_display = ('action', 'required_approvals', 'updated_at')
+
 @admin.register(SupportMessage)
 class SupportMessageAdmin(admin.ModelAdmin):
     list_display = ("subject", "email", "category", "created_at")
@@ -119,7 +124,7 @@ class SupportMessageAdmin(admin.ModelAdmin):
 
 @admin.register(ConfirmationToken)
 class ConfirmationTokenAdmin(admin.ModelAdmin):
-    list_display = ('user_id', 'code')  # Removed 'created_at'
+    list_display = ('user_id', 'code', 'created_at')
     search_fields = ('user_id__username', 'user_id__email')
 
 
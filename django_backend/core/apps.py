@@ -70,3 +70,11 @@ class CoreConfig(AppConfig):
             restaurant_image_thread.daemon = True
             restaurant_image_thread.start()
             logger.info("Background restaurant image fetch thread started")
+
+            # Send the emails still due from before a restart. Only servers
+            # get the worker, not the other management commands.
+            from django.conf import settings
+            serving = 'runserver' in sys.argv or not sys.argv[0].endswith('manage.py')
+            if getattr(settings, 'EMAIL_OUTBOX_IN_PROCESS', False) and serving:
+                from .services.email_outbox import EmailOutbox
+                EmailOutbox.start()
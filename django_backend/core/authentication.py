@@ -0,0 +1,37 @@
+from functools import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+
+class ClaimsUser(TokenUser):
+    """
+    User built from the claims CustomTokenObtainPairSerializer puts in every
+    token (user id, username, email, is_supervisor) instead of a User row.
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def is_supervisor(self):
+        return bool(self.token.get('is_supervisor', False))
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication without the per-request user lookup of
+    JWTAuthentication: the signature and expiry are checked and request.user
+    is a ClaimsUser.
+
+    Meant for read-only endpoints that only need the user's id or supervisor
+    flag. The claims are as fresh as the token, so a deactivated or demoted
+    user keeps read access until the access token expires
+    (ACCESS_TOKEN_LIFETIME); endpoints that write anything on the user's
+    behalf keep using JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        # Raises InvalidToken for tokens without a user id, like the parent
+        super().get_user(validated_token)
+        return ClaimsUser(validated_token)
@@ -1,6 +1,11 @@
 import logging
 from django.core.management.base import BaseCommand
 from core.models import Ingredient
+from core.services.catalog_cache import CatalogCache
+from core.services.catalog_changes import CatalogChangeLog
+from core.services.ingredient_registry import IngredientRegistry
+from core.services.search_index import SearchIndex
+from core.services.autocomplete import AutocompleteIndex
 from django.db import transaction
 
 logger = logging.getLogger(__name__)
@@ -411,25 +416,48 @@ class Command(BaseCommand):
         updated_count = 0
 
         try:
+            # Existing ingredients are matched by name through the in-memory
+            # registry, then created and updated with one bulk query each
+            ids_by_name = IngredientRegistry.ids_by_name()
+            to_create = []
+            to_update = []
+
+            for ingredient_data in ingredients_data:
+                ingredient_id = ids_by_name.get(ingredient_data['name'].lower())
+                ingredient = Ingredient(
+                    id=ingredient_id,
+                    name=ingredient_data['name'],
+                    description=ingredient_data['description'],
+                    hazard_level=ingredient_data['hazard_level'],
+                )
+                if ingredient_id is None:
+                    to_create.append(ingredient)
+                else:
+                    to_update.append(ingredient)
+
             with transaction.atomic():
-                for ingredient_data in ingredients_data:
-                    # Check if ingredient already exists by name
-                    ingredient, created = Ingredient.objects.update_or_create(
-                        name=ingredient_data['name'],
-                        defaults={
-                            'description': ingredient_data['description'],
-                            'hazard_level': ingredient_data['hazard_level']
-                        }
-                    )
+                Ingredient.objects.bulk_create(to_create, batch_size=500)
+                Ingredient.objects.bulk_update(
+                    to_update, ['description', 'hazard_level'], batch_size=500)
+
+                # Bulk queries don't send post_save, so notify the catalog here
+                CatalogCache.invalidate('ingredients')
+                CatalogChangeLog.record(
+                    "ingredient", [ingredient.id for ingredient in to_create + to_update])
+                SearchIndex.sync(
+                    "ingredient", [ingredient.id for ingredient in to_create + to_update])
+                transaction.on_commit(IngredientRegistry.invalidate)
+                transaction.on_commit(AutocompleteIndex.invalidate)
 
-                    if created:
-                        created_count += 1
-                        msg = f"Created ingredient: {ingredient.name} (Hazard Level: {ingredient.hazard_level})"
-                    else:
-                        updated_count += 1
-                        msg = f"Updated ingredient: {ingredient.name} (Hazard Level: {ingredient.hazard_level})"
+            for ingredient in to_create:
+                self.stdout.write(
+                    f"Created ingredient: {ingredient.name} (Hazard Level: {ingredient.hazard_level})")
+            for ingredient in to_update:
+                self.stdout.write(
+                    f"Updated ingredient: {ingredient.name} (Hazard Level: {ingredient.hazard_level})")
 
-                    self.stdout.write(msg)
+            created_count = len(to_create)
+            updated_count = len(to_update)
 
             self.stdout.write(self.style.SUCCESS(
                 f"Successfully processed {total_count} ingredients: {created_count} created, {updated_count} updated."
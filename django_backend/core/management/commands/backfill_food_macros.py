@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import Food
+from core.services.catalog_cache import CatalogCache
+
+
+class Command(BaseCommand):
+    help = 'Fill the typed macro columns of every food from its macro_table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of foods updated per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        columns = list(Food.MACRO_COLUMNS)
+        total = Food.objects.count()
+        self.stdout.write(f"Backfilling macro columns of {total} foods...")
+
+        done = 0
+        changed = 0
+        last_id = 0
+        while True:
+            # Walk the table by id so every batch is a single index range read
+            foods = list(Food.objects.filter(id__gt=last_id).order_by('id')
+                         .only('id', 'macro_table', *columns)[:batch_size])
+            if not foods:
+                break
+            last_id = foods[-1].id
+
+            stale = []
+            for food in foods:
+                before = [getattr(food, column) for column in columns]
+                food.sync_macros()
+                if [getattr(food, column) for column in columns] != before:
+                    stale.append(food)
+
+            if stale:
+                with transaction.atomic():
+                    Food.objects.bulk_update(stale, columns, batch_size=batch_size)
+            done += len(foods)
+            changed += len(stale)
+            self.stdout.write(f"Processed {done}/{total} foods")
+
+        if changed:
+            # Cached filtered/sorted food lists were built from the old columns
+            CatalogCache.invalidate('foods')
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated the macro columns of {changed} foods"))
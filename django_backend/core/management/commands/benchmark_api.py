@@ -0,0 +1,388 @@
+import gc
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from core.models import Food, Ingredient, Location, Restaurant, User
+from core.serializers import CustomTokenObtainPairSerializer
+from core.services.approval_policy import ApprovalPolicyService
+from core.services.catalog_cache import CatalogCache
+from core.services.ingredient_service import IngredientService
+from core.services.restaurant_service import RestaurantService
+from .benchmark_food_changes import QueryCounter
+
+# Dataset sizes: foods, and timed requests per endpoint. Endpoints that return
+# a whole table (the food list uncached, the approval queue, the location
+# list) get list_iterations, password logins login_iterations.
+SIZES = {
+    '1k': {'foods': 1_000, 'iterations': 50, 'list_iterations': 20, 'login_iterations': 5},
+    '100k': {'foods': 100_000, 'iterations': 30, 'list_iterations': 3, 'login_iterations': 5},
+    '1m': {'foods': 1_000_000, 'iterations': 20, 'list_iterations': 1, 'login_iterations': 5},
+}
+
+# Restaurant locations are clustered around these (latitude, longitude, weight)
+CITIES = [
+    (47.4979, 19.0402, 40),  # Budapest
+    (47.5316, 21.6273, 8),   # Debrecen
+    (46.2530, 20.1414, 7),   # Szeged
+    (48.1035, 20.7784, 6),   # Miskolc
+    (46.0727, 18.2323, 6),   # Pécs
+    (47.6875, 17.6504, 5),   # Győr
+    (47.9554, 21.7167, 4),   # Nyíregyháza
+    (46.9062, 19.6913, 4),   # Kecskemét
+    (47.1860, 18.4221, 4),   # Székesfehérvár
+    (47.2307, 16.6218, 3),   # Szombathely
+]
+
+PASSWORD = "benchmark-password-1"
+MACRO_RANGES = {
+    'energy_kcal': (40, 950), 'protein': (0, 45), 'fat': (0, 60), 'saturated_fat': (0, 25),
+    'carbohydrates': (0, 110), 'sugars': (0, 60), 'fiber': (0, 15), 'salt': (0, 5),
+}
+
+
+def percentile(ordered, fraction):
+    """Linearly interpolated percentile of an ascending list"""
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the main API endpoints in-process against a generated dataset of 1k, 100k '
+            'or 1M foods, reporting p50/p95/p99 latency, queries per request and peak memory. '
+            'Runs in a throwaway test database and writes the results as JSON for comparison '
+            'across commits.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=sorted(SIZES), default='1k',
+                            help='Dataset size')
+        parser.add_argument('--foods', type=int,
+                            help='Number of foods, overriding the size preset')
+        parser.add_argument('--iterations', type=int,
+                            help='Timed requests per endpoint, overriding the size preset')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed of the dataset')
+        parser.add_argument('--database-file',
+                            help='SQLite file for the test database (default: in memory). '
+                                 'Advisable for the 1m dataset.')
+        parser.add_argument('--output',
+                            help='JSON result file (default: benchmarks/api-<size>-<commit>.json)')
+        parser.add_argument('--compare',
+                            help='Earlier JSON result to compare against')
+
+    def handle(self, *args, **options):
+        preset = dict(SIZES[options['size']])
+        if options['foods']:
+            preset['foods'] = options['foods']
+        if options['iterations']:
+            preset['iterations'] = preset['list_iterations'] = options['iterations']
+        if preset['foods'] < 100:
+            raise CommandError("--foods must be at least 100")
+
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        if options['database_file'] and connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = options['database_file']
+
+        # A fresh test database, so the numbers don't depend on local data and
+        # the request path (signals, on_commit hooks) runs as in production.
+        # DEBUG off, so Django doesn't keep every query in memory.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(DEBUG=False, CACHES={'default': {
+                    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'nutri-benchmark'}}):
+                result = self._run(options, preset)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' /
+                      f"api-{options['size'] if not options['foods'] else preset['foods']}-"
+                      f"{result['commit'][:10] if result['commit'] else 'unknown'}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if baseline:
+            self._compare(baseline, result)
+
+    def _run(self, options, preset):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"Generating {preset['foods']} foods...")
+        started = time.perf_counter()
+        dataset, supervisors = self._create_dataset(rng, preset['foods'])
+        dataset['seconds'] = round(time.perf_counter() - started, 2)
+        self.stdout.write(
+            f"Created {dataset['restaurants']} restaurants, {dataset['locations']} locations, "
+            f"{dataset['ingredients']} ingredients, {dataset['foods']} foods and "
+            f"{dataset['food_ingredients']} food ingredients in {dataset['seconds']}s")
+
+        client = APIClient()
+        tokens = {user.id: str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+                  for user in supervisors}
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {tokens[supervisors[0].id]}"}
+        login = {'email': dataset['login_email'], 'password': PASSWORD}
+
+        # Unapproved foods and the number of approvals they already have;
+        # every PATCH adds the next supervisor's approval to the next food
+        required = ApprovalPolicyService.required(ApprovalPolicyService.FOOD_CREATE)
+        pending = list(Food.objects.filter(is_approved=False).order_by('id').values_list(
+            'id', 'approval_count'))
+        state = {'position': 0}
+
+        def approve():
+            while pending:
+                position = state['position'] % len(pending)
+                food_id, count = pending[position]
+                if count < required:
+                    break
+                pending.pop(position)
+            else:
+                raise CommandError("Ran out of unapproved foods to approve")
+            pending[position] = (food_id, count + 1)
+            state['position'] = position + 1
+            supervisor = supervisors[count]
+            return client.patch(f"/food/{food_id}/accept/",
+                                HTTP_AUTHORIZATION=f"Bearer {tokens[supervisor.id]}")
+
+        def invalidate_foods():
+            CatalogCache.invalidate('foods')
+
+        endpoints = [
+            # name, method, path, request, iterations, untimed setup before every request
+            ("foods", "GET", "/foods/", lambda: client.get("/foods/"),
+             preset['list_iterations'], invalidate_foods),
+            ("foods (cached)", "GET", "/foods/", lambda: client.get("/foods/"),
+             preset['iterations'], None),
+            ("restaurant locations", "GET", "/restaurants/locations/",
+             lambda: client.get("/restaurants/locations/"), preset['list_iterations'], None),
+            ("approvable foods", "GET", "/foods/approvable/",
+             lambda: client.get("/foods/approvable/", **auth), preset['list_iterations'], None),
+            ("approve food", "PATCH", "/food/<id>/accept/", approve, preset['iterations'], None),
+            ("obtain token", "POST", "/token/",
+             lambda: client.post("/token/", login, format='json'), preset['login_iterations'], None),
+        ]
+
+        results = {}
+        for name, method, path, request, iterations, setup in endpoints:
+            self.stdout.write(f"Timing {name} ({iterations} requests)...")
+            results[name] = self._measure(method, path, request, iterations, setup)
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'endpoint':<22}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'peak KiB':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<22}{result['iterations']:>5}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}{result['queries_mean']:>9.1f}{result['peak_memory_kib']:>10.0f}")
+
+        return {
+            'suite': 'api',
+            'created_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+            'commit': self._commit(),
+            'size': options['size'],
+            'seed': options['seed'],
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'platform': platform.platform(),
+            },
+            'dataset': dataset,
+            'endpoints': results,
+        }
+
+    def _measure(self, method, path, request, iterations, setup):
+        statuses = {}
+        queries = QueryCounter()
+
+        def call():
+            if setup:
+                setup()
+            queries.reset()
+            with connection.execute_wrapper(queries):
+                started = time.perf_counter()
+                response = request()
+                elapsed = time.perf_counter() - started
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            return elapsed, queries.reset()
+
+        call()  # warm-up
+        statuses.clear()
+        timings, query_counts = [], []
+        for _ in range(iterations):
+            elapsed, query_count = call()
+            timings.append(elapsed * 1000)
+            query_counts.append(query_count)
+        status_codes = {str(code): count for code, count in sorted(statuses.items())}
+
+        # Peak memory from one more request; tracing slows requests down, so
+        # it is kept out of the timed ones
+        gc.collect()
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'method': method,
+            'path': path,
+            'iterations': iterations,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'min_ms': round(timings[0], 3),
+            'max_ms': round(timings[-1], 3),
+            'queries_mean': round(sum(query_counts) / len(query_counts), 2),
+            'queries_max': max(query_counts),
+            'peak_memory_kib': round(peak / 1024, 1),
+            'status_codes': status_codes,
+        }
+
+    def _create_dataset(self, rng, food_count):
+        """
+        Restaurants of about 20 foods each with 1-3 locations clustered
+        around Hungarian cities, a few hundred ingredients picked with a
+        Zipf-like popularity (3-15 per food), and 5% of the foods waiting
+        for approval.
+        """
+        batch_size = 5000
+        required = ApprovalPolicyService.required(ApprovalPolicyService.FOOD_CREATE)
+
+        login = User(email="benchmark-login@example.com", username="benchmark-login", is_active=True)
+        login.set_password(PASSWORD)
+        login.save()
+        supervisors = User.objects.bulk_create([
+            User(email=f"benchmark-supervisor-{i}@example.com", username=f"supervisor{i}",
+                 is_active=True, is_supervisor=True, password="!")
+            for i in range(required)])
+        creators = User.objects.bulk_create([
+            User(email=f"benchmark-user-{i}@example.com", username=f"user{i}", is_active=True, password="!")
+            for i in range(max(10, min(1000, food_count // 100)))])
+
+        ingredient_count = max(50, min(2000, food_count // 200))
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f"Ingredient {i}", description=f"Benchmark ingredient {i}",
+                       hazard_level=rng.choices((0, 1, 2, 3), weights=(55, 25, 15, 5))[0])
+            for i in range(ingredient_count)], batch_size=batch_size)
+        ingredient_ids = [ingredient.id for ingredient in ingredients]
+        hazard_of = {ingredient.id: ingredient.hazard_level for ingredient in ingredients}
+        popularity = [1 / (rank + 1) for rank in range(ingredient_count)]
+
+        restaurant_count = max(5, food_count // 20)
+        restaurants = Restaurant.objects.bulk_create([
+            Restaurant(name=f"Restaurant {i}", cuisine=rng.choice(
+                ("Hungarian", "Italian", "Asian", "Fast food", "Vegan", "Bakery")),
+                description=f"Benchmark restaurant {i}", image="restaurant_images/benchmark.jpg")
+            for i in range(restaurant_count)], batch_size=batch_size)
+        restaurant_ids = [restaurant.id for restaurant in restaurants]
+        city_weights = [weight for _, _, weight in CITIES]
+        locations = []
+        for restaurant_id in restaurant_ids:
+            for _ in range(rng.choices((1, 2, 3), weights=(60, 30, 10))[0]):
+                latitude, longitude, _ = rng.choices(CITIES, weights=city_weights)[0]
+                locations.append(Location(restaurant_id=restaurant_id,
+                                          latitude=rng.gauss(latitude, 0.04),
+                                          longitude=rng.gauss(longitude, 0.06)))
+        Location.objects.bulk_create(locations, batch_size=batch_size)
+
+        FoodIngredient = Food.ingredients.through
+        FoodApproval = Food.approved_supervisors.through
+        food_ingredients = 0
+        for start in range(0, food_count, batch_size):
+            foods, food_ingredient_ids = [], []
+            for i in range(start, min(start + batch_size, food_count)):
+                chosen = set(rng.choices(ingredient_ids, weights=popularity, k=rng.randint(3, 15)))
+                known = [hazard_of[ingredient_id] for ingredient_id in chosen]
+                is_approved = rng.random() >= 0.05
+                food = Food(
+                    name=f"Food {i}", restaurant_id=rng.choice(restaurant_ids),
+                    macro_table={key: round(rng.uniform(low, high), 1)
+                                 for key, (low, high) in MACRO_RANGES.items()},
+                    is_organic=rng.random() < 0.2, is_gluten_free=rng.random() < 0.3,
+                    is_alcohol_free=rng.random() < 0.9, is_lactose_free=rng.random() < 0.4,
+                    image="food_images/benchmark.jpg",
+                    hazard_level=round(sum(known) / len(known), 1),
+                    ingredient_mask=IngredientService.encode_mask(chosen),
+                    is_approved=is_approved,
+                    approval_count=required if is_approved else rng.randrange(required),
+                    created_by_id=rng.choice(creators).id,
+                )
+                food.sync_macros()
+                foods.append(food)
+                food_ingredient_ids.append(chosen)
+            Food.objects.bulk_create(foods, batch_size=batch_size)
+
+            FoodIngredient.objects.bulk_create([
+                FoodIngredient(food_id=food.id, ingredient_id=ingredient_id)
+                for food, chosen in zip(foods, food_ingredient_ids) for ingredient_id in chosen
+            ], batch_size=batch_size)
+            food_ingredients += sum(len(chosen) for chosen in food_ingredient_ids)
+            # Approvals of the foods still waiting, from the first supervisors
+            FoodApproval.objects.bulk_create([
+                FoodApproval(food_id=food.id, user_id=supervisors[n].id)
+                for food in foods if not food.is_approved for n in range(food.approval_count)
+            ], batch_size=batch_size)
+
+        RestaurantService.rebuild_summaries(batch_size=batch_size)
+
+        return {
+            'foods': food_count,
+            'restaurants': restaurant_count,
+            'locations': len(locations),
+            'ingredients': ingredient_count,
+            'food_ingredients': food_ingredients,
+            'unapproved_foods': Food.objects.filter(is_approved=False).count(),
+            'users': User.objects.count(),
+            'login_email': login.email,
+        }, supervisors
+
+    @staticmethod
+    def _commit():
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                  cwd=settings.BASE_DIR, timeout=10).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def _compare(self, baseline, result):
+        self.stdout.write("")
+        self.stdout.write(f"Compared with {baseline.get('commit') or 'unknown commit'} "
+                          f"({baseline.get('size')}, {baseline.get('created_at')}):")
+        if baseline.get('dataset', {}).get('foods') != result['dataset']['foods']:
+            self.stdout.write(self.style.WARNING("The baseline was run on a different dataset size"))
+        self.stdout.write(f"{'endpoint':<22}{'p50 ms':>24}{'p95 ms':>24}{'queries':>20}")
+        for name, current in result['endpoints'].items():
+            before = baseline.get('endpoints', {}).get(name)
+            if not before:
+                self.stdout.write(f"{name:<22}  (not in baseline)")
+                continue
+            columns = []
+            for key, width in (('p50_ms', 24), ('p95_ms', 24), ('queries_mean', 20)):
+                change = (current[key] - before[key]) / before[key] * 100 if before[key] else 0
+                columns.append(f"{before[key]:.1f} -> {current[key]:.1f} {change:+.0f}%".rjust(width))
+            self.stdout.write(f"{name:<22}{''.join(columns)}")
@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+
+
+class Command(BaseCommand):
+    help = ('Benchmark concurrent approval-style writes against SQLite with default '
+            'journaling, the tuned SQLite mode and (optionally) the configured database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8,
+                            help='Number of concurrent writer threads')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='Number of concurrent reader threads')
+        parser.add_argument('--ops', type=int, default=200,
+                            help='Write transactions per writer thread')
+        parser.add_argument('--foods', type=int, default=100,
+                            help='Number of rows the writers compete for')
+        parser.add_argument('--include-configured', action='store_true',
+                            help='Also run the workload against the configured default database '
+                                 '(uses a scratch table that is dropped afterwards)')
+
+    def handle(self, *args, **options):
+        results = []
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for mode in ('default', 'tuned'):
+                path = os.path.join(tmp_dir, f"contention_{mode}.sqlite3")
+                self.stdout.write(f"Running SQLite '{mode}' mode...")
+                results.append(self._run(
+                    f"sqlite-{mode}", SqliteTarget(path, tuned=(mode == 'tuned')), options))
+
+        if options['include_configured']:
+            vendor = connection.vendor
+            self.stdout.write(f"Running configured database ({vendor})...")
+            results.append(self._run(
+                f"configured-{vendor}", DjangoTarget(), options))
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'target':<22}{'writes/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'max ms':>10}{'errors':>8}{'reads/s':>10}")
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<22}{result['writes_per_sec']:>10.1f}{result['p50_ms']:>10.2f}"
+                f"{result['p95_ms']:>10.2f}{result['max_ms']:>10.2f}{result['errors']:>8}"
+                f"{result['reads_per_sec']:>10.1f}")
+
+    def _run(self, name, target, options):
+        writers = options['writers']
+        readers = options['readers']
+        ops = options['ops']
+        foods = options['foods']
+
+        target.setup(foods)
+
+        latencies = []
+        errors = []
+        reads = [0]
+        lock = threading.Lock()
+        stop_readers = threading.Event()
+
+        def writer(worker_id):
+            local_latencies = []
+            local_errors = 0
+            for i in range(ops):
+                food_id = (worker_id * ops + i) % foods + 1
+                user_id = worker_id * ops + i
+                started = time.perf_counter()
+                try:
+                    target.approve(food_id, user_id)
+                    local_latencies.append(time.perf_counter() - started)
+                except (sqlite3.OperationalError, OperationalError):
+                    local_errors += 1
+            target.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        def reader():
+            count = 0
+            while not stop_readers.is_set():
+                try:
+                    target.read(count % foods + 1)
+                    count += 1
+                except (sqlite3.OperationalError, OperationalError):
+                    pass
+            target.close()
+            with lock:
+                reads[0] += count
+
+        reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=writer, args=(i,))
+                          for i in range(writers)]
+
+        started = time.perf_counter()
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stop_readers.set()
+        for thread in reader_threads:
+            thread.join()
+
+        target.teardown()
+
+        latencies.sort()
+        return {
+            "name": name,
+            "writes_per_sec": len(latencies) / elapsed if elapsed else 0,
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+            "max_ms": latencies[-1] * 1000 if latencies else 0,
+            "errors": sum(errors),
+            "reads_per_sec": reads[0] / elapsed if elapsed else 0,
+        }
+
+
+class SqliteTarget:
+    """
+    Runs the workload on a throwaway SQLite file through the sqlite3 module,
+    either with SQLite's defaults (rollback journal, deferred transactions,
+    Django's 5 second timeout) or with the tuned pragmas from settings.
+    """
+
+    def __init__(self, path, tuned):
+        self.path = path
+        self.tuned = tuned
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            if self.tuned:
+                for pragma in settings.SQLITE_TUNED_PRAGMAS.split(";"):
+                    if pragma.strip():
+                        conn.execute(pragma)
+            self.local.conn = conn
+        return conn
+
+    def setup(self, foods):
+        conn = self._connection()
+        conn.execute("CREATE TABLE foods (id INTEGER PRIMARY KEY, approval_count INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE approvals (id INTEGER PRIMARY KEY, food_id INTEGER, user_id INTEGER)")
+        conn.executemany("INSERT INTO foods (id, approval_count) VALUES (?, 0)",
+                         [(i,) for i in range(1, foods + 1)])
+
+    def approve(self, food_id, user_id):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE" if self.tuned else "BEGIN")
+        try:
+            conn.execute("SELECT approval_count FROM foods WHERE id = ?", (food_id,)).fetchone()
+            conn.execute("INSERT INTO approvals (food_id, user_id) VALUES (?, ?)", (food_id, user_id))
+            conn.execute("UPDATE foods SET approval_count = approval_count + 1 WHERE id = ?", (food_id,))
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read(self, food_id):
+        self._connection().execute(
+            "SELECT COUNT(*) FROM approvals WHERE food_id = ?", (food_id,)).fetchone()
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def teardown(self):
+        self.close()
+
+
+class DjangoTarget:
+    """
+    Runs the workload through Django's connection handling against the
+    configured default database, using scratch tables that are dropped at the end.
+    """
+
+    foods_table = "bench_contention_foods"
+    approvals_table = "bench_contention_approvals"
+
+    def setup(self, foods):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.approvals_table}")
+            cursor.execute(f"DROP TABLE IF EXISTS {self.foods_table}")
+            cursor.execute(
+                f"CREATE TABLE {self.foods_table} (id INTEGER PRIMARY KEY, approval_count INTEGER NOT NULL)")
+            cursor.execute(
+                f"CREATE TABLE {self.approvals_table} (food_id INTEGER, user_id INTEGER)")
+            cursor.executemany(
+                f"INSERT INTO {self.foods_table} (id, approval_count) VALUES (%s, 0)",
+                [(i,) for i in range(1, foods + 1)])
+
+    def approve(self, food_id, user_id):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                lock = " FOR UPDATE" if connection.features.has_select_for_update else ""
+                cursor.execute(
+                    f"SELECT approval_count FROM {self.foods_table} WHERE id = %s{lock}", [food_id])
+                cursor.execute(
+                    f"INSERT INTO {self.approvals_table} (food_id, user_id) VALUES (%s, %s)",
+                    [food_id, user_id])
+                cursor.execute(
+                    f"UPDATE {self.foods_table} SET approval_count = approval_count + 1 WHERE id = %s",
+                    [food_id])
+
+    def read(self, food_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {self.approvals_table} WHERE food_id = %s", [food_id])
+            cursor.fetchone()
+
+    def close(self):
+        connections.close_all()
+
+    def teardown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.approvals_table}")
+            cursor.execute(f"DROP TABLE IF EXISTS {self.foods_table}")
@@ -0,0 +1,124 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from core.models import Food, FoodChange, Ingredient, Restaurant
+from core.services.food_change_service import FoodChangeService
+
+
+class Rollback(Exception):
+    """Raised to throw away the benchmark data"""
+
+
+class Command(BaseCommand):
+    help = ('Benchmark applying queued approved food changes in batches versus one at a time. '
+            'All benchmark data is created in a transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--changes', type=int, default=10000,
+                            help='Number of queued changes to apply in batches')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Changes applied per batch')
+        parser.add_argument('--single', type=int, default=200,
+                            help='Number of extra changes applied one at a time for comparison')
+        parser.add_argument('--restaurants', type=int, default=50,
+                            help='Number of restaurants the foods are spread over')
+        parser.add_argument('--deletions', type=float, default=0.05,
+                            help='Fraction of the changes that are removals')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            self.stdout.write("Benchmark data rolled back")
+
+    def _run(self, options):
+        rng = random.Random(42)
+        batched = options['changes']
+        single = options['single']
+        batch_size = options['batch_size']
+
+        self.stdout.write(f"Creating {batched + single} foods and queued changes...")
+        started = time.perf_counter()
+        change_ids = self._create_changes(
+            rng, batched + single, options['restaurants'], options['deletions'])
+        self.stdout.write(f"Created in {time.perf_counter() - started:.2f}s")
+
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            for change_id in change_ids[:single]:
+                FoodChangeService.apply_changes([change_id])
+            single_elapsed = time.perf_counter() - started
+            single_queries = queries.reset()
+
+            started = time.perf_counter()
+            for i in range(single, len(change_ids), batch_size):
+                FoodChangeService.apply_changes(change_ids[i:i + batch_size])
+            batched_elapsed = time.perf_counter() - started
+            batched_queries = queries.reset()
+
+        applied = FoodChange.objects.filter(
+            id__in=change_ids, applied_date__isnull=False).count()
+        self.stdout.write(f"Applied {applied}/{len(change_ids)} changes")
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'mode':<12}{'changes':>10}{'seconds':>10}{'changes/s':>12}{'queries':>10}{'q/change':>10}")
+        for mode, count, elapsed, query_count in (
+                ("one-by-one", single, single_elapsed, single_queries),
+                (f"batch {batch_size}", batched, batched_elapsed, batched_queries)):
+            if not count:
+                continue
+            self.stdout.write(
+                f"{mode:<12}{count:>10}{elapsed:>10.2f}{count / elapsed if elapsed else 0:>12.1f}"
+                f"{query_count:>10}{query_count / count:>10.2f}")
+
+    def _create_changes(self, rng, count, restaurant_count, deletion_ratio):
+        restaurants = Restaurant.objects.bulk_create([
+            Restaurant(name=f"Benchmark restaurant {i}") for i in range(restaurant_count)])
+
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if len(ingredient_ids) < 10:
+            ingredient_ids += [ingredient.id for ingredient in Ingredient.objects.bulk_create([
+                Ingredient(name=f"Benchmark ingredient {i}", hazard_level=i % 5) for i in range(20)])]
+
+        foods = Food.objects.bulk_create([
+            Food(name=f"Benchmark food {i}", restaurant=rng.choice(restaurants),
+                 macro_table={"energy_kcal": rng.randint(50, 900)})
+            for i in range(count)], batch_size=500)
+
+        FoodIngredient = Food.ingredients.through
+        FoodIngredient.objects.bulk_create([
+            FoodIngredient(food_id=food.id, ingredient_id=ingredient_id)
+            for food in foods for ingredient_id in rng.sample(ingredient_ids, 4)], batch_size=500)
+
+        # Queued as already approved so only the application is measured
+        changes = FoodChange.objects.bulk_create([
+            FoodChange(old_version=food, is_deletion=rng.random() < deletion_ratio,
+                       new_restaurant=rng.choice(restaurants), new_name=f"{food.name} v2",
+                       new_macro_table={"energy_kcal": rng.randint(50, 900)},
+                       new_is_approved=True, new_approval_count=2)
+            for food in foods], batch_size=500)
+
+        ChangeIngredient = FoodChange.new_ingredients.through
+        ChangeIngredient.objects.bulk_create([
+            ChangeIngredient(foodchange_id=change.id, ingredient_id=ingredient_id)
+            for change in changes if not change.is_deletion
+            for ingredient_id in rng.sample(ingredient_ids, 4)], batch_size=500)
+
+        return [change.id for change in changes]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        count, self.count = self.count, 0
+        return count
@@ -0,0 +1,85 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from core.authentication import ClaimsJWTAuthentication
+from core.models import User
+from core.serializers import CustomTokenObtainPairSerializer
+from .benchmark_food_changes import QueryCounter, Rollback
+
+
+class Command(BaseCommand):
+    help = ('Benchmark JWT throughput: obtaining tokens (with and without the password check), '
+            'refreshing, verifying, and authenticating a request with and without the user lookup. '
+            'The benchmark user is created in a transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000,
+                            help='Operations per benchmark')
+        parser.add_argument('--logins', type=int, default=20,
+                            help='Password logins to time; each one hashes the password')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['logins'] < 0:
+            raise CommandError("--iterations must be positive and --logins not negative")
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            self.stdout.write("Benchmark data rolled back")
+
+    def _run(self, options):
+        iterations = options['iterations']
+        password = "benchmark-password-1"
+        user = User.objects.create_user(
+            email="jwt-benchmark@example.com", username="jwt-benchmark", password=password)
+        user.is_active = True
+        user.save(update_fields=['is_active'])
+
+        refresh = str(CustomTokenObtainPairSerializer.get_token(user))
+        access = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        factory = APIRequestFactory()
+        request = factory.get('/', HTTP_AUTHORIZATION=f"Bearer {access}")
+        full = JWTAuthentication()
+        stateless = ClaimsJWTAuthentication()
+
+        def login():
+            serializer = CustomTokenObtainPairSerializer(
+                data={"email": user.email, "password": password})
+            serializer.is_valid(raise_exception=True)
+
+        def refresh_token():
+            serializer = TokenRefreshSerializer(data={"refresh": refresh})
+            serializer.is_valid(raise_exception=True)
+
+        def verify():
+            serializer = TokenVerifySerializer(data={"token": access})
+            serializer.is_valid(raise_exception=True)
+
+        benchmarks = [
+            ("obtain (password)", login, options['logins']),
+            ("issue (get_token)", lambda: str(CustomTokenObtainPairSerializer.get_token(user)), iterations),
+            ("refresh", refresh_token, iterations),
+            ("verify", verify, iterations),
+            ("auth + user lookup", lambda: full.authenticate(request), iterations),
+            ("auth from claims", lambda: stateless.authenticate(request), iterations),
+        ]
+
+        self.stdout.write(
+            f"{'operation':<22}{'count':>8}{'seconds':>10}{'ops/s':>12}{'us/op':>10}{'q/op':>8}")
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            for name, operation, count in benchmarks:
+                if not count:
+                    continue
+                started = time.perf_counter()
+                for _ in range(count):
+                    operation()
+                elapsed = time.perf_counter() - started
+                query_count = queries.reset()
+                self.stdout.write(
+                    f"{name:<22}{count:>8}{elapsed:>10.3f}{count / elapsed if elapsed else 0:>12.0f}"
+                    f"{elapsed / count * 1e6:>10.1f}{query_count / count:>8.2f}")
@@ -3,6 +3,7 @@ import random
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from core.models import Restaurant, Food, Ingredient
+from core.services.ingredient_registry import IngredientRegistry
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
@@ -114,11 +115,13 @@ class Command(BaseCommand):
         food.save()
 
         # Add ingredients - this is what will determine the hazard level
-        self.add_ingredients_to_food(food, food_info, ingredients_by_hazard)
+        selected_ingredients = self.add_ingredients_to_food(
+            food, food_info, ingredients_by_hazard)
 
-        # Calculate hazard level based on ingredients
-        food.calculate_hazard_level()
-        food.save()
+        # Calculate hazard level based on ingredients, from the in-memory registry
+        food.hazard_level = IngredientRegistry.average_hazard(
+            [ingredient.id for ingredient in selected_ingredients])
+        food.save(update_fields=['hazard_level'])
 
         return food
 
@@ -162,6 +165,7 @@ class Command(BaseCommand):
 
         # Add the ingredients to the food
         food.ingredients.set(selected_ingredients)
+        return selected_ingredients
 
     def weighted_choice(self, choices, weights):
         """Select an item from choices with probability weights"""
@@ -5,8 +5,17 @@ from core.services.restaurant_service import RestaurantService
 class Command(BaseCommand):
     help = 'Process any pending food changes that have reached the approval threshold'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Number of changes applied per transaction')
+
     def handle(self, *args, **options):
         self.stdout.write("Processing pending food changes...")
-        count = RestaurantService.process_pending_food_changes()
+
+        def progress(done, total):
+            self.stdout.write(f"Applied {done}/{total} pending food changes")
+
+        count = RestaurantService.process_pending_food_changes(
+            chunk_size=options['chunk_size'], progress=progress)
         self.stdout.write(self.style.SUCCESS(
             f"Successfully processed {count} pending food changes"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.services.catalog_changes import CatalogChangeLog
+
+
+class Command(BaseCommand):
+    help = 'Delete old entries (including tombstones) from the catalog delta-sync change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Keep entries from the last N days')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        self.stdout.write(f"Pruning catalog changes older than {days} days...")
+        count = CatalogChangeLog.prune(days)
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully pruned {count} catalog change entries. "
+            f"Clients that last synced before that will be asked for a full sync."))
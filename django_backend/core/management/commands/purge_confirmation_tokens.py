@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core.services.confirmation_tokens import ConfirmationTokenService
+
+
+class Command(BaseCommand):
+    help = ('Delete expired email confirmation tokens together with the accounts that were never '
+            'confirmed (see CONFIRMATION_TOKEN_TTL_HOURS); meant to run periodically')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users or tokens deleted per query')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Purging expired confirmation tokens...")
+        result = ConfirmationTokenService.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {result['tokens']} expired tokens and {result['users']} unconfirmed users"))
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from core.services.catalog_snapshot import CatalogSnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pre-serialized catalog snapshot of restaurants and food pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants-only', action='store_true',
+                            help='Only rebuild the restaurant snapshots')
+        parser.add_argument('--foods-only', action='store_true',
+                            help='Only rebuild the food page snapshots')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        if not options['foods_only']:
+            self.stdout.write("Rebuilding restaurant snapshots...")
+            count = CatalogSnapshotService.rebuild_restaurants()
+            self.stdout.write(f"Wrote {count} restaurant snapshots")
+
+        if not options['restaurants_only']:
+            self.stdout.write("Rebuilding food page snapshots...")
+            count = CatalogSnapshotService.rebuild_food_pages()
+            self.stdout.write(
+                f"Wrote {count} food page snapshots "
+                f"({CatalogSnapshotService.page_size()} food ids per page)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog snapshot rebuilt in {time.perf_counter() - started:.2f}s"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core.services.restaurant_service import RestaurantService
+
+
+class Command(BaseCommand):
+    help = ('Recompute the dietary summary of every restaurant (food and dietary flag counts, '
+            'hazard levels, average calories) from its approved foods')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Restaurants written per UPDATE')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding restaurant dietary summaries...")
+        changed = RestaurantService.rebuild_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated the summary of {len(changed)} restaurants"))
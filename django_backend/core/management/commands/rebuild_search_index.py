@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from core.services.search_index import SearchIndex
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents of foods, restaurants and ingredients from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=SearchIndex.KINDS, action='append',
+                            help='Only rebuild this kind of document (can be repeated)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Documents written per INSERT')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Search backend: {SearchIndex.backend().name}")
+        for kind in options['kind'] or SearchIndex.KINDS:
+            count = SearchIndex.rebuild(kind, batch_size=options['batch_size'])
+            self.stdout.write(f"Indexed {count} {kind} documents")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Food
+from core.services.hazard_scoring import HazardScoringEngine, NUMPY_AVAILABLE
+
+
+class Command(BaseCommand):
+    help = ('Recompute the hazard level of every food and restaurant in one batch pass '
+            '(vectorized with NumPy when it is installed) and save the ones that changed')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would change without saving anything')
+        parser.add_argument('--weight', action='append', default=[], metavar='MACRO=WEIGHT',
+                            help='Add weight * macro value to a per-food score, e.g. --weight sugars=0.05 '
+                                 f"(macros: {', '.join(Food.MACRO_COLUMNS)})")
+        parser.add_argument('--top', type=int, default=10,
+                            help='Number of highest weighted scores to print')
+        parser.add_argument('--no-numpy', action='store_true',
+                            help='Use the pure Python aggregation even if NumPy is installed')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows written per UPDATE')
+
+    def handle(self, *args, **options):
+        weights = {}
+        for value in options['weight']:
+            macro, _, weight = value.partition('=')
+            try:
+                weights[macro.strip()] = float(weight)
+            except ValueError:
+                raise CommandError(f"Invalid weight '{value}', expected MACRO=NUMBER")
+
+        if not options['no_numpy'] and not NUMPY_AVAILABLE:
+            self.stdout.write("NumPy is not installed, using the pure Python aggregation")
+        try:
+            result = HazardScoringEngine.score(weights, use_numpy=not options['no_numpy'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Scored {len(result.food_hazards)} foods and {len(result.restaurant_hazards)} "
+            f"restaurants ({result.engine})")
+        self.stdout.write(
+            f"{len(result.changed_foods)} food and {len(result.changed_restaurants)} "
+            f"restaurant hazard levels changed")
+
+        if weights:
+            self.stdout.write(f"Highest weighted scores ({', '.join(f'{k}={v}' for k, v in weights.items())}):")
+            for food_id, score in HazardScoringEngine.top_scores(result, options['top']):
+                self.stdout.write(f"  food {food_id}: {score:.2f}")
+
+        if options['dry_run']:
+            self.stdout.write("Dry run, nothing saved")
+        else:
+            HazardScoringEngine.write(result, batch_size=options['batch_size'])
+
+        self.stdout.write(" ".join(f"{phase} {seconds:.3f}s" for phase, seconds in result.timings.items()))
+        self.stdout.write(self.style.SUCCESS("Hazard scoring finished"))
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from core.services.email_outbox import EmailOutbox
+
+
+class Command(BaseCommand):
+    help = ('Send the emails queued in the outbox in batches over one connection, '
+            'retrying failed ones with backoff')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Emails sent per connection')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll for new emails')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            result = EmailOutbox.send_all(batch_size=options['batch_size'])
+            if any(result.values()) or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Sent {result['sent']} emails, {result['retried']} will be retried, "
+                    f"{result['failed']} failed"))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,85 @@
+import time
+from django.conf import settings
+from django.db import connection
+from .utils import metrics
+
+
+class QueryTimer:
+    """connection.execute_wrapper() that counts and times the request's queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the wall time, database query count and query time, and
+    serialization time of every request, labelled by view, method and
+    status, into the metrics registry served at /metrics. Serialization is
+    the rendering of DRF responses plus whatever views time as "serialize"
+    themselves (the cached catalog lists render their own JSON).
+
+    With METRICS_SERVER_TIMING on, the same numbers and the named timers of
+    the request (see core.utils.metrics.timer) are also sent back in a
+    Server-Timing header, which browser dev tools show next to the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', False)
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        timings = metrics.start_request_timings()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        finally:
+            metrics.stop_request_timings()
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        labels = {
+            "view": (match.view_name or match.route) if match else "unmatched",
+            "method": request.method,
+            "status": str(response.status_code),
+        }
+        serialize_seconds = timings.get("serialize", 0.0)
+        metrics.registry.observe("request_seconds", elapsed, labels,
+                                 help_text="Request wall time")
+        metrics.registry.observe("request_queries", queries.count, labels,
+                                 help_text="Database queries per request", buckets=metrics.COUNT_BUCKETS)
+        metrics.registry.observe("request_query_seconds", queries.seconds, labels,
+                                 help_text="Time spent in database queries per request")
+        metrics.registry.observe("request_serialize_seconds", serialize_seconds, labels,
+                                 help_text="Time spent serializing the response")
+
+        if self.server_timing:
+            entries = [
+                f"app;dur={elapsed * 1000:.2f}",
+                f'db;dur={queries.seconds * 1000:.2f};desc="{queries.count} queries"',
+            ]
+            entries += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+            response['Server-Timing'] = ", ".join(entries)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook; time that from here to
+        # the post-render callback
+        started = time.perf_counter()
+
+        def rendered(response):
+            metrics.add_request_time("serialize", time.perf_counter() - started)
+
+        response.add_post_render_callback(rendered)
+        return response
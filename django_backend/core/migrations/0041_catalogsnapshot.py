@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_supportmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('restaurant', 'Restaurant'), ('food_page', 'Food page')], max_length=20)),
+                ('key', models.IntegerField()),
+                ('payload', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'CatalogSnapshots',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='unique_catalog_snapshot')],
+            },
+        ),
+    ]
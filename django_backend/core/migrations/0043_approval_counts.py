@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_approval_counts(apps, schema_editor):
+    Food = apps.get_model('core', 'Food')
+    FoodChange = apps.get_model('core', 'FoodChange')
+    FoodApproval = Food.approved_supervisors.through
+    FoodChangeApproval = FoodChange.new_approved_supervisors.through
+
+    food_counts = FoodApproval.objects.filter(food_id=OuterRef('pk')).order_by().values(
+        'food_id').annotate(count=Count('id')).values('count')
+    Food.objects.update(approval_count=Coalesce(Subquery(food_counts), 0))
+
+    change_counts = FoodChangeApproval.objects.filter(foodchange_id=OuterRef('pk')).order_by().values(
+        'foodchange_id').annotate(count=Count('id')).values('count')
+    FoodChange.objects.update(new_approval_count=Coalesce(Subquery(change_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_catalogchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='food',
+            name='approval_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='foodchange',
+            name='new_approval_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_approval_counts,
+                             migrations.RunPython.noop),
+    ]
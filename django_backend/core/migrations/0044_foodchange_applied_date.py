@@ -0,0 +1,30 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:45
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce, Now
+
+
+def backfill_applied_date(apps, schema_editor):
+    # Changes approved so far were applied by the post_save signal when they
+    # were approved, so mark them applied to keep them from being re-applied
+    FoodChange = apps.get_model('core', 'FoodChange')
+    FoodChange.objects.filter(new_is_approved=True).update(
+        applied_date=Coalesce(F('updated_date'), Now()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_approval_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodchange',
+            name='applied_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_applied_date,
+                             migrations.RunPython.noop),
+    ]
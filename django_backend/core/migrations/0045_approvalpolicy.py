@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:37
+
+from django.db import migrations, models
+
+
+def seed_approval_policies(apps, schema_editor):
+    # The thresholds that were hard-coded in AcceptFood and ApproveProposal
+    ApprovalPolicy = apps.get_model('core', 'ApprovalPolicy')
+    for action, required in (("food_create", 10), ("food_change", 2), ("food_removal", 2)):
+        ApprovalPolicy.objects.get_or_create(
+            action=action, defaults={'required_approvals': required})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0044_foodchange_applied_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('food_create', 'New food'), ('food_change', 'Food change'), ('food_removal', 'Food removal')], max_length=20, unique=True)),
+                ('required_approvals', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Approval policies',
+                'db_table': 'ApprovalPolicies',
+            },
+        ),
+        migrations.RunPython(seed_approval_policies,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0045_approvalpolicy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodchange',
+            index=models.Index(condition=models.Q(('is_deletion', False), ('new_is_approved', False)), fields=['date', 'id'], name='foodchange_update_queue'),
+        ),
+        migrations.AddIndex(
+            model_name='foodchange',
+            index=models.Index(condition=models.Q(('is_deletion', True), ('new_is_approved', False)), fields=['date', 'id'], name='foodchange_removal_queue'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_removals(apps, schema_editor):
+    # Keep the oldest pending removal proposal of each food; the constraint
+    # can't be created while duplicates exist
+    FoodChange = apps.get_model('core', 'FoodChange')
+    pending = FoodChange.objects.filter(
+        is_deletion=True, new_is_approved=False, old_version__isnull=False)
+    duplicated = pending.values('old_version').annotate(
+        count=Count('id'), keep=Min('id')).filter(count__gt=1)
+    for row in duplicated:
+        pending.filter(old_version=row['old_version']).exclude(
+            id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0046_foodchange_queue_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_removals,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='foodchange',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deletion', True), ('new_is_approved', False)), fields=('old_version',), name='unique_active_food_removal'),
+        ),
+    ]
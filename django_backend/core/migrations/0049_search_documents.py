@@ -0,0 +1,100 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:48
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+# External-content FTS5 table over the folded columns, kept in step with
+# SearchDocuments by triggers
+SQLITE_FORWARD = [
+    '''CREATE VIRTUAL TABLE "SearchDocumentsFts" USING fts5(
+        search_title, search_body,
+        content='SearchDocuments', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')''',
+    '''CREATE TRIGGER "SearchDocuments_ai" AFTER INSERT ON "SearchDocuments" BEGIN
+        INSERT INTO "SearchDocumentsFts"(rowid, search_title, search_body)
+        VALUES (new.id, new.search_title, new.search_body);
+    END''',
+    '''CREATE TRIGGER "SearchDocuments_ad" AFTER DELETE ON "SearchDocuments" BEGIN
+        INSERT INTO "SearchDocumentsFts"("SearchDocumentsFts", rowid, search_title, search_body)
+        VALUES ('delete', old.id, old.search_title, old.search_body);
+    END''',
+    '''CREATE TRIGGER "SearchDocuments_au" AFTER UPDATE ON "SearchDocuments" BEGIN
+        INSERT INTO "SearchDocumentsFts"("SearchDocumentsFts", rowid, search_title, search_body)
+        VALUES ('delete', old.id, old.search_title, old.search_body);
+        INSERT INTO "SearchDocumentsFts"(rowid, search_title, search_body)
+        VALUES (new.id, new.search_title, new.search_body);
+    END''',
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS "SearchDocuments_au"',
+    'DROP TRIGGER IF EXISTS "SearchDocuments_ad"',
+    'DROP TRIGGER IF EXISTS "SearchDocuments_ai"',
+    'DROP TABLE IF EXISTS "SearchDocumentsFts"',
+]
+
+# Generated tsvector column (titles weighted above bodies) with a GIN index
+POSTGRES_FORWARD = [
+    '''ALTER TABLE "SearchDocuments" ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', search_title), 'A') ||
+            setweight(to_tsvector('simple', search_body), 'B')
+        ) STORED''',
+    'CREATE INDEX "SearchDocuments_vector_gin" ON "SearchDocuments" USING GIN (search_vector)',
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS "SearchDocuments_vector_gin"',
+    'ALTER TABLE "SearchDocuments" DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            run_statements(schema_editor, SQLITE_FORWARD)
+        except OperationalError:
+            # SQLite built without FTS5 - search falls back to substring matching
+            run_statements(schema_editor, SQLITE_BACKWARD)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == 'sqlite':
+        run_statements(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0048_food_macros'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('food', 'Food'), ('restaurant', 'Restaurant'), ('ingredient', 'Ingredient')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, default='', max_length=255)),
+                ('search_title', models.TextField()),
+                ('search_body', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'SearchDocuments',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:51
+
+from django.db import migrations, models
+
+
+def fill_ingredient_masks(apps, schema_editor):
+    # Same encoding as IngredientService.encode_mask
+    Food = apps.get_model('core', 'Food')
+    masks = {}
+    for food_id, ingredient_id in Food.ingredients.through.objects.values_list('food_id', 'ingredient_id'):
+        masks[food_id] = masks.get(food_id, 0) | (1 << ingredient_id)
+    Food.objects.bulk_update([
+        Food(id=food_id, ingredient_mask=mask.to_bytes((mask.bit_length() + 7) // 8, 'little'))
+        for food_id, mask in masks.items()
+    ], ['ingredient_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0049_search_documents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='food',
+            name='ingredient_mask',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avoided_ingredients',
+            field=models.ManyToManyField(blank=True, related_name='avoided_by', to='core.ingredient'),
+        ),
+        migrations.RunPython(fill_ingredient_masks,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 23:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0052_outbound_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='confirmationtoken',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='confirmationtoken',
+            name='code',
+            field=models.CharField(max_length=32, unique=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-18 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0053_confirmation_token_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField()),
+                ('modified', models.FloatField()),
+            ],
+            options={
+                'db_table': 'CatalogVersions',
+            },
+        ),
+    ]
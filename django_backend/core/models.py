@@ -1,6 +1,6 @@
+import re
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
-from django.db.models import Avg
 from django.utils import timezone
 
 
@@ -31,6 +31,10 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     is_supervisor = models.BooleanField(default=False)
 
+    # Ingredients the user doesn't want to eat, see /foods/safe-for-me/
+    avoided_ingredients = models.ManyToManyField(
+        'Ingredient', related_name="avoided_by", blank=True)
+
     date_joined = models.DateTimeField(auto_now_add=True)
     objects = CustomUserManager()
 
@@ -46,7 +50,9 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 class Restaurant(models.Model):
     name = models.CharField(max_length=255, unique=True)
-    foods_on_menu = models.IntegerField(default=0)  # Optional
+    # Number of approved foods; maintained with the rest of the dietary
+    # summary below by RestaurantService.update_restaurant_hazard_level
+    foods_on_menu = models.IntegerField(default=0)
     # Use ImageField instead of CharField for better handling
     image = models.ImageField(upload_to='restaurant_images/',
                               null=True,
@@ -56,6 +62,13 @@ class Restaurant(models.Model):
     description = models.TextField(blank=True, null=True)
     # Add hazard_level field to store the average hazard level of all foods
     hazard_level = models.FloatField(default=0)
+    organic_count = models.IntegerField(default=0)
+    gluten_free_count = models.IntegerField(default=0)
+    alcohol_free_count = models.IntegerField(default=0)
+    lactose_free_count = models.IntegerField(default=0)
+    min_hazard_level = models.FloatField(null=True, blank=True)
+    max_hazard_level = models.FloatField(null=True, blank=True)
+    avg_calories = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -125,6 +138,36 @@ class Ingredient(models.Model):
         db_table = "Ingredients"
 
 
+def related_ids(instance, field_name):
+    """Ids of a many-to-many relation, from the prefetch cache when there is one"""
+    prefetched = getattr(instance, '_prefetched_objects_cache', {})
+    if field_name in prefetched:
+        return [obj.pk for obj in prefetched[field_name]]
+    # Read the through table directly instead of joining the related table
+    manager = getattr(instance, field_name)
+    return list(manager.through.objects.filter(
+        **{manager.source_field_name: instance.pk}).values_list(manager.target_field_name, flat=True))
+
+
+_MACRO_NUMBER = re.compile(r'\s*(-?\d+(?:[.,]\d+)?)')
+
+
+def parse_macro_value(value):
+    """
+    Numeric value of a macro_table entry: numbers as they are, strings like
+    "12.5", "12,5" or "12 g" by their leading number, anything else None
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _MACRO_NUMBER.match(value)
+        if match:
+            return float(match.group(1).replace(',', '.'))
+    return None
+
+
 class Food(models.Model):
     restaurant = models.ForeignKey(
         Restaurant, on_delete=models.CASCADE, related_name="foods")
@@ -139,9 +182,25 @@ class Food(models.Model):
     ingredients = models.ManyToManyField(
         Ingredient, related_name="foods")  # Many-to-Many Relationship
     hazard_level = models.FloatField(default=0)
+    # Bitset of the food's ingredient ids (bit n set = contains ingredient n),
+    # little-endian; maintained with the ingredients, see update_ingredient_mask
+    ingredient_mask = models.BinaryField(default=b'', editable=False)
+
+    # Typed copies of the macro_table values (per 100 g) for filtering,
+    # sorting and aggregation. Kept in sync by save(), see MACRO_COLUMNS.
+    calories = models.FloatField(null=True, blank=True, db_index=True)
+    protein = models.FloatField(null=True, blank=True, db_index=True)
+    fat = models.FloatField(null=True, blank=True, db_index=True)
+    saturated_fat = models.FloatField(null=True, blank=True, db_index=True)
+    carbohydrates = models.FloatField(null=True, blank=True, db_index=True)
+    sugars = models.FloatField(null=True, blank=True, db_index=True)
+    fiber = models.FloatField(null=True, blank=True, db_index=True)
+    salt = models.FloatField(null=True, blank=True, db_index=True)
 
     approved_supervisors = models.ManyToManyField(
         User, related_name="approved_foods", blank=True)
+    # Denormalized number of approved_supervisors, maintained by ApprovalService
+    approval_count = models.IntegerField(default=0)
     is_approved = models.BooleanField(default=True)
 
     # Add creation tracking
@@ -152,26 +211,58 @@ class Food(models.Model):
     )
     created_date = models.DateTimeField(null=True, blank=True)
 
+    # Macro column -> macro_table keys it is read from, first match wins
+    MACRO_COLUMNS = {
+        'calories': ('energy_kcal', 'calories', 'kcal'),
+        'protein': ('protein',),
+        'fat': ('fat',),
+        'saturated_fat': ('saturated_fat',),
+        'carbohydrates': ('carbohydrates', 'carbs'),
+        'sugars': ('sugars', 'sugar'),
+        'fiber': ('fiber', 'fibre'),
+        'salt': ('salt',),
+    }
+
     def __str__(self):
         return f"{self.name} ({self.restaurant.name})"
 
+    def sync_macros(self):
+        """Copy the macro_table values into the typed macro columns"""
+        table = self.macro_table if isinstance(self.macro_table, dict) else {}
+        for column, keys in self.MACRO_COLUMNS.items():
+            value = next((table[key] for key in keys if key in table), None)
+            setattr(self, column, parse_macro_value(value))
+
     def calculate_hazard_level(self):
         """Calculate and set the hazard level based on the average of ingredients' hazard levels"""
-        ingredients_list = self.ingredients.all()
-        if ingredients_list.exists():
-            avg_hazard = ingredients_list.aggregate(
-                avg=Avg('hazard_level'))['avg'] or 0
-            self.hazard_level = round(avg_hazard, 1)
-            self.save(update_fields=['hazard_level'])
-        else:
-            self.hazard_level = 0
-            self.save(update_fields=['hazard_level'])
+        # Hazard levels come from the in-memory registry, so only the ids are read
+        from .services.ingredient_registry import IngredientRegistry
+        self.hazard_level = IngredientRegistry.average_hazard(
+            related_ids(self, 'ingredients'))
+        self.save(update_fields=['hazard_level'])
         return self.hazard_level
 
+    def update_ingredient_mask(self):
+        """
+        Recompute the ingredient bitset from the food's ingredients and write
+        it with a plain UPDATE: the ingredient change itself already notifies
+        the catalog, so the post_save handlers have nothing to do for it
+        """
+        from .services.ingredient_service import IngredientService
+        self.ingredient_mask = IngredientService.encode_mask(
+            related_ids(self, 'ingredients'))
+        Food.objects.filter(pk=self.pk).update(ingredient_mask=self.ingredient_mask)
+        return self.ingredient_mask
+
     def save(self, *args, **kwargs):
         # Set created_date for new records only
         if not self.pk and not self.created_date:
             self.created_date = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'macro_table' in update_fields:
+            self.sync_macros()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.MACRO_COLUMNS)
         super().save(*args, **kwargs)
 
     class Meta:
@@ -199,6 +290,8 @@ class FoodChange(models.Model):
 
     new_approved_supervisors = models.ManyToManyField(
         User, related_name="approved_food_changes", blank=True)
+    # Denormalized number of new_approved_supervisors, maintained by ApprovalService
+    new_approval_count = models.IntegerField(default=0)
     new_is_approved = models.BooleanField(default=True)
 
     # Add reason and date fields
@@ -212,6 +305,8 @@ class FoodChange(models.Model):
         null=True, blank=True
     )
     updated_date = models.DateTimeField(null=True, blank=True)
+    # Set by FoodChangeService once the approved change has been applied to the food
+    applied_date = models.DateTimeField(null=True, blank=True)
 
     # Calculate hazard level
     new_hazard_level = models.FloatField(default=0)
@@ -221,15 +316,10 @@ class FoodChange(models.Model):
 
     def calculate_new_hazard_level(self):
         """Calculate the new hazard level based on the new ingredients"""
-        ingredients = self.new_ingredients.all()
-        if ingredients.exists():
-            avg_hazard = ingredients.aggregate(
-                avg=Avg('hazard_level'))['avg'] or 0
-            self.new_hazard_level = round(avg_hazard, 1)
-            self.save(update_fields=['new_hazard_level'])
-        else:
-            self.new_hazard_level = 0
-            self.save(update_fields=['new_hazard_level'])
+        from .services.ingredient_registry import IngredientRegistry
+        self.new_hazard_level = IngredientRegistry.average_hazard(
+            related_ids(self, 'new_ingredients'))
+        self.save(update_fields=['new_hazard_level'])
         return self.new_hazard_level
 
     def save(self, *args, **kwargs):
@@ -243,12 +333,32 @@ class FoodChange(models.Model):
 
     class Meta:
         db_table = "FoodChanges"
+        indexes = [
+            # Pending update and removal queues, read newest first. Partial
+            # indexes because Django filters booleans as "NOT is_deletion",
+            # which can't seek into a composite index on the flags.
+            models.Index(fields=['date', 'id'], name='foodchange_update_queue',
+                         condition=models.Q(is_deletion=False, new_is_approved=False)),
+            models.Index(fields=['date', 'id'], name='foodchange_removal_queue',
+                         condition=models.Q(is_deletion=True, new_is_approved=False)),
+        ]
+        constraints = [
+            # At most one pending removal proposal per food
+            models.UniqueConstraint(
+                fields=['old_version'], name='unique_active_food_removal',
+                condition=models.Q(is_deletion=True, new_is_approved=False)),
+        ]
 
 
 class ConfirmationToken(models.Model):
-    code = models.CharField(max_length=32)
+    """
+    Email confirmation code of a signup. Codes expire after
+    CONFIRMATION_TOKEN_TTL_HOURS; see ConfirmationTokenService.
+    """
+    code = models.CharField(max_length=32, unique=True)
     user_id = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="confirmation_codes")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         db_table = "ConfirmationTokens"
@@ -283,3 +393,169 @@ class SupportMessage(models.Model):
         verbose_name = "Support Message"
         verbose_name_plural = "Support Messages"
         ordering = ['-created_at']
+
+
+class CatalogSnapshot(models.Model):
+    """
+    Pre-serialized JSON for the anonymous catalog reads, so serving a
+    restaurant or a page of foods is a single lookup plus a byte copy.
+    Maintained by CatalogSnapshotService.
+    """
+    KIND_CHOICES = [
+        ("restaurant", "Restaurant"),
+        ("food_page", "Food page"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Restaurant id or food page number, depending on kind
+    key = models.IntegerField()
+    payload = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.key}"
+
+    class Meta:
+        db_table = "CatalogSnapshots"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'key'], name='unique_catalog_snapshot')
+        ]
+
+
+class CatalogChange(models.Model):
+    """
+    Append-only log of catalog changes behind the delta-sync endpoint.
+    The id doubles as the monotonic sync version; deletions are kept as tombstones.
+    """
+    ENTITY_CHOICES = [
+        ("food", "Food"),
+        ("restaurant", "Restaurant"),
+        ("ingredient", "Ingredient"),
+    ]
+
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    object_id = models.BigIntegerField()
+    is_deletion = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        action = "deleted" if self.is_deletion else "changed"
+        return f"#{self.id}: {self.entity} {self.object_id} {action}"
+
+    class Meta:
+        db_table = "CatalogChanges"
+
+
+class CatalogVersion(models.Model):
+    """
+    Version counter of one CatalogCache namespace. Kept in the database so
+    every process sees a bump as soon as it commits, whatever cache backend
+    holds the response bodies.
+    """
+    namespace = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField()
+    modified = models.FloatField()
+
+    def __str__(self):
+        return f"{self.namespace} v{self.version}"
+
+    class Meta:
+        db_table = "CatalogVersions"
+
+
+class ApprovalPolicy(models.Model):
+    """
+    Number of supervisor approvals each kind of proposal needs.
+    Read through ApprovalPolicyService, which caches the thresholds in-process.
+    """
+    ACTION_CHOICES = [
+        ("food_create", "New food"),
+        ("food_change", "Food change"),
+        ("food_removal", "Food removal"),
+    ]
+
+    action = models.CharField(
+        max_length=20, choices=ACTION_CHOICES, unique=True)
+    required_approvals = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_action_display()}: {self.required_approvals} approvals"
+
+    class Meta:
+        db_table = "ApprovalPolicies"
+        verbose_name_plural = "Approval policies"
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable food, restaurant or ingredient, maintained by SearchIndex.
+    The search_* columns hold accent-folded, lowercased text; the full-text
+    index over them is created per database vendor by migration 0049.
+    """
+    KIND_CHOICES = [
+        ("food", "Food"),
+        ("restaurant", "Restaurant"),
+        ("ingredient", "Ingredient"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True, default="")
+    search_title = models.TextField()
+    search_body = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+    class Meta:
+        db_table = "SearchDocuments"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting to be sent, or already sent, by EmailOutbox. Requests
+    only insert rows here; the outbox worker sends them in batches over one
+    connection and retries failures with a growing delay.
+    """
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    to = models.EmailField()
+    from_email = models.CharField(max_length=255, blank=True, default="")
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default="")
+    html_body = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # When the email is due: the next retry for pending emails, the end of
+    # the claiming worker's lease for emails being sent
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+    class Meta:
+        db_table = "OutboundEmails"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx'),
+        ]
@@ -0,0 +1,98 @@
+import base64
+from datetime import date
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over (date, id), newest first.
+
+    The cursor holds the date and id of the last row of the page, and the next
+    page is read with a WHERE on those values instead of an OFFSET, so deep
+    pages cost the same as the first one when (date, id) is indexed.
+
+    Pagination is opt-in: without ?cursor= or ?page_size= the view returns
+    the plain list it always did.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        # Rows without a date sort last
+        queryset = queryset.order_by(F('date').desc(nulls_last=True), '-id')
+
+        position = self.decode_cursor(params.get(self.cursor_query_param))
+        if position is None:
+            segments = [queryset]
+        else:
+            last_date, last_id = position
+            if last_date is None:
+                segments = [queryset.filter(date__isnull=True, id__lt=last_id)]
+            else:
+                # Rest of the current date, then older dates, then undated rows.
+                # Separate queries instead of one OR so each is a single index seek.
+                segments = [
+                    queryset.filter(date=last_date, id__lt=last_id),
+                    queryset.filter(date__lt=last_date),
+                    queryset.filter(date__isnull=True),
+                ]
+
+        results = []
+        for segment in segments:
+            results.extend(segment[:self.page_size + 1 - len(results)])
+            if len(results) > self.page_size:
+                break
+
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = (results[-1].date, results[-1].id) if self.has_next else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(
+                self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Must be an integer."})
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            last_date, last_id = base64.urlsafe_b64decode(
+                cursor.encode('ascii')).decode('ascii').split('|')
+            return (date.fromisoformat(last_date) if last_date else None), int(last_id)
+        except (ValueError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+
+    def encode_cursor(self, position):
+        last_date, last_id = position
+        value = f"{last_date.isoformat() if last_date else ''}|{last_id}"
+        return base64.urlsafe_b64encode(value.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
@@ -53,6 +53,11 @@ class RestaurantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Restaurant
         fields = '__all__'
+        # Dietary summary, maintained from the restaurant's approved foods
+        read_only_fields = [
+            'foods_on_menu', 'organic_count', 'gluten_free_count', 'alcohol_free_count',
+            'lactose_free_count', 'min_hazard_level', 'max_hazard_level', 'avg_calories',
+        ]
 
     def create(self, validated_data):
         # Extract location data if provided
@@ -109,7 +114,8 @@ class LocationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Location
-        fields = ['id', 'latitude', 'longitude', 'restaurant_id']
+        fields = ['id', 'latitude', 'longitude',
+                  'restaurant_id', 'restaurant_name']
 
     def get_restaurant_name(self, obj):
         return obj.restaurant.name if obj.restaurant else None
@@ -154,7 +160,9 @@ class FoodSerializer(serializers.ModelSerializer):
 
 
 class FoodChangeSerializer(serializers.ModelSerializer):
-    new_approved_supervisors_count = serializers.IntegerField(read_only=True)
+    new_approved_supervisors_count = serializers.IntegerField(
+        source='new_approval_count', read_only=True)
+    remaining_approvals = serializers.IntegerField(read_only=True)
     new_restaurant_name = serializers.CharField(
         source="new_restaurant.name", read_only=True)
     new_hazard_level = serializers.FloatField(read_only=True)
@@ -184,6 +192,7 @@ class FoodChangeSerializer(serializers.ModelSerializer):
             'new_image',
             'new_approved_supervisors',
             'new_approved_supervisors_count',
+            'remaining_approvals',
             'new_hazard_level',
             'reason',
             'date',
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from typing import Dict
+from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from ..models import ApprovalPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class ApprovalPolicyService:
+    """
+    Approval thresholds per action, read from ApprovalPolicy.
+
+    The thresholds are read on nearly every approval and queue request, so
+    they are cached in-process. Saving or deleting a policy clears the cache
+    of the current process through a signal; other processes re-read it after
+    APPROVAL_POLICY_CACHE_TTL seconds.
+    """
+
+    FOOD_CREATE = "food_create"
+    FOOD_CHANGE = "food_change"
+    FOOD_REMOVAL = "food_removal"
+
+    # Used for actions that have no policy row
+    DEFAULTS = {
+        FOOD_CREATE: 10,
+        FOOD_CHANGE: 2,
+        FOOD_REMOVAL: 2,
+    }
+
+    _lock = threading.Lock()
+    _thresholds = None
+    _loaded_at = 0.0
+
+    @classmethod
+    def thresholds(cls) -> Dict[str, int]:
+        """Return the required number of approvals for every action"""
+        ttl = getattr(settings, 'APPROVAL_POLICY_CACHE_TTL', 60)
+        thresholds = cls._thresholds
+        if thresholds is None or time.monotonic() - cls._loaded_at > ttl:
+            with cls._lock:
+                thresholds = dict(cls.DEFAULTS)
+                thresholds.update(ApprovalPolicy.objects.values_list(
+                    'action', 'required_approvals'))
+                cls._thresholds = thresholds
+                cls._loaded_at = time.monotonic()
+        return thresholds
+
+    @classmethod
+    def required(cls, action: str) -> int:
+        return cls.thresholds()[action]
+
+    @classmethod
+    def required_for_change(cls, is_deletion: bool) -> int:
+        return cls.required(cls.FOOD_REMOVAL if is_deletion else cls.FOOD_CHANGE)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls._thresholds = None
+        logger.debug("Approval policy cache cleared")
+
+    @classmethod
+    def change_threshold_met(cls) -> Q:
+        """Filter for food changes whose approval count reached their threshold"""
+        return (Q(is_deletion=False, new_approval_count__gte=cls.required(cls.FOOD_CHANGE)) |
+                Q(is_deletion=True, new_approval_count__gte=cls.required(cls.FOOD_REMOVAL)))
+
+    @classmethod
+    def remaining_food_approvals(cls):
+        """Expression for the number of approvals a food still needs"""
+        return Greatest(Value(cls.required(cls.FOOD_CREATE)) - F('approval_count'), Value(0))
+
+    @classmethod
+    def remaining_change_approvals(cls):
+        """Expression for the number of approvals a food change still needs"""
+        required = Case(
+            When(is_deletion=True, then=Value(cls.required(cls.FOOD_REMOVAL))),
+            default=Value(cls.required(cls.FOOD_CHANGE)),
+        )
+        return Greatest(required - F('new_approval_count'), Value(0))
@@ -0,0 +1,238 @@
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from ..models import Food, FoodChange
+from .approval_policy import ApprovalPolicyService
+from .catalog_cache import CatalogCache
+from .catalog_changes import CatalogChangeLog
+from .catalog_snapshot import CatalogSnapshotService
+from .food_change_service import FoodChangeService
+from .restaurant_service import RestaurantService
+from .search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ApprovalService:
+    """
+    Records supervisor approvals for new foods and food change proposals.
+
+    The number of approvals is kept in a denormalized counter
+    (Food.approval_count, FoodChange.new_approval_count) that is incremented
+    with an F() expression while the row is locked, so concurrent supervisors
+    can't lose updates and the threshold is crossed exactly once.
+
+    The thresholds come from ApprovalPolicyService unless the caller passes one.
+    """
+
+    @staticmethod
+    def approve_food(food_id: int, user, required_approvals: int = None) -> Tuple[Food, bool, bool]:
+        """
+        Record a supervisor's approval of a food.
+
+        Returns (food, recorded, became_approved): recorded is False if the
+        supervisor had already approved it, became_approved is True only for
+        the approval that crosses the threshold.
+        Raises Food.DoesNotExist if the food doesn't exist.
+        """
+        FoodApproval = Food.approved_supervisors.through
+        if required_approvals is None:
+            required_approvals = ApprovalPolicyService.required(ApprovalPolicyService.FOOD_CREATE)
+
+        with transaction.atomic():
+            food = Food.objects.select_for_update().get(pk=food_id)
+
+            if FoodApproval.objects.filter(food_id=food.id, user_id=user.id).exists():
+                return food, False, False
+
+            FoodApproval.objects.create(food_id=food.id, user_id=user.id)
+            Food.objects.filter(pk=food.id).update(
+                approval_count=F('approval_count') + 1)
+            # The row is locked, so the in-memory count is the stored one
+            food.approval_count += 1
+
+            became_approved = not food.is_approved and food.approval_count >= required_approvals
+            if became_approved:
+                food.is_approved = True
+                # post_save recomputes the restaurant hazard level and
+                # refreshes the catalog snapshot
+                food.save(update_fields=['is_approved'])
+                logger.info(
+                    f"Food #{food.id} reached {food.approval_count}/{required_approvals} approvals and is now approved")
+
+        return food, True, became_approved
+
+    @staticmethod
+    def approve_change(change_id: int, user, required_approvals: int = None) -> Tuple[FoodChange, bool, bool]:
+        """
+        Record a supervisor's approval of a food change (update or removal).
+
+        Returns (food_change, recorded, became_approved) like approve_food.
+        Crossing the threshold marks the change approved, and the
+        apply_food_change_on_approval signal applies it through FoodChangeService.
+        Raises FoodChange.DoesNotExist if the change doesn't exist.
+        """
+        ChangeApproval = FoodChange.new_approved_supervisors.through
+
+        with transaction.atomic():
+            food_change = FoodChange.objects.select_for_update().get(pk=change_id)
+            if required_approvals is None:
+                required_approvals = ApprovalPolicyService.required_for_change(food_change.is_deletion)
+
+            if ChangeApproval.objects.filter(foodchange_id=food_change.id, user_id=user.id).exists():
+                return food_change, False, False
+
+            ChangeApproval.objects.create(
+                foodchange_id=food_change.id, user_id=user.id)
+            FoodChange.objects.filter(pk=food_change.id).update(
+                new_approval_count=F('new_approval_count') + 1)
+            food_change.new_approval_count += 1
+
+            became_approved = (not food_change.new_is_approved and
+                               food_change.new_approval_count >= required_approvals)
+            if became_approved:
+                food_change.new_is_approved = True
+                food_change.save(update_fields=['new_is_approved'])
+                logger.info(
+                    f"Food change #{food_change.id} reached {food_change.new_approval_count}/{required_approvals} approvals and is now approved")
+
+        return food_change, True, became_approved
+
+    @classmethod
+    def bulk_approve(cls, user, food_ids: Iterable[int] = (), change_ids: Iterable[int] = ()) -> Dict[str, Any]:
+        """
+        Record a supervisor's approval of many foods and food changes at once.
+
+        Approvals are written with one bulk_create per through table and the
+        counters bumped with one UPDATE per model; the items that cross their
+        threshold are then found with a single query. Everything runs in one
+        transaction, and restaurant hazard levels are recomputed once per
+        affected restaurant instead of once per applied item.
+        """
+        with transaction.atomic(), RestaurantService.coalesce_hazard_updates():
+            foods = cls._bulk_approve_foods(
+                user, food_ids, ApprovalPolicyService.required(ApprovalPolicyService.FOOD_CREATE))
+            changes = cls._bulk_approve_changes(user, change_ids)
+
+        return {"foods": foods, "food_changes": changes}
+
+    @classmethod
+    def _bulk_approve_foods(cls, user, food_ids: Iterable[int], required_approvals: int) -> Dict[str, List[int]]:
+        FoodApproval = Food.approved_supervisors.through
+        food_ids = sorted(set(food_ids))
+
+        # Lock the rows in id order so concurrent bulk calls can't deadlock
+        existing_ids = list(Food.objects.select_for_update().filter(
+            id__in=food_ids).order_by('id').values_list('id', flat=True))
+        already_ids = set(FoodApproval.objects.filter(
+            user_id=user.id, food_id__in=existing_ids).values_list('food_id', flat=True))
+        new_ids = [food_id for food_id in existing_ids if food_id not in already_ids]
+
+        if new_ids:
+            FoodApproval.objects.bulk_create(
+                [FoodApproval(food_id=food_id, user_id=user.id) for food_id in new_ids])
+            Food.objects.filter(id__in=new_ids).update(
+                approval_count=F('approval_count') + 1)
+
+        crossed = dict(Food.objects.filter(
+            id__in=new_ids, is_approved=False, approval_count__gte=required_approvals
+        ).values_list('id', 'restaurant_id'))
+        if crossed:
+            cls.mark_foods_approved(crossed.keys(), set(crossed.values()))
+            logger.info(
+                f"Bulk approval by {user.username} approved foods {sorted(crossed)}")
+
+        return {
+            "recorded": new_ids,
+            "already_approved": sorted(already_ids),
+            "not_found": sorted(set(food_ids) - set(existing_ids)),
+            "approved": sorted(crossed),
+        }
+
+    @classmethod
+    def _bulk_approve_changes(cls, user, change_ids: Iterable[int]) -> Dict[str, List[int]]:
+        ChangeApproval = FoodChange.new_approved_supervisors.through
+        change_ids = sorted(set(change_ids))
+
+        existing_ids = list(FoodChange.objects.select_for_update().filter(
+            id__in=change_ids).order_by('id').values_list('id', flat=True))
+        already_ids = set(ChangeApproval.objects.filter(
+            user_id=user.id, foodchange_id__in=existing_ids).values_list('foodchange_id', flat=True))
+        new_ids = [change_id for change_id in existing_ids if change_id not in already_ids]
+
+        if new_ids:
+            ChangeApproval.objects.bulk_create(
+                [ChangeApproval(foodchange_id=change_id, user_id=user.id) for change_id in new_ids])
+            FoodChange.objects.filter(id__in=new_ids).update(
+                new_approval_count=F('new_approval_count') + 1)
+
+        crossed = list(FoodChange.objects.filter(
+            ApprovalPolicyService.change_threshold_met(), id__in=new_ids, new_is_approved=False
+        ).order_by('id').values_list('id', flat=True))
+        if crossed:
+            # update() doesn't send post_save, so the changes are applied here in one batch
+            FoodChange.objects.filter(id__in=crossed).update(new_is_approved=True)
+            FoodChangeService.apply_changes(crossed)
+            logger.info(
+                f"Bulk approval by {user.username} approved food changes {crossed}")
+
+        return {
+            "recorded": new_ids,
+            "already_approved": sorted(already_ids),
+            "not_found": sorted(set(change_ids) - set(existing_ids)),
+            "approved": crossed,
+        }
+
+    @staticmethod
+    def mark_foods_approved(food_ids: Iterable[int], restaurant_ids: Iterable[int]) -> int:
+        """
+        Approve the given foods with a single UPDATE. queryset.update() doesn't
+        send post_save, so the restaurant hazard levels (and with them the
+        restaurant snapshots), the catalog cache, food snapshot pages and
+        change log are brought up to date here.
+        Returns the number of foods approved.
+        """
+        food_ids = list(food_ids)
+        restaurant_ids = set(restaurant_ids)
+        updated_count = Food.objects.filter(
+            id__in=food_ids, is_approved=False).update(is_approved=True)
+
+        for restaurant_id in restaurant_ids:
+            RestaurantService.update_restaurant_hazard_level(restaurant_id)
+
+        if updated_count > 0:
+            CatalogCache.invalidate('foods')
+            CatalogSnapshotService.refresh(food_ids=food_ids)
+            CatalogChangeLog.record("food", food_ids)
+            SearchIndex.sync("food", food_ids)
+
+        return updated_count
+
+    @staticmethod
+    def recount_food_approvals(food_ids: Iterable[int]) -> None:
+        """
+        Re-derive Food.approval_count from the through table, for approvals
+        that were added or removed outside approve_food (admin, .add(), deleted users)
+        """
+        food_ids = list(food_ids)
+        if not food_ids:
+            return
+        FoodApproval = Food.approved_supervisors.through
+        counts = FoodApproval.objects.filter(food_id=OuterRef('pk')).order_by().values(
+            'food_id').annotate(count=Count('id')).values('count')
+        Food.objects.filter(id__in=food_ids).update(
+            approval_count=Coalesce(Subquery(counts), 0))
+
+    @staticmethod
+    def recount_change_approvals(change_ids: Iterable[int]) -> None:
+        """Re-derive FoodChange.new_approval_count from the through table"""
+        change_ids = list(change_ids)
+        if not change_ids:
+            return
+        ChangeApproval = FoodChange.new_approved_supervisors.through
+        counts = ChangeApproval.objects.filter(foodchange_id=OuterRef('pk')).order_by().values(
+            'foodchange_id').annotate(count=Count('id')).values('count')
+        FoodChange.objects.filter(id__in=change_ids).update(
+            new_approval_count=Coalesce(Subquery(counts), 0))
@@ -0,0 +1,208 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Sequence
+from django.conf import settings
+from ..models import Ingredient, Restaurant
+from .catalog_cache import CatalogCache
+from .search_index import fold
+
+logger = logging.getLogger(__name__)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus swapped neighbours),
+    giving up with limit + 1 as soon as the distance must exceed limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 \
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of every word, padded at the start so prefixes share them"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word}"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class AutocompleteTable:
+    """
+    Immutable name index of one kind of object.
+
+    keys is a sorted list of folded names, plus the rest of each name from
+    every later word ("turos csusza" and "csusza"), so any word prefix is a
+    binary search away. The trigram map finds candidates for typo-tolerant
+    matching when the prefix search comes up short.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.names = []
+        self.words = []
+        pairs = []
+        self.grams = {}
+        for object_id, name in rows:
+            position = len(self.names)
+            self.names.append((object_id, name))
+            words = fold(name).split()
+            self.words.append(words)
+            for start in range(len(words)):
+                pairs.append((" ".join(words[start:]), start > 0, position))
+            for gram in trigrams(" ".join(words)):
+                self.grams.setdefault(gram, []).append(position)
+        pairs.sort()
+        self.keys = [key for key, _, _ in pairs]
+        self.entries = [(inner, position) for _, inner, position in pairs]
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix_matches(self, query: str, limit: int) -> List[int]:
+        """
+        Positions of names with a word starting with the query, whole-name
+        matches first. Further query words ("oliv oi") have to start some
+        word of the name as well.
+        """
+        head, *rest = query.split()
+        hits = {}
+        index = bisect_left(self.keys, head)
+        # Look a little past the limit so whole-name matches can outrank word matches
+        while index < len(self.keys) and self.keys[index].startswith(head) and len(hits) < limit * 4:
+            inner, position = self.entries[index]
+            index += 1
+            if rest and not all(any(word.startswith(term) for word in self.words[position])
+                                for term in rest):
+                continue
+            hits[position] = min(hits.get(position, True), inner)
+        return sorted(hits, key=lambda position: (
+            hits[position], len(self.names[position][1]), self.names[position][1]))[:limit]
+
+    def fuzzy_matches(self, query: str, limit: int, exclude=()) -> List[int]:
+        """
+        Positions of names with a word whose start is within a small edit
+        distance of the query, closest first
+        """
+        max_distance = 1 if len(query) < 6 else 2
+        shared = Counter()
+        for gram in trigrams(query):
+            for position in self.grams.get(gram, ()):
+                shared[position] += 1
+
+        ranked = []
+        for position, _ in shared.most_common(100):
+            if position in exclude:
+                continue
+            distance = min((
+                edit_distance(query, word[:length], max_distance)
+                for word in self.words[position]
+                for length in (len(query) - 1, len(query), len(query) + 1)
+                if length > 0
+            ), default=max_distance + 1)
+            if distance <= max_distance:
+                ranked.append((distance, len(self.names[position][1]), position))
+        ranked.sort()
+        return [position for _, _, position in ranked[:limit]]
+
+
+class AutocompleteIndex:
+    """
+    Process-local name indexes of ingredients and restaurants for the picker
+    autocomplete, so completing a name doesn't search the database.
+
+    The tables are tagged with the 'autocomplete' version of CatalogCache,
+    which signals bump when a name is added, renamed or deleted, and are
+    reloaded when it moves on. The version is read at most every
+    AUTOCOMPLETE_CHECK_INTERVAL seconds, so most completions run without a
+    query; invalidate() makes this process re-read it at once.
+    """
+
+    NAMESPACE = 'autocomplete'
+    SOURCES = {
+        'ingredient': Ingredient,
+        'restaurant': Restaurant,
+    }
+    # Queries shorter than this are matched by prefix only
+    FUZZY_MIN_LENGTH = 3
+
+    _lock = threading.Lock()
+    _tables = {}
+    _version = None
+    _checked_at = 0.0
+
+    @classmethod
+    def version(cls) -> int:
+        """The namespace version, re-read once the check interval has passed"""
+        interval = getattr(settings, 'AUTOCOMPLETE_CHECK_INTERVAL', 5)
+        if cls._version is None or time.monotonic() - cls._checked_at >= interval:
+            cls._version, _ = CatalogCache.get_version(cls.NAMESPACE)
+            cls._checked_at = time.monotonic()
+        return cls._version
+
+    @classmethod
+    def table(cls, kind: str) -> AutocompleteTable:
+        version = cls.version()
+        table = cls._tables.get(kind)
+        if table is None or table.version != version:
+            with cls._lock:
+                table = cls._tables.get(kind)
+                if table is None or table.version != version:
+                    table = AutocompleteTable(version, cls.SOURCES[kind].objects.values_list('id', 'name'))
+                    cls._tables[kind] = table
+                    logger.debug(
+                        f"Loaded {len(table)} {kind} names into the autocomplete index (version {version})")
+        return table
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Drop the tables of this process and make other processes reload theirs"""
+        cls._tables = {}
+        cls._version = None
+        CatalogCache.invalidate(cls.NAMESPACE)
+
+    @classmethod
+    def complete(cls, query: str, kinds: Sequence[str] = (), limit: int = 10) -> List[Dict]:
+        """
+        Names starting with the query (at any word), then close misspellings,
+        ignoring case and accents
+        """
+        query = " ".join(fold(query).split())
+        if not query:
+            return []
+
+        results = []
+        for kind in kinds or cls.SOURCES:
+            table = cls.table(kind)
+            positions = table.prefix_matches(query, limit)
+            matches = [(position, "prefix") for position in positions]
+            if len(positions) < limit and len(query) >= cls.FUZZY_MIN_LENGTH:
+                matches += [(position, "fuzzy") for position in table.fuzzy_matches(
+                    query, limit - len(positions), exclude=set(positions))]
+            results += [
+                {"type": kind, "id": table.names[position][0],
+                 "name": table.names[position][1], "match": match}
+                for position, match in matches
+            ]
+
+        if len(kinds or cls.SOURCES) > 1:
+            # Prefix matches of every kind before any fuzzy match
+            results.sort(key=lambda result: result["match"] != "prefix")
+        return results[:limit]
@@ -0,0 +1,99 @@
+import hashlib
+import logging
+import time
+from typing import Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from ..models import CatalogVersion
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache:
+    """
+    Versioned response cache for the read-mostly catalog endpoints.
+
+    Every namespace (restaurants, foods, ingredients, locations) has a version
+    counter. Cached responses are keyed by the current version, so bumping the
+    counter invalidates every cached page of that namespace at once without
+    having to find and delete the individual keys.
+
+    The counters live in the CatalogVersions table, so a bump made by any
+    process is seen by all of them on their next read; only the response
+    bodies are kept in the configured cache, which may be per-process.
+    """
+
+    NAMESPACES = ('restaurants', 'foods', 'ingredients', 'locations')
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+    @classmethod
+    def get_version(cls, namespace: str) -> Tuple[int, float]:
+        """
+        Return the current (version, last_modified) pair for a namespace
+        """
+        row = CatalogVersion.objects.filter(namespace=namespace).values_list(
+            'version', 'modified').first()
+        if row is None:
+            row = cls._create(namespace)
+        return row
+
+    @staticmethod
+    def _create(namespace: str) -> Tuple[int, float]:
+        # Seed from the clock rather than 1 so a counter that was lost (a
+        # fresh database) never reuses a version that still has responses
+        # cached under it
+        now = time.time()
+        try:
+            with transaction.atomic():
+                CatalogVersion.objects.create(namespace=namespace, version=int(now * 1000), modified=now)
+        except IntegrityError:
+            # Created by a concurrent request
+            pass
+        return CatalogVersion.objects.filter(namespace=namespace).values_list(
+            'version', 'modified').get()
+
+    @classmethod
+    def invalidate(cls, *namespaces: str) -> None:
+        """
+        Bump the version of the given namespaces so their cached responses are
+        no longer served. When called inside a transaction, the bump happens on
+        commit so a concurrent reader can't re-cache the old data under the new version.
+        """
+        def bump():
+            now = time.time()
+            bumped = set(CatalogVersion.objects.filter(namespace__in=namespaces).values_list(
+                'namespace', flat=True))
+            CatalogVersion.objects.filter(namespace__in=bumped).update(
+                version=F('version') + 1, modified=now)
+            for namespace in set(namespaces) - bumped:
+                cls._create(namespace)
+            logger.debug(f"Catalog cache namespaces {', '.join(namespaces)} invalidated")
+
+        transaction.on_commit(bump)
+
+    @classmethod
+    def _response_key(cls, namespace: str, version: int, path: str) -> str:
+        digest = hashlib.md5(path.encode('utf-8')).hexdigest()
+        return f"catalog:{namespace}:v{version}:{digest}"
+
+    @classmethod
+    def get_response(cls, namespace: str, version: int, path: str) -> Optional[bytes]:
+        """Return the cached response body for a path, if any"""
+        return cls._cache().get(cls._response_key(namespace, version, path))
+
+    @classmethod
+    def set_response(cls, namespace: str, version: int, path: str, body: bytes) -> None:
+        """Store a rendered response body for a path under the given version"""
+        timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60)
+        cls._cache().set(cls._response_key(namespace, version, path), body, timeout)
+
+    @staticmethod
+    def make_etag(namespace: str, version: int, path: str) -> str:
+        digest = hashlib.md5(
+            f"{namespace}:{version}:{path}".encode('utf-8')).hexdigest()
+        return f'"{digest}"'
@@ -0,0 +1,122 @@
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Iterable
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+from ..models import CatalogChange, Food, Ingredient, Restaurant
+from ..serializers import FoodSerializer, IngredientSerializer, RestaurantSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogChangeLog:
+    """
+    Change log behind the /catalog/changes/ delta-sync endpoint.
+
+    Signals append an entry for every created, updated or deleted food,
+    restaurant and ingredient. Clients remember the version (the id of the
+    last entry they have seen) and only download what changed after it.
+
+    Entries are written in the transaction of the change they describe, so
+    ids are handed out in insert order but can become visible out of order
+    when transactions overlap. Readers therefore only see entries older than
+    CATALOG_CHANGES_SETTLE_SECONDS, by which time every transaction that took
+    a lower id is expected to have committed or rolled back.
+    """
+
+    # Response key, model and serializer for each logged entity
+    ENTITIES = {
+        "food": ("foods", Food, FoodSerializer),
+        "restaurant": ("restaurants", Restaurant, RestaurantSerializer),
+        "ingredient": ("ingredients", Ingredient, IngredientSerializer),
+    }
+
+    @staticmethod
+    def record(entity: str, object_ids: Iterable[int], is_deletion: bool = False) -> None:
+        """
+        Append change entries for the given objects, in the current
+        transaction so they are committed or rolled back with the change
+        """
+        object_ids = [object_id for object_id in object_ids if object_id is not None]
+        if not object_ids:
+            return
+        CatalogChange.objects.bulk_create([
+            CatalogChange(entity=entity, object_id=object_id,
+                          is_deletion=is_deletion)
+            for object_id in object_ids
+        ])
+
+    @staticmethod
+    def settled():
+        """Entries old enough that no lower id can still show up"""
+        settle = getattr(settings, 'CATALOG_CHANGES_SETTLE_SECONDS', 0)
+        if not settle:
+            return CatalogChange.objects.all()
+        return CatalogChange.objects.filter(
+            created_at__lte=timezone.now() - timedelta(seconds=settle))
+
+    @classmethod
+    def current_version(cls) -> int:
+        return cls.settled().aggregate(version=Max('id'))['version'] or 0
+
+    @classmethod
+    def changes_since(cls, since: int, limit: int = 1000) -> Dict[str, Any]:
+        """
+        Return everything that changed after the given version, at most
+        `limit` log entries at a time (has_more tells the client to ask again).
+        """
+        oldest = CatalogChange.objects.aggregate(oldest=Min('id'))['oldest']
+        if oldest is not None and since < oldest - 1:
+            # Entries the client needs were pruned - it has to reload everything
+            return {
+                "version": cls.current_version(),
+                "full_sync_required": True,
+            }
+
+        entries = list(cls.settled().filter(id__gt=since).order_by(
+            'id').values_list('id', 'entity', 'object_id', 'is_deletion')[:limit])
+
+        # Only the latest entry per object matters
+        latest = {}
+        for _, entity, object_id, is_deletion in entries:
+            latest[(entity, object_id)] = is_deletion
+
+        result = {
+            "version": entries[-1][0] if entries else max(since, cls.current_version()),
+            "has_more": len(entries) == limit,
+            "deleted": {},
+        }
+
+        for entity, (key, model, serializer_class) in cls.ENTITIES.items():
+            changed_ids = {object_id for (e, object_id), is_deletion in latest.items()
+                           if e == entity and not is_deletion}
+            deleted_ids = {object_id for (e, object_id), is_deletion in latest.items()
+                           if e == entity and is_deletion}
+
+            queryset = model.objects.filter(id__in=changed_ids)
+            if model is Food:
+                # Unapproved foods aren't part of the public catalog
+                queryset = queryset.filter(is_approved=True).select_related(
+                    'restaurant', 'created_by').prefetch_related('ingredients')
+            objects = list(queryset) if changed_ids else []
+
+            # Changed objects that are gone (or no longer public) count as deleted
+            deleted_ids |= changed_ids - {obj.id for obj in objects}
+
+            result[key] = serializer_class(objects, many=True).data
+            result["deleted"][key] = sorted(deleted_ids)
+
+        return result
+
+    @classmethod
+    def prune(cls, days: int) -> int:
+        """
+        Delete log entries older than the given number of days. The newest
+        entry is always kept so the current version never goes backwards.
+        """
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = CatalogChange.objects.filter(created_at__lt=cutoff).exclude(
+            id=cls.current_version()).delete()
+        logger.info(f"Pruned {deleted} catalog change log entries")
+        return deleted
@@ -0,0 +1,180 @@
+import logging
+from typing import Iterable, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, Q, Subquery
+from rest_framework.renderers import JSONRenderer
+from ..models import CatalogSnapshot, Food, Restaurant
+from ..serializers import FoodSerializer, RestaurantSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshotService:
+    """
+    Maintains the materialized catalog snapshot (CatalogSnapshot rows).
+
+    Every restaurant gets a pre-serialized document with its approved foods,
+    and approved foods are split into pages by id range (page n holds ids
+    n * page_size + 1 .. (n + 1) * page_size). Bucketing by id instead of by
+    offset means a changed food only ever touches its own page, so snapshots
+    can be rebuilt incrementally.
+    """
+
+    @staticmethod
+    def page_size() -> int:
+        return getattr(settings, 'CATALOG_SNAPSHOT_PAGE_SIZE', 100)
+
+    @classmethod
+    def page_for(cls, food_id: int) -> int:
+        return (food_id - 1) // cls.page_size()
+
+    @classmethod
+    def refresh(cls, food_ids: Iterable[int] = (), restaurant_ids: Iterable[int] = ()) -> None:
+        """
+        Rebuild the snapshots affected by changes to the given foods and restaurants.
+        Runs on commit so the snapshot never contains uncommitted data.
+        """
+        food_ids = set(food_ids)
+        restaurant_ids = set(restaurant_ids)
+
+        def rebuild():
+            try:
+                if food_ids:
+                    cls.rebuild_food_pages({cls.page_for(food_id)
+                                            for food_id in food_ids})
+                if restaurant_ids:
+                    cls.rebuild_restaurants(restaurant_ids)
+            except Exception as e:
+                # A failed refresh leaves a stale snapshot, not a failed request;
+                # rebuild_catalog_snapshot repairs it
+                logger.error(f"Error refreshing catalog snapshot: {str(e)}")
+
+        transaction.on_commit(rebuild)
+
+    @classmethod
+    def rebuild_restaurants(cls, restaurant_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Rebuild the snapshot of the given restaurants (all of them if None).
+        Returns the number of snapshots written.
+        """
+        restaurants = Restaurant.objects.prefetch_related(
+            Prefetch(
+                'foods',
+                queryset=Food.objects.filter(is_approved=True).select_related(
+                    'restaurant', 'created_by').prefetch_related('ingredients'),
+                to_attr='approved_foods',
+            )
+        )
+        if restaurant_ids is not None:
+            restaurant_ids = set(restaurant_ids)
+            restaurants = restaurants.filter(id__in=restaurant_ids)
+
+        renderer = JSONRenderer()
+        snapshots = []
+        for restaurant in restaurants:
+            data = RestaurantSerializer(restaurant).data
+            data['foods'] = FoodSerializer(
+                restaurant.approved_foods, many=True).data
+            snapshots.append(CatalogSnapshot(
+                kind="restaurant", key=restaurant.id, payload=renderer.render(data)))
+
+        cls._save(snapshots)
+
+        # Restaurants that no longer exist lose their snapshot
+        if restaurant_ids is not None:
+            missing = restaurant_ids - {snapshot.key for snapshot in snapshots}
+            if missing:
+                CatalogSnapshot.objects.filter(
+                    kind="restaurant", key__in=missing).delete()
+
+        logger.info(f"Rebuilt {len(snapshots)} restaurant snapshots")
+        return len(snapshots)
+
+    @classmethod
+    def rebuild_food_pages(cls, pages: Optional[Iterable[int]] = None) -> int:
+        """
+        Rebuild the given food pages (all of them if None).
+        Returns the number of snapshots written.
+        """
+        page_size = cls.page_size()
+        foods = Food.objects.filter(is_approved=True).select_related(
+            'restaurant', 'created_by').prefetch_related('ingredients').order_by('id')
+
+        if pages is not None:
+            pages = set(pages)
+            if not pages:
+                return 0
+            ranges = Q()
+            for page in pages:
+                ranges |= Q(id__gt=page * page_size,
+                            id__lte=(page + 1) * page_size)
+            foods = foods.filter(ranges)
+
+        by_page = {}
+        for food in foods:
+            by_page.setdefault(cls.page_for(food.id), []).append(food)
+
+        renderer = JSONRenderer()
+        snapshots = [
+            CatalogSnapshot(kind="food_page", key=page,
+                            payload=renderer.render(FoodSerializer(page_foods, many=True).data))
+            for page, page_foods in by_page.items()
+        ]
+        cls._save(snapshots)
+
+        # Pages whose foods were all deleted or unapproved disappear
+        stale = CatalogSnapshot.objects.filter(kind="food_page")
+        if pages is not None:
+            stale = stale.filter(key__in=pages)
+        stale.exclude(key__in=by_page.keys()).delete()
+
+        logger.info(f"Rebuilt {len(snapshots)} food page snapshots")
+        return len(snapshots)
+
+    @staticmethod
+    def _save(snapshots) -> None:
+        if snapshots:
+            CatalogSnapshot.objects.bulk_create(
+                snapshots,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['kind', 'key'],
+                update_fields=['payload', 'updated_at'],
+            )
+
+    @staticmethod
+    def get_restaurant(restaurant_id: int) -> Optional[bytes]:
+        """Return the pre-serialized restaurant document, if there is one"""
+        payload = CatalogSnapshot.objects.filter(
+            kind="restaurant", key=restaurant_id).values_list('payload', flat=True).first()
+        return bytes(payload) if payload is not None else None
+
+    @classmethod
+    def get_or_build_restaurant(cls, restaurant_id: int) -> Optional[bytes]:
+        """
+        Return the restaurant document, building it first when it was never
+        written. None when the restaurant doesn't exist.
+        """
+        payload = cls.get_restaurant(restaurant_id)
+        if payload is None and cls.rebuild_restaurants([restaurant_id]):
+            payload = cls.get_restaurant(restaurant_id)
+        return payload
+
+    @staticmethod
+    def get_food_page(page: int) -> Tuple[Optional[bytes], Optional[int]]:
+        """
+        Return the pre-serialized food page and the number of the next
+        non-empty page, both from a single query
+        """
+        following = CatalogSnapshot.objects.filter(
+            kind="food_page", key__gt=page).order_by('key').values('key')[:1]
+        row = CatalogSnapshot.objects.filter(kind="food_page", key=page).annotate(
+            next_page=Subquery(following)).values_list('payload', 'next_page').first()
+
+        if row is None:
+            # Empty page - point the client at the next one that has foods
+            return None, CatalogSnapshot.objects.filter(
+                kind="food_page", key__gt=page).order_by('key').values_list('key', flat=True).first()
+
+        return bytes(row[0]), row[1]
@@ -0,0 +1,104 @@
+import logging
+import secrets
+from datetime import timedelta
+from typing import Dict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import ConfirmationToken, User
+
+logger = logging.getLogger(__name__)
+
+
+class ConfirmationTokenService:
+    """
+    Issues, checks and purges the email confirmation codes of signups.
+
+    Codes are looked up through the unique index on ConfirmationToken.code
+    and expire CONFIRMATION_TOKEN_TTL_HOURS after they were issued.
+    """
+
+    @staticmethod
+    def ttl() -> timedelta:
+        return timedelta(hours=settings.CONFIRMATION_TOKEN_TTL_HOURS)
+
+    @staticmethod
+    def generate_code() -> str:
+        # 24 random bytes are 32 URL-safe characters, the length of the code column
+        return secrets.token_urlsafe(24)
+
+    @classmethod
+    def issue(cls, user: User) -> ConfirmationToken:
+        return ConfirmationToken.objects.create(code=cls.generate_code(), user_id=user)
+
+    @classmethod
+    def is_expired(cls, token: ConfirmationToken) -> bool:
+        return token.created_at < timezone.now() - cls.ttl()
+
+    @classmethod
+    def expired(cls):
+        return ConfirmationToken.objects.filter(created_at__lt=timezone.now() - cls.ttl())
+
+    @classmethod
+    def abandoned_users(cls):
+        """Accounts never confirmed whose codes have all expired"""
+        cutoff = timezone.now() - cls.ttl()
+        valid_holders = ConfirmationToken.objects.filter(created_at__gte=cutoff).values('user_id')
+        return User.objects.filter(
+            is_active=False, confirmation_codes__created_at__lt=cutoff).exclude(id__in=valid_holders)
+
+    @classmethod
+    def release(cls, email: str = None, username: str = None) -> int:
+        """
+        Delete the abandoned account holding the given email or username, so
+        signing up again with them works without waiting for the purge.
+        Returns the number of users deleted.
+        """
+        match = Q()
+        if email:
+            match |= Q(email=email)
+        if username:
+            match |= Q(username=username)
+        if not match:
+            return 0
+        user_ids = list(cls.abandoned_users().filter(match).order_by().values_list('id', flat=True).distinct())
+        if user_ids:
+            User.objects.filter(id__in=user_ids).delete()
+            logger.info(f"Released {len(user_ids)} unconfirmed users with expired codes for a new signup")
+        return len(user_ids)
+
+    @classmethod
+    def purge_expired(cls, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Delete expired codes, and the accounts they belonged to when those
+        were never confirmed and have no code that is still valid. Works in
+        batches of batch_size users, each in its own transaction.
+        Returns counts of deleted users and tokens.
+        """
+        result = {"users": 0, "tokens": 0}
+        cutoff = timezone.now() - cls.ttl()
+
+        while True:
+            with transaction.atomic():
+                user_ids = list(cls.abandoned_users().order_by().values_list(
+                    'id', flat=True).distinct()[:batch_size])
+                if not user_ids:
+                    break
+                # The tokens go with their users (on_delete=CASCADE)
+                result["tokens"] += ConfirmationToken.objects.filter(user_id__in=user_ids).count()
+                User.objects.filter(id__in=user_ids).delete()
+                result["users"] += len(user_ids)
+
+        # Expired codes of users who are active, or still have a valid code
+        while True:
+            token_ids = list(ConfirmationToken.objects.filter(
+                created_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+            if not token_ids:
+                break
+            ConfirmationToken.objects.filter(id__in=token_ids).delete()
+            result["tokens"] += len(token_ids)
+
+        logger.info(f"Purged {result['tokens']} expired confirmation tokens "
+                    f"and {result['users']} unconfirmed users")
+        return result
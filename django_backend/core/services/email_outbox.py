@@ -0,0 +1,190 @@
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from typing import Dict, Optional
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from ..models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutbox:
+    """
+    Transactional outbox for outgoing email.
+
+    enqueue() only inserts an OutboundEmail row, so a request never waits on
+    the mail server. send_pending() claims a batch of due emails and sends
+    them over a single connection of the configured EMAIL_BACKEND; failed
+    emails are retried with exponential backoff until MAX_ATTEMPTS.
+
+    Emails are sent by the send_queued_emails command, or, with
+    EMAIL_OUTBOX_IN_PROCESS on, by a background thread of the web process.
+    The thread is started with the server (so retries left over from a
+    restart go out) and woken by enqueue() once the enqueuing transaction
+    commits.
+    """
+
+    MAX_ATTEMPTS = 6
+    BASE_DELAY = 30      # seconds before the first retry, doubled for every further one
+    MAX_DELAY = 3600
+    # Seconds added to a batch's worst-case send time before its claim expires
+    LEASE_MARGIN = 60
+
+    _lock = threading.Lock()
+    _wakeup = threading.Event()
+    _thread = None
+
+    @classmethod
+    def enqueue(cls, to: str, subject: str, body: str = "", html_body: str = "",
+                from_email: Optional[str] = None) -> OutboundEmail:
+        email = OutboundEmail.objects.create(
+            to=to, subject=subject, body=body, html_body=html_body, from_email=from_email or "")
+        if getattr(settings, 'EMAIL_OUTBOX_IN_PROCESS', False):
+            transaction.on_commit(cls.wake)
+        return email
+
+    @classmethod
+    def retry_delay(cls, attempts: int) -> timedelta:
+        return timedelta(seconds=min(cls.BASE_DELAY * 2 ** (attempts - 1), cls.MAX_DELAY))
+
+    @classmethod
+    def lease(cls, batch_size: int) -> timedelta:
+        """
+        How long a worker holds the emails it claimed before another worker
+        may take them over: long enough for every email of the batch to run
+        into EMAIL_TIMEOUT
+        """
+        timeout = getattr(settings, 'EMAIL_TIMEOUT', None) or 30
+        return timedelta(seconds=batch_size * timeout + cls.LEASE_MARGIN)
+
+    @classmethod
+    def _claim(cls, batch_size: int):
+        """
+        Mark up to batch_size due emails as ours. The UPDATE repeats the due
+        condition, so an email is claimed by at most one worker even when
+        several pick the same candidates.
+        """
+        now = timezone.now()
+        due = Q(status=OutboundEmail.PENDING) | Q(status=OutboundEmail.SENDING)
+        candidates = list(OutboundEmail.objects.filter(
+            due, next_attempt_at__lte=now).order_by('next_attempt_at', 'id').values_list(
+            'id', flat=True)[:batch_size])
+        if not candidates:
+            return []
+
+        token = uuid.uuid4().hex
+        OutboundEmail.objects.filter(due, id__in=candidates, next_attempt_at__lte=now).update(
+            status=OutboundEmail.SENDING, claimed_by=token,
+            next_attempt_at=now + cls.lease(batch_size))
+        return list(OutboundEmail.objects.filter(
+            claimed_by=token, status=OutboundEmail.SENDING).order_by('id'))
+
+    @staticmethod
+    def _message(email: OutboundEmail, connection) -> EmailMultiAlternatives:
+        message = EmailMultiAlternatives(
+            email.subject, email.body, email.from_email or None, [email.to], connection=connection)
+        if email.html_body:
+            message.attach_alternative(email.html_body, "text/html")
+        return message
+
+    @classmethod
+    def send_pending(cls, batch_size: int = 50) -> Dict[str, int]:
+        """
+        Send one batch of due emails over a single backend connection.
+        Returns counts of sent, retried and failed (given up) emails.
+        """
+        result = {"sent": 0, "retried": 0, "failed": 0}
+        emails = cls._claim(batch_size)
+        if not emails:
+            return result
+
+        connection = None
+        for email in emails:
+            try:
+                if connection is None:
+                    connection = get_connection(fail_silently=False)
+                    connection.open()
+                connection.send_messages([cls._message(email, connection)])
+            except Exception as e:
+                # The connection may be what failed; open a new one for the next email
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                    connection = None
+
+                email.attempts += 1
+                email.last_error = f"{type(e).__name__}: {e}"[:2000]
+                email.claimed_by = ""
+                if email.attempts >= cls.MAX_ATTEMPTS:
+                    email.status = OutboundEmail.FAILED
+                    result["failed"] += 1
+                    logger.error(f"Giving up on email {email.id} to {email.to} "
+                                 f"after {email.attempts} attempts: {email.last_error}")
+                else:
+                    email.status = OutboundEmail.PENDING
+                    email.next_attempt_at = timezone.now() + cls.retry_delay(email.attempts)
+                    result["retried"] += 1
+                    logger.warning(f"Sending email {email.id} to {email.to} failed "
+                                   f"(attempt {email.attempts}), retrying at {email.next_attempt_at}: "
+                                   f"{email.last_error}")
+                email.save(update_fields=['attempts', 'last_error', 'claimed_by', 'status', 'next_attempt_at'])
+                continue
+
+            # Marked right away, so a crash later in the batch can't send it again
+            OutboundEmail.objects.filter(id=email.id).update(
+                status=OutboundEmail.SENT, sent_at=timezone.now(), claimed_by="",
+                attempts=F('attempts') + 1)
+            result["sent"] += 1
+
+        if connection is not None:
+            connection.close()
+
+        logger.info(f"Email outbox: {result['sent']} sent, {result['retried']} to retry, "
+                    f"{result['failed']} failed")
+        return result
+
+    @classmethod
+    def send_all(cls, batch_size: int = 50) -> Dict[str, int]:
+        """Send batches until no email is due"""
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        while True:
+            result = cls.send_pending(batch_size)
+            for key, count in result.items():
+                totals[key] += count
+            if not any(result.values()):
+                return totals
+
+    @classmethod
+    def start(cls) -> None:
+        """Start the in-process worker thread if it isn't running"""
+        with cls._lock:
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls._run_worker, name="email-outbox", daemon=True)
+                cls._thread.start()
+                logger.info("Email outbox worker thread started")
+
+    @classmethod
+    def wake(cls) -> None:
+        """Start the in-process worker thread if needed and have it send now"""
+        cls.start()
+        cls._wakeup.set()
+
+    @classmethod
+    def _run_worker(cls) -> None:
+        # Also wakes up on its own, for retries that come due
+        interval = getattr(settings, 'EMAIL_OUTBOX_POLL_INTERVAL', 30)
+        while True:
+            cls._wakeup.wait(timeout=interval)
+            cls._wakeup.clear()
+            close_old_connections()
+            try:
+                cls.send_all()
+            except Exception as e:
+                logger.error(f"Email outbox worker failed: {str(e)}")
@@ -0,0 +1,203 @@
+import logging
+from typing import Callable, Dict, Iterable, Optional
+from django.db import connection, transaction
+from django.utils import timezone
+from ..models import Food, FoodChange
+from .approval_policy import ApprovalPolicyService
+from .catalog_cache import CatalogCache
+from .catalog_changes import CatalogChangeLog
+from .catalog_snapshot import CatalogSnapshotService
+from .ingredient_registry import IngredientRegistry
+from .ingredient_service import IngredientService
+from .restaurant_service import RestaurantService
+from .search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class FoodChangeService:
+    """
+    Applies approved food changes (updates and removals) to their foods.
+
+    Used by the approval signal, bulk approvals and process_pending_changes,
+    so a change is applied the same way however it got approved. A batch of
+    changes is applied with a fixed number of queries: one executemany UPDATE
+    for the foods, one delete and one bulk_create for the ingredient through table,
+    one delete for removed foods, and one hazard recompute per restaurant.
+    """
+
+    # Food fields copied from the matching new_* field of a change
+    COPIED_FIELDS = (
+        'name', 'macro_table', 'serving_size', 'is_organic',
+        'is_gluten_free', 'is_alcohol_free', 'is_lactose_free',
+    )
+
+    @classmethod
+    def apply_changes(cls, change_ids: Iterable[int], batch_size: int = 500) -> Dict[str, int]:
+        """
+        Apply the given approved changes. Changes that aren't approved or were
+        already applied are skipped, so calling this twice is harmless.
+        Returns counts of applied changes, updated foods and deleted foods.
+        """
+        change_ids = sorted(set(change_ids))
+        result = {"applied": 0, "updated": 0, "deleted": 0}
+        if not change_ids:
+            return result
+
+        FoodIngredient = Food.ingredients.through
+        ChangeIngredient = FoodChange.new_ingredients.through
+
+        with transaction.atomic(), RestaurantService.coalesce_hazard_updates():
+            # Locking the changes keeps two appliers from applying the same change
+            changes = list(FoodChange.objects.select_for_update().filter(
+                id__in=change_ids, new_is_approved=True, applied_date__isnull=True
+            ).order_by('id'))
+            if not changes:
+                return result
+
+            # Latest change per food wins; a removal wins over any update
+            final = {}
+            for change in changes:
+                if change.old_version_id is None:
+                    continue
+                current = final.get(change.old_version_id)
+                if current is None or not current.is_deletion:
+                    final[change.old_version_id] = change
+
+            foods = Food.objects.in_bulk(list(final.keys()))
+            updates = {food_id: change for food_id, change in final.items()
+                       if food_id in foods and not change.is_deletion}
+            removals = [food_id for food_id, change in final.items()
+                        if food_id in foods and change.is_deletion]
+
+            restaurant_ids = {foods[food_id].restaurant_id for food_id in final
+                              if food_id in foods}
+
+            if updates:
+                cls._apply_updates(foods, updates, FoodIngredient,
+                                   ChangeIngredient, batch_size)
+                restaurant_ids |= {change.new_restaurant_id for change in updates.values()}
+
+            if removals:
+                # Goes through the delete signals, which log the tombstones
+                # and invalidate the cached food lists
+                Food.objects.filter(id__in=removals).delete()
+
+            FoodChange.objects.filter(id__in=[change.id for change in changes]).update(
+                applied_date=timezone.now())
+
+            for restaurant_id in restaurant_ids:
+                RestaurantService.update_restaurant_hazard_level(restaurant_id)
+
+            # The bulk UPDATE doesn't send post_save, so notify the catalog here.
+            # The restaurant snapshots are refreshed with their hazard levels.
+            if updates:
+                CatalogCache.invalidate('foods')
+                CatalogChangeLog.record("food", updates.keys())
+                SearchIndex.sync("food", updates.keys())
+                CatalogSnapshotService.refresh(food_ids=updates.keys())
+
+        result = {"applied": len(changes), "updated": len(updates), "deleted": len(removals)}
+        logger.info(
+            f"Applied {result['applied']} food changes "
+            f"({result['updated']} foods updated, {result['deleted']} deleted)")
+        return result
+
+    @classmethod
+    def process_pending(cls, chunk_size: int = 500,
+                        progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Approve every change whose approval count has reached its policy
+        threshold with one UPDATE, then apply all approved but unapplied changes in
+        chunks of chunk_size, each chunk in its own transaction.
+
+        Changes left unapplied by an interrupted run are picked up by the next
+        one, and applied changes are never touched again, so it is safe to
+        run repeatedly. progress(done, total) is called after every chunk.
+        Returns the number of changes applied.
+        """
+        marked = FoodChange.objects.filter(
+            ApprovalPolicyService.change_threshold_met(), new_is_approved=False
+        ).update(new_is_approved=True)
+        if marked:
+            logger.info(f"Marked {marked} pending food changes as approved")
+
+        pending_ids = list(FoodChange.objects.filter(
+            new_is_approved=True, applied_date__isnull=True
+        ).order_by('id').values_list('id', flat=True))
+
+        applied = 0
+        for start in range(0, len(pending_ids), chunk_size):
+            chunk = pending_ids[start:start + chunk_size]
+            applied += cls.apply_changes(chunk, batch_size=chunk_size)['applied']
+            if progress:
+                progress(start + len(chunk), len(pending_ids))
+
+        return applied
+
+    @classmethod
+    def _apply_updates(cls, foods, updates, FoodIngredient, ChangeIngredient, batch_size):
+        change_to_food = {change.id: food_id for food_id, change in updates.items()}
+
+        # Desired and current ingredient sets of every updated food, one query each
+        desired = {food_id: set() for food_id in updates}
+        for change_id, ingredient_id in ChangeIngredient.objects.filter(
+                foodchange_id__in=list(change_to_food.keys())).values_list('foodchange_id', 'ingredient_id'):
+            desired[change_to_food[change_id]].add(ingredient_id)
+
+        current = {food_id: {} for food_id in updates}
+        for row_id, food_id, ingredient_id in FoodIngredient.objects.filter(
+                food_id__in=list(updates.keys())).values_list('id', 'food_id', 'ingredient_id'):
+            current[food_id][ingredient_id] = row_id
+
+        stale_rows = []
+        new_rows = []
+        for food_id, ingredient_ids in desired.items():
+            existing = current[food_id]
+            stale_rows.extend(row_id for ingredient_id, row_id in existing.items()
+                              if ingredient_id not in ingredient_ids)
+            new_rows.extend(FoodIngredient(food_id=food_id, ingredient_id=ingredient_id)
+                            for ingredient_id in ingredient_ids - existing.keys())
+
+        if stale_rows:
+            FoodIngredient.objects.filter(id__in=stale_rows).delete()
+        if new_rows:
+            FoodIngredient.objects.bulk_create(new_rows, batch_size=batch_size)
+
+        changed_fields = set(cls.COPIED_FIELDS) | set(Food.MACRO_COLUMNS) | {
+            'restaurant', 'hazard_level', 'ingredient_mask'}
+        for food_id, change in updates.items():
+            food = foods[food_id]
+            for field in cls.COPIED_FIELDS:
+                setattr(food, field, getattr(change, f"new_{field}"))
+            # The executemany below bypasses Food.save(), which normally does this
+            food.sync_macros()
+            food.restaurant_id = change.new_restaurant_id
+            if change.new_image:
+                food.image = change.new_image
+                changed_fields.add('image')
+
+            # Same rule as Food.calculate_hazard_level, without a query
+            food.hazard_level = IngredientRegistry.average_hazard(desired[food_id])
+            food.ingredient_mask = IngredientService.encode_mask(desired[food_id])
+
+        cls._bulk_update([foods[food_id] for food_id in updates], sorted(changed_fields))
+
+    @staticmethod
+    def _bulk_update(foods, field_names):
+        """
+        Write the given fields of many foods with a single executemany().
+        QuerySet.bulk_update() builds a CASE expression per field and row,
+        which costs more Python time than the database spends on the update.
+        """
+        fields = [Food._meta.get_field(name) for name in field_names]
+        quote = connection.ops.quote_name
+        sql = (f"UPDATE {quote(Food._meta.db_table)} SET "
+               f"{', '.join(f'{quote(field.column)} = %s' for field in fields)} "
+               f"WHERE {quote(Food._meta.pk.column)} = %s")
+        params = [
+            [field.get_db_prep_save(getattr(food, field.attname), connection) for field in fields] + [food.pk]
+            for food in foods
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
@@ -0,0 +1,177 @@
+import logging
+import time
+from typing import Dict, List, Optional
+from django.db import transaction
+from ..models import Food, Restaurant
+from .catalog_cache import CatalogCache
+from .catalog_changes import CatalogChangeLog
+from .catalog_snapshot import CatalogSnapshotService
+from .ingredient_registry import IngredientRegistry
+from .restaurant_service import RestaurantService
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+class ScoringResult:
+    """Scores computed by HazardScoringEngine.score(), before anything is written"""
+
+    def __init__(self):
+        self.food_hazards = {}        # food id -> hazard level
+        self.restaurant_hazards = {}  # restaurant id -> hazard level
+        self.scores = {}              # food id -> weighted score, when weights were given
+        self.restaurant_of = {}       # food id -> restaurant id
+        self.changed_foods = {}
+        self.changed_restaurants = {}
+        self.timings = {}
+        self.engine = None
+
+
+class HazardScoringEngine:
+    """
+    Recomputes every food's and restaurant's hazard level in one pass.
+
+    The food-ingredient incidence pairs are read from the through table in
+    one query and aggregated against the ingredient hazard vector of the
+    IngredientRegistry: with NumPy when it is installed (np.bincount over
+    the pairs), with a plain Python loop otherwise. The rules are the ones of
+    Food.calculate_hazard_level and RestaurantService.update_restaurant_hazard_level:
+    a food's level is the average of its ingredients' levels, a restaurant's
+    is the average of its approved foods', both rounded to one decimal.
+
+    Optional macro weights add a score per food: hazard level plus the sum
+    of weight * macro value over the weighted macro columns.
+    """
+
+    @classmethod
+    def score(cls, weights: Optional[Dict[str, float]] = None, use_numpy: bool = True) -> ScoringResult:
+        weights = weights or {}
+        unknown = set(weights) - set(Food.MACRO_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown macro columns: {', '.join(sorted(unknown))}")
+        use_numpy = use_numpy and NUMPY_AVAILABLE
+
+        result = ScoringResult()
+        result.engine = "numpy" if use_numpy else "python"
+
+        started = time.perf_counter()
+        # One transaction, so the reads see a single snapshot where the
+        # database gives one (SQLite; PostgreSQL under REPEATABLE READ).
+        # Under READ COMMITTED a food created between the reads can still
+        # show up in the pairs only; the aggregators skip such foods.
+        with transaction.atomic():
+            foods = list(Food.objects.order_by('id').values_list(
+                'id', 'restaurant_id', 'is_approved', 'hazard_level', *weights))
+            pairs = list(Food.ingredients.through.objects.values_list('food_id', 'ingredient_id'))
+            restaurants = dict(Restaurant.objects.values_list('id', 'hazard_level'))
+        hazards = IngredientRegistry.table().hazards
+        result.timings['load'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        aggregate = cls._aggregate_numpy if use_numpy else cls._aggregate_python
+        sums, counts = aggregate(foods, pairs, hazards)
+
+        restaurant_sums = {}
+        restaurant_counts = {}
+        for position, (food_id, restaurant_id, is_approved, current, *macros) in enumerate(foods):
+            # Same rounding as Food.calculate_hazard_level
+            hazard = round(sums[position] / counts[position], 1) if counts[position] else 0
+            result.food_hazards[food_id] = hazard
+            result.restaurant_of[food_id] = restaurant_id
+            if hazard != current:
+                result.changed_foods[food_id] = hazard
+            if is_approved:
+                restaurant_sums[restaurant_id] = restaurant_sums.get(restaurant_id, 0) + hazard
+                restaurant_counts[restaurant_id] = restaurant_counts.get(restaurant_id, 0) + 1
+            if weights:
+                result.scores[food_id] = hazard + sum(
+                    weight * (value or 0) for weight, value in zip(weights.values(), macros))
+
+        for restaurant_id, current in restaurants.items():
+            count = restaurant_counts.get(restaurant_id)
+            hazard = round(restaurant_sums[restaurant_id] / count, 1) if count else 0
+            result.restaurant_hazards[restaurant_id] = hazard
+            if hazard != current:
+                result.changed_restaurants[restaurant_id] = hazard
+        result.timings['compute'] = time.perf_counter() - started
+
+        return result
+
+    @staticmethod
+    def _aggregate_numpy(foods, pairs, hazards):
+        """Per-food sums and counts of known ingredient hazard levels, vectorized"""
+        food_ids = np.fromiter((row[0] for row in foods), dtype=np.int64, count=len(foods))
+        if not pairs or not len(food_ids):
+            return np.zeros(len(foods)), np.zeros(len(foods), dtype=np.int64)
+        incidence = np.array(pairs, dtype=np.int64)
+        hazard_vector = np.frombuffer(hazards, dtype=np.int8)
+
+        # Position of each pair's food in `foods` (ordered by id, so searchsorted
+        # works); pairs of foods that aren't in `foods` are dropped
+        positions = np.searchsorted(food_ids, incidence[:, 0])
+        positions[positions == len(food_ids)] = 0
+        ingredient_ids = incidence[:, 1]
+        known = (food_ids[positions] == incidence[:, 0]) & (ingredient_ids < len(hazard_vector))
+        positions, ingredient_ids = positions[known], ingredient_ids[known]
+        levels = hazard_vector[ingredient_ids]
+        known = levels >= 0
+        positions, levels = positions[known], levels[known]
+
+        sums = np.bincount(positions, weights=levels, minlength=len(foods))
+        counts = np.bincount(positions, minlength=len(foods))
+        return sums.tolist(), counts.tolist()
+
+    @staticmethod
+    def _aggregate_python(foods, pairs, hazards):
+        """
+        Per-food sums and counts of known ingredient hazard levels, one loop
+        over the pairs; pairs of foods that aren't in `foods` are skipped
+        """
+        position_of = {row[0]: position for position, row in enumerate(foods)}
+        sums = [0] * len(foods)
+        counts = [0] * len(foods)
+        size = len(hazards)
+        for food_id, ingredient_id in pairs:
+            level = hazards[ingredient_id] if ingredient_id < size else -1
+            position = position_of.get(food_id)
+            if level >= 0 and position is not None:
+                sums[position] += level
+                counts[position] += 1
+        return sums, counts
+
+    @classmethod
+    def write(cls, result: ScoringResult, batch_size: int = 500) -> None:
+        """Save the hazard levels that changed, and only those"""
+        started = time.perf_counter()
+        with transaction.atomic():
+            if result.changed_foods:
+                Food.objects.bulk_update(
+                    [Food(id=food_id, hazard_level=hazard) for food_id, hazard in result.changed_foods.items()],
+                    ['hazard_level'], batch_size=batch_size)
+                # The bulk update doesn't send post_save, so notify the catalog here
+                CatalogCache.invalidate('foods')
+                CatalogChangeLog.record("food", result.changed_foods.keys())
+                CatalogSnapshotService.refresh(food_ids=list(result.changed_foods))
+
+            # Restaurants are written with the rest of their dietary summary,
+            # which also depends on the hazard levels of their foods
+            affected = set(result.changed_restaurants) | {
+                result.restaurant_of[food_id] for food_id in result.changed_foods}
+            if affected:
+                RestaurantService.rebuild_summaries(affected, batch_size=batch_size)
+        result.timings['write'] = time.perf_counter() - started
+
+        logger.info(
+            f"Hazard scoring updated {len(result.changed_foods)} foods and "
+            f"{len(result.changed_restaurants)} restaurants")
+
+    @staticmethod
+    def top_scores(result: ScoringResult, count: int) -> List:
+        """The `count` highest weighted scores as (food id, score), highest first"""
+        return sorted(result.scores.items(), key=lambda item: (-item[1], item[0]))[:count]
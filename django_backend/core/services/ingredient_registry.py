@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional
+from django.conf import settings
+from ..models import Ingredient
+from .catalog_cache import CatalogCache
+
+logger = logging.getLogger(__name__)
+
+
+class IngredientTable:
+    """
+    Immutable snapshot of the ingredient table: hazard levels in an array
+    indexed by ingredient id (-1 where there is no ingredient) and a map of
+    lowercased names to ids.
+    """
+
+    MISSING = -1
+
+    def __init__(self, version, rows):
+        rows = list(rows)
+        size = max((ingredient_id for ingredient_id, _, _ in rows), default=0) + 1
+        self.version = version
+        self.hazards = array('b', [self.MISSING]) * size
+        self.ids_by_name = {}
+        for ingredient_id, name, hazard_level in rows:
+            self.hazards[ingredient_id] = hazard_level
+            self.ids_by_name[name.lower()] = ingredient_id
+
+    def __len__(self):
+        return len(self.ids_by_name)
+
+    def hazard_level(self, ingredient_id: int) -> Optional[int]:
+        if 0 <= ingredient_id < len(self.hazards):
+            level = self.hazards[ingredient_id]
+            if level != self.MISSING:
+                return level
+        return None
+
+
+class IngredientRegistry:
+    """
+    Process-local copy of the ingredient table for computing hazard levels
+    without a query.
+
+    The table is tagged with the 'ingredients' version of CatalogCache, which
+    is kept in the database and bumped on every ingredient change, and is
+    reloaded when that version moves on. The version is read at most every
+    INGREDIENT_REGISTRY_CHECK_INTERVAL seconds, so a change made by another
+    process is picked up within that interval; the signals clear the table
+    directly, so changes made in this process are seen immediately.
+    """
+
+    _lock = threading.Lock()
+    _table = None
+    _checked_at = 0.0
+
+    @classmethod
+    def table(cls) -> IngredientTable:
+        interval = getattr(settings, 'INGREDIENT_REGISTRY_CHECK_INTERVAL', 5)
+        table = cls._table
+        if table is not None and time.monotonic() - cls._checked_at < interval:
+            return table
+
+        version, _ = CatalogCache.get_version('ingredients')
+        if table is None or table.version != version:
+            with cls._lock:
+                table = cls._table
+                if table is None or table.version != version:
+                    table = IngredientTable(version, Ingredient.objects.values_list(
+                        'id', 'name', 'hazard_level'))
+                    cls._table = table
+                    logger.debug(
+                        f"Loaded {len(table)} ingredients into the registry (version {version})")
+        cls._checked_at = time.monotonic()
+        return table
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls._table = None
+
+    @classmethod
+    def hazard_levels(cls, ingredient_ids: Iterable[int]) -> List[int]:
+        """Hazard levels of the given ingredients; unknown ids are skipped"""
+        table = cls.table()
+        levels = (table.hazard_level(ingredient_id) for ingredient_id in ingredient_ids)
+        return [level for level in levels if level is not None]
+
+    @classmethod
+    def average_hazard(cls, ingredient_ids: Iterable[int]) -> float:
+        """
+        Average hazard level of the given ingredients rounded to one decimal,
+        0 without ingredients - the rule Food.calculate_hazard_level uses
+        """
+        levels = cls.hazard_levels(ingredient_ids)
+        if not levels:
+            return 0
+        return round(sum(levels) / len(levels), 1)
+
+    @classmethod
+    def ids_by_name(cls) -> Dict[str, int]:
+        """Map of lowercased ingredient names to ids"""
+        return cls.table().ids_by_name
@@ -0,0 +1,80 @@
+import logging
+from typing import Dict, Iterable, List, Tuple
+from ..models import Food, Ingredient
+
+logger = logging.getLogger(__name__)
+
+
+class IngredientService:
+    """
+    Helpers for validating submitted ingredient ids and encoding them into
+    the ingredient masks of foods without a query per ingredient.
+    """
+
+    @staticmethod
+    def resolve(ingredient_ids: Iterable) -> Tuple[Dict[int, Ingredient], List]:
+        """
+        Look up submitted ingredient ids with a single in_bulk query.
+
+        Returns (ingredients, invalid): ingredients maps each valid id to its
+        Ingredient, invalid lists the submitted values that aren't integers or
+        don't match an ingredient, in the order they were given.
+        """
+        parsed = []
+        for value in ingredient_ids:
+            try:
+                parsed.append((value, int(value)))
+            except (ValueError, TypeError):
+                parsed.append((value, None))
+
+        ingredients = Ingredient.objects.in_bulk(
+            {ingredient_id for _, ingredient_id in parsed if ingredient_id is not None})
+        invalid = [value for value, ingredient_id in parsed
+                   if ingredient_id not in ingredients]
+
+        return ingredients, invalid
+
+    @staticmethod
+    def mask_of(ingredient_ids: Iterable[int]) -> int:
+        """Bitset of ingredient ids: bit n is set when ingredient n is included"""
+        mask = 0
+        for ingredient_id in ingredient_ids:
+            mask |= 1 << ingredient_id
+        return mask
+
+    @classmethod
+    def encode_mask(cls, ingredient_ids: Iterable[int]) -> bytes:
+        """The bitset as stored in Food.ingredient_mask: little-endian bytes, empty for none"""
+        mask = cls.mask_of(ingredient_ids)
+        return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+    @staticmethod
+    def mask_ids(mask: int) -> List[int]:
+        """Ingredient ids of the set bits of a bitset, lowest first"""
+        ingredient_ids = []
+        while mask:
+            lowest = mask & -mask
+            ingredient_ids.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return ingredient_ids
+
+    @staticmethod
+    def decode_mask(data) -> int:
+        """Bitset written by encode_mask as an int, ready for & against another mask"""
+        return int.from_bytes(data or b'', 'little')
+
+    @classmethod
+    def update_food_masks(cls, food_ids: Iterable[int]) -> int:
+        """
+        Recompute the ingredient bitsets of the given foods from the through
+        table, one read and one bulk update. Returns the number of foods updated.
+        """
+        ingredient_ids = {food_id: [] for food_id in food_ids}
+        if not ingredient_ids:
+            return 0
+        for food_id, ingredient_id in Food.ingredients.through.objects.filter(
+                food_id__in=list(ingredient_ids)).values_list('food_id', 'ingredient_id'):
+            ingredient_ids[food_id].append(ingredient_id)
+        foods = [Food(id=food_id, ingredient_mask=cls.encode_mask(ids))
+                 for food_id, ids in ingredient_ids.items()]
+        return Food.objects.bulk_update(foods, ['ingredient_mask'], batch_size=500)
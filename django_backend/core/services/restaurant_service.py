@@ -1,11 +1,20 @@
 import logging
+import threading
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
 from django.db import transaction, IntegrityError, DatabaseError
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Max, Min, Q
 from ..models import Restaurant, Location
+from .catalog_cache import CatalogCache
+from .catalog_changes import CatalogChangeLog
+from .catalog_snapshot import CatalogSnapshotService
+from ..utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
+# Restaurants whose hazard level recompute is deferred by coalesce_hazard_updates()
+_hazard_batch = threading.local()
+
 
 class RestaurantService:
     """
@@ -316,37 +325,106 @@ class RestaurantService:
             return None
 
     @staticmethod
+    @contextmanager
+    def coalesce_hazard_updates():
+        """
+        Defer update_restaurant_hazard_level calls made inside the block and
+        recompute each affected restaurant once when the block ends, instead of
+        once per food. Nested blocks join the outermost one.
+        """
+        if getattr(_hazard_batch, 'restaurant_ids', None) is not None:
+            yield
+            return
+
+        _hazard_batch.restaurant_ids = set()
+        try:
+            yield
+            restaurant_ids = _hazard_batch.restaurant_ids
+        finally:
+            _hazard_batch.restaurant_ids = None
+
+        for restaurant_id in restaurant_ids:
+            RestaurantService.update_restaurant_hazard_level(restaurant_id)
+
+    # Dietary summary fields of Restaurant and how each is computed over the
+    # restaurant's approved foods
+    SUMMARY_FIELDS = (
+        'foods_on_menu', 'organic_count', 'gluten_free_count', 'alcohol_free_count',
+        'lactose_free_count', 'hazard_level', 'min_hazard_level', 'max_hazard_level', 'avg_calories',
+    )
+
+    # Food fields the summary is computed from; saves that touch none of them leave it as it is
+    FOOD_SUMMARY_SOURCES = frozenset((
+        'restaurant', 'restaurant_id', 'is_approved', 'hazard_level', 'is_organic',
+        'is_gluten_free', 'is_alcohol_free', 'is_lactose_free', 'calories',
+    ))
+
+    @staticmethod
+    def _summary_aggregates():
+        return {
+            'foods_on_menu': Count('id'),
+            'organic_count': Count('id', filter=Q(is_organic=True)),
+            'gluten_free_count': Count('id', filter=Q(is_gluten_free=True)),
+            'alcohol_free_count': Count('id', filter=Q(is_alcohol_free=True)),
+            'lactose_free_count': Count('id', filter=Q(is_lactose_free=True)),
+            # Named apart from the field, which Min/Max below still have to read
+            'avg_hazard_level': Avg('hazard_level'),
+            'min_hazard_level': Min('hazard_level'),
+            'max_hazard_level': Max('hazard_level'),
+            'avg_calories': Avg('calories'),
+        }
+
+    @classmethod
+    def _summary_values(cls, totals):
+        """Summary field values from an aggregate row; None for a restaurant without foods"""
+        totals = totals or {}
+        values = {field: totals.get(field) for field in cls.SUMMARY_FIELDS}
+        for field in ('foods_on_menu', 'organic_count', 'gluten_free_count',
+                      'alcohol_free_count', 'lactose_free_count'):
+            values[field] = values[field] or 0
+        # Round to 1 decimal place for consistency
+        values['hazard_level'] = round(totals.get('avg_hazard_level') or 0, 1)
+        if values['avg_calories'] is not None:
+            values['avg_calories'] = round(values['avg_calories'], 1)
+        return values
+
+    @staticmethod
+    @timed("update_restaurant_hazard_level")
     def update_restaurant_hazard_level(restaurant_id):
         """
-        Calculate and update the hazard level for a restaurant based on all its foods
+        Calculate and update the hazard level for a restaurant based on all its foods,
+        together with the rest of its dietary summary (food and dietary flag
+        counts, hazard range, average calories) - one aggregate query - and
+        refresh its catalog snapshot on commit
         """
         # Import here to avoid circular imports
         from core.models import Restaurant, Food
 
+        pending = getattr(_hazard_batch, 'restaurant_ids', None)
+        if pending is not None:
+            # Inside coalesce_hazard_updates() - recomputed once at the end
+            pending.add(restaurant_id)
+            return None
+
         try:
             with transaction.atomic():
                 restaurant = Restaurant.objects.get(id=restaurant_id)
 
-                # Get all approved foods for this restaurant
-                foods = Food.objects.filter(
-                    restaurant=restaurant, is_approved=True)
+                # Aggregate all approved foods for this restaurant
+                totals = Food.objects.filter(
+                    restaurant=restaurant, is_approved=True).aggregate(
+                        **RestaurantService._summary_aggregates())
 
-                if foods.exists():
-                    # Calculate the average hazard level across all foods
-                    avg_hazard = foods.aggregate(
-                        avg=Avg('hazard_level'))['avg'] or 0
-
-                    # Round to 1 decimal place for consistency
-                    restaurant.hazard_level = round(avg_hazard, 1)
-                    restaurant.save(update_fields=['hazard_level'])
+                for field, value in RestaurantService._summary_values(totals).items():
+                    setattr(restaurant, field, value)
+                restaurant.save(update_fields=list(RestaurantService.SUMMARY_FIELDS))
+                # The snapshot carries the summary and the approved foods
+                CatalogSnapshotService.refresh(restaurant_ids=[restaurant_id])
 
+                if restaurant.foods_on_menu:
                     logger.info(
                         f"Updated restaurant {restaurant.name} hazard level to {restaurant.hazard_level}")
                 else:
-                    # If no foods, set hazard level to 0
-                    restaurant.hazard_level = 0
-                    restaurant.save(update_fields=['hazard_level'])
-
                     logger.info(
                         f"Restaurant {restaurant.name} has no foods, hazard level set to 0")
 
@@ -359,80 +437,59 @@ class RestaurantService:
             logger.error(f"Error updating restaurant hazard level: {str(e)}")
             return None
 
+    @classmethod
+    def rebuild_summaries(cls, restaurant_ids=None, batch_size=500):
+        """
+        Recompute the dietary summary of the given restaurants (all of them
+        when restaurant_ids is None) with one grouped aggregate query, and
+        save the restaurants whose summary changed. Returns their ids.
+        """
+        from core.models import Restaurant, Food
+
+        restaurants = Restaurant.objects.only('id', *cls.SUMMARY_FIELDS)
+        foods = Food.objects.filter(is_approved=True)
+        if restaurant_ids is not None:
+            restaurant_ids = list(restaurant_ids)
+            restaurants = restaurants.filter(id__in=restaurant_ids)
+            foods = foods.filter(restaurant_id__in=restaurant_ids)
+
+        totals = {row['restaurant_id']: row for row in foods.order_by().values(
+            'restaurant_id').annotate(**cls._summary_aggregates())}
+
+        changed = []
+        for restaurant in restaurants:
+            values = cls._summary_values(totals.get(restaurant.id))
+            if any(getattr(restaurant, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(restaurant, field, value)
+                changed.append(restaurant)
+
+        if changed:
+            with transaction.atomic():
+                Restaurant.objects.bulk_update(changed, list(cls.SUMMARY_FIELDS), batch_size=batch_size)
+                # The bulk update doesn't send post_save, so notify the catalog here
+                changed_ids = [restaurant.id for restaurant in changed]
+                CatalogCache.invalidate('restaurants')
+                CatalogChangeLog.record("restaurant", changed_ids)
+                CatalogSnapshotService.refresh(restaurant_ids=changed_ids)
+
+        logger.info(f"Rebuilt the dietary summary of {len(changed)} restaurants")
+        return [restaurant.id for restaurant in changed]
+
     @staticmethod
-    def process_pending_food_changes():
+    def process_pending_food_changes(chunk_size=500, progress=None):
         """
         Process any pending food changes that might have reached the approval threshold
         but weren't processed due to race conditions or other issues
         """
-        from ..models import FoodChange, Food
+        # Import here to avoid circular imports
+        from .food_change_service import FoodChangeService
 
         logger.info(
             "Checking for pending food changes that meet approval criteria...")
-        required_approvals = 2  # Should match the value in ApproveProposal view
-
-        # Get approved but not processed food changes
-        pending_changes = FoodChange.objects.annotate(
-            approval_count=Count('new_approved_supervisors')
-        ).filter(
-            new_is_approved=False,
-            approval_count__gte=required_approvals
-        )
-
-        processed_count = 0
 
-        for change in pending_changes:
-            try:
-                # Mark as approved
-                change.new_is_approved = True
-                change.save()
-                logger.info(f"Marked pending change #{change.id} as approved")
-
-                # Check if the food still exists
-                if change.old_version:
-                    try:
-                        food = Food.objects.get(id=change.old_version.id)
-
-                        # Apply the changes or delete as appropriate
-                        if change.is_deletion:
-                            restaurant_id = food.restaurant.id
-                            food.delete()
-                            logger.info(
-                                f"Deleted food #{food.id} from pending change")
-                            RestaurantService.update_restaurant_hazard_level(
-                                restaurant_id)
-                        else:
-                            # Apply all the updates
-                            # (Similar code to ApproveProposal but simplified)
-                            food.name = change.new_name
-                            food.restaurant = change.new_restaurant
-                            food.macro_table = change.new_macro_table
-                            food.serving_size = change.new_serving_size
-                            food.is_organic = change.new_is_organic
-                            food.is_gluten_free = change.new_is_gluten_free
-                            food.is_alcohol_free = change.new_is_alcohol_free
-                            food.is_lactose_free = change.new_is_lactose_free
-
-                            if change.new_image:
-                                food.image = change.new_image
-
-                            food.ingredients.set(change.new_ingredients.all())
-                            food.calculate_hazard_level()
-                            food.save()
-
-                            logger.info(
-                                f"Applied pending change #{change.id} to food #{food.id}")
-                            RestaurantService.update_restaurant_hazard_level(
-                                food.restaurant.id)
-                    except Food.DoesNotExist:
-                        logger.error(
-                            f"Food #{change.old_version.id} for pending change #{change.id} not found")
-
-                processed_count += 1
-
-            except Exception as e:
-                logger.error(
-                    f"Error processing pending change #{change.id}: {e}")
+        processed_count = FoodChangeService.process_pending(
+            chunk_size=chunk_size, progress=progress)
 
         logger.info(f"Processed {processed_count} pending food changes")
         return processed_count
@@ -0,0 +1,264 @@
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence
+from django.db import connection, transaction
+from django.db.models import Q
+from ..models import Food, Ingredient, Restaurant, SearchDocument
+
+logger = logging.getLogger(__name__)
+
+# Full-text objects created by migration 0049 next to the SearchDocuments table
+SQLITE_FTS_TABLE = "SearchDocumentsFts"
+POSTGRES_VECTOR_COLUMN = "search_vector"
+
+MAX_QUERY_TERMS = 8
+
+
+def fold(text: Optional[str]) -> str:
+    """
+    Lowercase text and strip its accents, so "Gyümölcsös rétes" and
+    "gyumolcsos retes" match: á, é, í, ó, ö, ő, ú, ü and ű all decompose
+    into a base letter and combining marks, and the marks are dropped.
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def query_terms(query: str) -> List[str]:
+    """Folded words of a search query; every one of them has to match"""
+    return re.findall(r'\w+', fold(query))[:MAX_QUERY_TERMS]
+
+
+class SqliteFtsBackend:
+    """FTS5 table over the search columns, ranked with bm25 (titles weigh 10x)"""
+    name = "sqlite-fts5"
+
+    def search(self, terms: Sequence[str], kinds: Sequence[str], limit: int):
+        # Every term as a quoted prefix query: "gulyas"* "lev"*
+        match = " ".join(f'"{term}"*' for term in terms)
+        sql = (f'SELECT d.id, -bm25({SQLITE_FTS_TABLE}, 10.0, 1.0) AS score '
+               f'FROM {SQLITE_FTS_TABLE} JOIN "SearchDocuments" d ON d.id = {SQLITE_FTS_TABLE}.rowid '
+               f'WHERE {SQLITE_FTS_TABLE} MATCH %s')
+        params = [match]
+        if kinds:
+            sql += f" AND d.kind IN ({', '.join(['%s'] * len(kinds))})"
+            params += list(kinds)
+        sql += " ORDER BY score DESC, d.id LIMIT %s"
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class PostgresBackend:
+    """GIN-indexed tsvector column (titles weighted A, bodies B), ranked with ts_rank"""
+    name = "postgresql-tsvector"
+
+    def search(self, terms: Sequence[str], kinds: Sequence[str], limit: int):
+        # The text is folded before it is stored, so the 'simple' configuration
+        # is enough and no unaccent extension is needed
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        sql = (f'SELECT d.id, ts_rank(d.{POSTGRES_VECTOR_COLUMN}, q) AS score '
+               f'FROM "SearchDocuments" d, to_tsquery(\'simple\', %s) q '
+               f'WHERE d.{POSTGRES_VECTOR_COLUMN} @@ q')
+        params = [tsquery]
+        if kinds:
+            sql += " AND d.kind = ANY(%s)"
+            params.append(list(kinds))
+        sql += " ORDER BY score DESC, d.id LIMIT %s"
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class SubstringBackend:
+    """
+    Fallback for databases without a full-text index: substring matches on
+    the folded columns, ranked in Python (title prefix > title word > body)
+    """
+    name = "substring"
+    candidate_limit = 500
+
+    def search(self, terms: Sequence[str], kinds: Sequence[str], limit: int):
+        documents = SearchDocument.objects.all()
+        if kinds:
+            documents = documents.filter(kind__in=kinds)
+        for term in terms:
+            documents = documents.filter(
+                Q(search_title__contains=term) | Q(search_body__contains=term))
+        rows = documents.order_by('id').values_list(
+            'id', 'search_title')[:self.candidate_limit]
+
+        def score(title):
+            words = title.split()
+            points = 0.0
+            for term in terms:
+                if title.startswith(term):
+                    points += 3
+                elif any(word.startswith(term) for word in words):
+                    points += 2
+                elif term in title:
+                    points += 1
+                else:
+                    points += 0.5
+            return points
+
+        ranked = sorted(((row_id, score(title)) for row_id, title in rows),
+                        key=lambda row: (-row[1], row[0]))
+        return ranked[:limit]
+
+
+class SearchIndex:
+    """
+    Server-side search over foods, restaurants and ingredients.
+
+    Every searchable object has a SearchDocument row with accent-folded
+    text. Migration 0049 puts a full-text index over those rows that suits
+    the database: an FTS5 table kept current by triggers on SQLite, a
+    generated tsvector column with a GIN index on PostgreSQL. Other databases
+    (or SQLite builds without FTS5) fall back to substring matching.
+
+    Signals call sync() for changed objects and bulk writers call it with
+    all of their ids; the documents are rebuilt on commit.
+    """
+
+    KINDS = ('food', 'restaurant', 'ingredient')
+
+    # Fields whose change has to reach the index; saves that only touch
+    # other fields (hazard levels, approval counts) are ignored
+    INDEXED_FIELDS = {
+        'food': {'name', 'restaurant', 'is_approved'},
+        'restaurant': {'name', 'cuisine', 'description'},
+        'ingredient': {'name', 'description'},
+    }
+
+    _backend = None
+
+    @classmethod
+    def backend(cls):
+        if cls._backend is None:
+            cls._backend = cls._detect_backend()
+            logger.info(f"Search backend: {cls._backend.name}")
+        return cls._backend
+
+    @staticmethod
+    def _detect_backend():
+        if connection.vendor == 'postgresql':
+            return PostgresBackend()
+        if connection.vendor == 'sqlite' and SQLITE_FTS_TABLE in connection.introspection.table_names():
+            return SqliteFtsBackend()
+        return SubstringBackend()
+
+    @classmethod
+    def touches_index(cls, kind: str, update_fields) -> bool:
+        """Whether a save with the given update_fields can change the documents"""
+        return update_fields is None or bool(cls.INDEXED_FIELDS[kind] & set(update_fields))
+
+    @classmethod
+    def sync(cls, kind: str, object_ids: Iterable[int]) -> None:
+        """
+        Bring the documents of the given objects up to date once the current
+        transaction commits, so rolled back changes never reach the index.
+        """
+        object_ids = {object_id for object_id in object_ids if object_id is not None}
+        if object_ids:
+            transaction.on_commit(lambda: cls.rebuild(kind, object_ids))
+
+    @classmethod
+    def rebuild(cls, kind: str, object_ids: Optional[Iterable[int]] = None, batch_size: int = 500) -> int:
+        """
+        Rewrite the documents of the given objects, or of every object of the
+        kind when object_ids is None. Objects that no longer exist (or foods
+        that aren't approved) lose their document. Returns the number written.
+        """
+        if object_ids is not None:
+            object_ids = set(object_ids)
+        documents = cls._documents(kind, object_ids)
+
+        with transaction.atomic():
+            stale = SearchDocument.objects.filter(kind=kind)
+            if object_ids is not None:
+                stale = stale.filter(object_id__in=list(object_ids))
+            stale.exclude(object_id__in=cls._indexed_objects(kind).values('id')).delete()
+            SearchDocument.objects.bulk_create(
+                documents,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['kind', 'object_id'],
+                update_fields=['title', 'subtitle', 'search_title', 'search_body', 'updated_at'],
+            )
+
+            if kind == 'restaurant' and object_ids is not None:
+                # Food documents carry their restaurant's name
+                food_ids = list(cls._indexed_objects('food').filter(
+                    restaurant_id__in=list(object_ids)).values_list('id', flat=True))
+                if food_ids:
+                    cls.rebuild('food', food_ids, batch_size)
+
+        logger.debug(f"Indexed {len(documents)} {kind} search documents")
+        return len(documents)
+
+    @staticmethod
+    def _indexed_objects(kind: str):
+        """Objects of a kind that belong in the index"""
+        if kind == 'food':
+            return Food.objects.filter(is_approved=True)
+        if kind == 'restaurant':
+            return Restaurant.objects.all()
+        return Ingredient.objects.all()
+
+    @classmethod
+    def _documents(cls, kind: str, object_ids: Optional[set]) -> List[SearchDocument]:
+        rows = cls._indexed_objects(kind)
+        if object_ids is not None:
+            rows = rows.filter(id__in=list(object_ids))
+        if kind == 'food':
+            rows = rows.values_list('id', 'name', 'restaurant__name')
+        elif kind == 'restaurant':
+            rows = rows.values_list('id', 'name', 'cuisine', 'description')
+        else:
+            rows = rows.values_list('id', 'name', 'description')
+
+        documents = []
+        for row in rows:
+            if kind == 'food':
+                object_id, title, restaurant_name = row
+                subtitle, body = restaurant_name or "", restaurant_name
+            elif kind == 'restaurant':
+                object_id, title, cuisine, description = row
+                subtitle = cuisine if cuisine and cuisine != "Unknown" else ""
+                body = f"{subtitle} {description or ''}"
+            else:
+                object_id, title, description = row
+                subtitle, body = "", description
+            documents.append(SearchDocument(
+                kind=kind, object_id=object_id, title=title[:255], subtitle=subtitle[:255],
+                search_title=fold(title), search_body=fold(body).strip()))
+        return documents
+
+    @classmethod
+    def search(cls, query: str, kinds: Sequence[str] = (), limit: int = 20) -> List[Dict]:
+        """
+        Ranked documents matching every word of the query as a prefix,
+        regardless of case and accents
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        ranked = cls.backend().search(terms, kinds, limit)
+        documents = SearchDocument.objects.in_bulk([row_id for row_id, _ in ranked])
+        return [
+            {
+                "type": documents[row_id].kind,
+                "id": documents[row_id].object_id,
+                "title": documents[row_id].title,
+                "subtitle": documents[row_id].subtitle,
+                "score": round(score, 4),
+            }
+            for row_id, score in ranked if row_id in documents
+        ]
@@ -0,0 +1,206 @@
+import logging
+import random
+import threading
+from typing import List, Optional, Tuple
+from ..models import CatalogChange, Food
+from .catalog_changes import CatalogChangeLog
+from .ingredient_service import IngredientService
+
+logger = logging.getLogger(__name__)
+
+
+class SimilarityTable:
+    """
+    MinHash signatures of the approved foods' ingredient sets, bucketed for
+    locality-sensitive hashing.
+
+    Each signature is split into BANDS bands of ROWS values; foods that agree
+    on a whole band land in the same bucket. Two foods sharing a Jaccard
+    similarity j collide in at least one band with probability
+    1 - (1 - j^ROWS)^BANDS: about 60% at j = 0.17, 95% at j = 0.3 and
+    practically always from j = 0.5. Single-row bands would catch the weakest
+    matches too, but their buckets grow to a large share of the catalog.
+    Candidates from the buckets are then ranked by their exact Jaccard
+    similarity, computed from the ingredient bitsets.
+    """
+
+    BANDS = 32
+    ROWS = 2
+    PRIME = (1 << 31) - 1
+    SEED = 20240501
+
+    def __init__(self, version: int):
+        self.version = version
+        rng = random.Random(self.SEED)
+        self.coefficients = [(rng.randrange(1, self.PRIME), rng.randrange(0, self.PRIME))
+                             for _ in range(self.BANDS * self.ROWS)]
+        self.ingredient_hashes = {}
+        # food id -> (restaurant id, hazard level, ingredient bitset, band keys)
+        self.foods = {}
+        self.buckets = {}
+
+    def __len__(self):
+        return len(self.foods)
+
+    def _hashes(self, ingredient_id: int) -> Tuple[int, ...]:
+        hashes = self.ingredient_hashes.get(ingredient_id)
+        if hashes is None:
+            hashes = self.ingredient_hashes[ingredient_id] = tuple(
+                (a * ingredient_id + b) % self.PRIME for a, b in self.coefficients)
+        return hashes
+
+    def signature(self, ingredient_ids: List[int]) -> Tuple[int, ...]:
+        """Element-wise minimum of the ingredients' hash vectors"""
+        if len(ingredient_ids) == 1:
+            return self._hashes(ingredient_ids[0])
+        return tuple(map(min, *(self._hashes(ingredient_id) for ingredient_id in ingredient_ids)))
+
+    def add(self, food_id: int, restaurant_id: int, hazard_level: float, mask_data) -> None:
+        self.remove(food_id)
+        mask = IngredientService.decode_mask(mask_data)
+        bands = ()
+        if mask:
+            signature = self.signature(IngredientService.mask_ids(mask))
+            # (band number, value of row 0, value of row 1, ...) for every band
+            bands = tuple(zip(range(self.BANDS), *(signature[row::self.ROWS] for row in range(self.ROWS))))
+            buckets = self.buckets
+            for key in bands:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {food_id}
+                else:
+                    bucket.add(food_id)
+        self.foods[food_id] = (restaurant_id, hazard_level, mask, bands)
+
+    def remove(self, food_id: int) -> None:
+        entry = self.foods.pop(food_id, None)
+        if entry is None:
+            return
+        for key in entry[3]:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(food_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def similar(self, food_id: int, limit: int, max_hazard: Optional[float] = None,
+                other_restaurants: bool = True) -> List[Tuple[int, float]]:
+        """
+        Up to `limit` (food id, similarity) pairs, most similar first and the
+        lower hazard level first among equally similar foods
+        """
+        restaurant_id, hazard_level, mask, bands = self.foods[food_id]
+        if max_hazard is None:
+            max_hazard = hazard_level
+
+        candidates = set()
+        for key in bands:
+            candidates |= self.buckets.get(key, set())
+        candidates.discard(food_id)
+
+        ranked = []
+        for candidate_id in candidates:
+            candidate_restaurant, candidate_hazard, candidate_mask, _ = self.foods[candidate_id]
+            if candidate_hazard > max_hazard or (other_restaurants and candidate_restaurant == restaurant_id):
+                continue
+            similarity = (mask & candidate_mask).bit_count() / (mask | candidate_mask).bit_count()
+            ranked.append((-similarity, candidate_hazard, candidate_id))
+        ranked.sort()
+        return [(candidate_id, -similarity) for similarity, _, candidate_id in ranked[:limit]]
+
+
+class SimilarityIndex:
+    """
+    Process-local "foods like this" index over the approved foods' ingredients.
+
+    The table is built once from Food.ingredient_mask (no through table scan)
+    and then kept current from the catalog change log: every lookup compares
+    the log's version with the table's and, when it moved on, reloads just
+    the foods logged since, so a change made in any process shows up on the
+    next request. The lookups and reloads run outside the lock, which is only
+    taken to build the first table and to apply the reloaded foods.
+    """
+
+    _lock = threading.Lock()
+    _table = None
+
+    @classmethod
+    def table(cls) -> SimilarityTable:
+        table = cls._table
+        if table is None:
+            with cls._lock:
+                if cls._table is None:
+                    cls._table = cls._load()
+                return cls._table
+
+        seen = table.version
+        version = CatalogChangeLog.current_version()
+        if version <= seen:
+            return table
+
+        entries = list(CatalogChange.objects.filter(id__gt=seen, id__lte=version).order_by(
+            'id').values_list('id', 'entity', 'object_id'))
+        if entries and entries[0][0] > seen + 1 and cls._pruned_since(seen):
+            # Entries we haven't seen were pruned from the log
+            fresh = cls._load()
+            with cls._lock:
+                cls._table = fresh
+            return fresh
+
+        food_ids = {object_id for _, entity, object_id in entries if entity == "food"}
+        rows = list(cls._approved_foods(food_ids)) if food_ids else []
+        with cls._lock:
+            # Another thread may have applied these entries (or reloaded) meanwhile
+            if cls._table is table and table.version == seen:
+                cls._apply(table, food_ids, rows, version)
+            return cls._table
+
+    @staticmethod
+    def _pruned_since(version: int) -> bool:
+        oldest = CatalogChange.objects.order_by('id').values_list('id', flat=True).first()
+        return oldest is not None and oldest > version + 1
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls._table = None
+
+    @staticmethod
+    def _approved_foods(food_ids=None):
+        foods = Food.objects.filter(is_approved=True)
+        if food_ids is not None:
+            foods = foods.filter(id__in=list(food_ids))
+        return foods.values_list('id', 'restaurant_id', 'hazard_level', 'ingredient_mask')
+
+    @classmethod
+    def _load(cls) -> SimilarityTable:
+        # Read the version first so changes made while loading are replayed later
+        version = CatalogChangeLog.current_version()
+        table = SimilarityTable(version)
+        for row in cls._approved_foods().iterator(chunk_size=2000):
+            table.add(*row)
+        logger.info(f"Loaded {len(table)} foods into the similarity index (version {version})")
+        return table
+
+    @staticmethod
+    def _apply(table: SimilarityTable, food_ids, rows, version: int) -> None:
+        """Replace the given foods with their reloaded rows; foods without a row are dropped"""
+        if food_ids:
+            for food_id in food_ids - {row[0] for row in rows}:
+                table.remove(food_id)
+            for row in rows:
+                table.add(*row)
+            logger.debug(f"Updated {len(food_ids)} foods in the similarity index")
+        table.version = version
+
+    @classmethod
+    def similar(cls, food_id: int, limit: int = 10, max_hazard: Optional[float] = None,
+                other_restaurants: bool = True) -> Optional[List[Tuple[int, float]]]:
+        """
+        Foods whose ingredients overlap the given food's the most, no more
+        hazardous than max_hazard (the food's own hazard level by default).
+        None when the food isn't an approved food.
+        """
+        table = cls.table()
+        if food_id not in table.foods:
+            return None
+        return table.similar(food_id, limit, max_hazard, other_restaurants)
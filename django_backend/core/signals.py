@@ -1,7 +1,18 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Food, FoodChange
+from .models import Food, FoodChange, Restaurant, Ingredient, Location, User, ApprovalPolicy
 from .services.restaurant_service import RestaurantService
+from .services.catalog_cache import CatalogCache
+from .services.catalog_changes import CatalogChangeLog
+from .services.catalog_snapshot import CatalogSnapshotService
+from .services.approval_service import ApprovalService
+from .services.approval_policy import ApprovalPolicyService
+from .services.ingredient_registry import IngredientRegistry
+from .services.food_change_service import FoodChangeService
+from .services.search_index import SearchIndex
+from .services.autocomplete import AutocompleteIndex
+from .services.ingredient_service import IngredientService
+from .utils.metrics import timed
 import logging
 import traceback
 from django.db import transaction
@@ -10,10 +21,12 @@ logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Food)
-def update_restaurant_hazard_on_food_change(sender, instance, created, **kwargs):
+def update_restaurant_hazard_on_food_change(sender, instance, created, update_fields=None, **kwargs):
     """
     Signal handler to update restaurant hazard level when a food is created or updated
     """
+    if update_fields is not None and not RestaurantService.FOOD_SUMMARY_SOURCES & set(update_fields):
+        return
     # Only update if the food is approved - otherwise wait for approval
     if instance.is_approved:
         logger.info(
@@ -35,111 +48,247 @@ def update_restaurant_hazard_on_food_delete(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=FoodChange)
+@timed("apply_food_change_on_approval")
 def apply_food_change_on_approval(sender, instance, **kwargs):
     """
     Signal handler to apply food changes when a FoodChange is marked as approved
     This ensures changes are applied regardless of how the approval happens (API or Admin)
     """
     try:
-        # Only proceed if this FoodChange is newly approved (new_is_approved has been set to True)
-        if not instance.new_is_approved:
+        # Only proceed if this FoodChange is approved and hasn't been applied yet
+        if not instance.new_is_approved or instance.applied_date:
             return
 
         logger.info(
             f"FoodChange #{instance.id} ({instance.new_name}) has been approved, applying changes")
-
-        with transaction.atomic():
-            # Process the original Food object if it exists
-            if instance.old_version:
-                try:
-                    food = instance.old_version
-                    logger.info(
-                        f"Found original food #{food.id} ({food.name})")
-
-                    if not instance.is_deletion:
-                        # Update the food with new values
-                        logger.info(f"Applying changes to food #{food.id}")
-
-                        # Track all changes for debugging
-                        changes = []
-
-                        if food.name != instance.new_name:
-                            changes.append(
-                                f"name: '{food.name}' → '{instance.new_name}'")
-                            food.name = instance.new_name
-
-                        if food.restaurant.id != instance.new_restaurant.id:
-                            changes.append(
-                                f"restaurant: {food.restaurant.name} → {instance.new_restaurant.name}")
-                            food.restaurant = instance.new_restaurant
-
-                        # Update all other fields
-                        food.macro_table = instance.new_macro_table
-                        food.serving_size = instance.new_serving_size
-                        food.is_organic = instance.new_is_organic
-                        food.is_gluten_free = instance.new_is_gluten_free
-                        food.is_alcohol_free = instance.new_is_alcohol_free
-                        food.is_lactose_free = instance.new_is_lactose_free
-
-                        if instance.new_image:
-                            food.image = instance.new_image
-
-                        # Update ingredients
-                        old_ingredients = set(
-                            food.ingredients.values_list('id', flat=True))
-                        new_ingredients = set(
-                            instance.new_ingredients.values_list('id', flat=True))
-
-                        if old_ingredients != new_ingredients:
-                            changes.append(
-                                f"ingredients changed: {old_ingredients} → {new_ingredients}")
-                            food.ingredients.set(
-                                instance.new_ingredients.all())
-
-                        # Log all the changes
-                        if changes:
-                            logger.info(
-                                f"Applied changes to food #{food.id}: {', '.join(changes)}")
-                        else:
-                            logger.info(
-                                f"No changes to apply to food #{food.id}")
-
-                        # Calculate new hazard level based on ingredients
-                        old_hazard = food.hazard_level
-                        food.calculate_hazard_level()
-                        logger.info(
-                            f"Updated hazard level: {old_hazard} → {food.hazard_level}")
-
-                        # Save the updated food
-                        food.save()
-                        logger.info(
-                            f"Successfully saved updated food #{food.id}")
-
-                        # Update restaurant hazard level
-                        RestaurantService.update_restaurant_hazard_level(
-                            food.restaurant.id)
-                        logger.info(
-                            f"Restaurant #{food.restaurant.id} hazard level updated")
-
-                    else:
-                        # Delete the original Food object
-                        logger.info(f"Deleting food #{food.id} ({food.name})")
-                        restaurant_id = food.restaurant.id
-                        food.delete()
-                        logger.info(
-                            f"Food #{instance.old_version.id} deleted successfully")
-
-                        # Update restaurant hazard level after deletion
-                        RestaurantService.update_restaurant_hazard_level(
-                            restaurant_id)
-                        logger.info(
-                            f"Restaurant #{restaurant_id} hazard level updated after deletion")
-
-                except Exception as e:
-                    logger.error(
-                        f"Error applying food change #{instance.id} to food: {e}")
-                    logger.error(traceback.format_exc())
+        FoodChangeService.apply_changes([instance.id])
 
     except Exception as e:
         logger.error(f"Error in apply_food_change_on_approval signal: {e}")
         logger.error(traceback.format_exc())
+
+
+# Catalog list endpoints affected by a change to each model. Foods and
+# locations embed the restaurant name, so restaurant changes invalidate the
+# food and location lists as well.
+CATALOG_CACHE_NAMESPACES = {
+    Restaurant: ('restaurants', 'foods', 'locations'),
+    Food: ('foods',),
+    Ingredient: ('ingredients',),
+    Location: ('locations',),
+}
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_save, sender=Food)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Food)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Location)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """
+    Signal handler to invalidate the cached catalog responses when catalog data changes
+    """
+    CatalogCache.invalidate(*CATALOG_CACHE_NAMESPACES[sender])
+
+
+@receiver(m2m_changed, sender=Food.ingredients.through)
+def invalidate_catalog_cache_on_ingredients_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal handler to invalidate the cached food lists, log the change and
+    refresh the catalog snapshot when a food's ingredients change
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        CatalogCache.invalidate('foods')
+        if not reverse:
+            CatalogChangeLog.record("food", [instance.pk])
+            if instance.is_approved:
+                CatalogSnapshotService.refresh(
+                    food_ids=[instance.pk], restaurant_ids=[instance.restaurant_id])
+        elif pk_set:
+            CatalogChangeLog.record("food", pk_set)
+            CatalogSnapshotService.refresh(food_ids=pk_set)
+
+
+# Entity name used in the delta-sync change log for each model
+CATALOG_CHANGE_ENTITIES = {
+    Restaurant: "restaurant",
+    Food: "food",
+    Ingredient: "ingredient",
+}
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_save, sender=Food)
+@receiver(post_save, sender=Ingredient)
+def record_catalog_change(sender, instance, **kwargs):
+    """
+    Signal handler to add created and updated catalog objects to the delta-sync change log
+    """
+    CatalogChangeLog.record(CATALOG_CHANGE_ENTITIES[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Food)
+@receiver(post_delete, sender=Ingredient)
+def record_catalog_deletion(sender, instance, **kwargs):
+    """
+    Signal handler to leave a tombstone in the delta-sync change log for deleted catalog objects
+    """
+    CatalogChangeLog.record(
+        CATALOG_CHANGE_ENTITIES[sender], [instance.pk], is_deletion=True)
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def refresh_food_snapshot(sender, instance, created=False, **kwargs):
+    """
+    Signal handler to rebuild the catalog snapshot page of a saved or deleted
+    food. Restaurant snapshots are refreshed with the restaurant hazard level.
+    """
+    if created and not instance.is_approved:
+        # Unapproved foods aren't part of the snapshot
+        return
+    CatalogSnapshotService.refresh(food_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def refresh_restaurant_snapshot(sender, instance, update_fields=None, **kwargs):
+    """
+    Signal handler to rebuild the catalog snapshot of a saved or deleted
+    restaurant. Summary-only saves come from update_restaurant_hazard_level,
+    which refreshes the snapshot itself.
+    """
+    if update_fields is not None and set(update_fields) <= set(RestaurantService.SUMMARY_FIELDS):
+        return
+    CatalogSnapshotService.refresh(restaurant_ids=[instance.pk])
+
+
+@receiver(m2m_changed, sender=Food.approved_supervisors.through)
+def recount_food_approvals(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal handler to keep Food.approval_count in sync when approvals are
+    added or removed through the relation (admin, .add()) instead of ApprovalService
+    """
+    if action == 'pre_clear' and reverse:
+        # post_clear doesn't say which foods lost the user's approval
+        instance._cleared_food_ids = list(
+            instance.approved_foods.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            ApprovalService.recount_food_approvals([instance.pk])
+        else:
+            ApprovalService.recount_food_approvals(
+                pk_set or getattr(instance, '_cleared_food_ids', []))
+
+
+@receiver(m2m_changed, sender=FoodChange.new_approved_supervisors.through)
+def recount_food_change_approvals(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal handler to keep FoodChange.new_approval_count in sync when approvals
+    are added or removed through the relation instead of ApprovalService
+    """
+    if action == 'pre_clear' and reverse:
+        instance._cleared_change_ids = list(
+            instance.approved_food_changes.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            ApprovalService.recount_change_approvals([instance.pk])
+        else:
+            ApprovalService.recount_change_approvals(
+                pk_set or getattr(instance, '_cleared_change_ids', []))
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_approvals(sender, instance, **kwargs):
+    """
+    Signal handler to remember a deleted user's approvals; the cascade removes
+    the through rows without sending m2m_changed
+    """
+    instance._approved_food_ids = list(
+        instance.approved_foods.values_list('id', flat=True))
+    instance._approved_change_ids = list(
+        instance.approved_food_changes.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def recount_approvals_on_user_delete(sender, instance, **kwargs):
+    """
+    Signal handler to recount the approvals of everything a deleted user had approved
+    """
+    ApprovalService.recount_food_approvals(
+        getattr(instance, '_approved_food_ids', []))
+    ApprovalService.recount_change_approvals(
+        getattr(instance, '_approved_change_ids', []))
+
+
+@receiver(post_save, sender=ApprovalPolicy)
+@receiver(post_delete, sender=ApprovalPolicy)
+def invalidate_approval_policy_cache(sender, instance, **kwargs):
+    """
+    Signal handler to drop the cached approval thresholds when a policy changes
+    """
+    transaction.on_commit(ApprovalPolicyService.invalidate)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_registry(sender, instance, **kwargs):
+    """
+    Signal handler to drop this process's in-memory ingredient table when an ingredient changes
+    """
+    transaction.on_commit(IngredientRegistry.invalidate)
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_save, sender=Food)
+@receiver(post_save, sender=Ingredient)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Signal handler to reindex a catalog object when one of its searchable fields changes
+    """
+    kind = CATALOG_CHANGE_ENTITIES[sender]
+    if SearchIndex.touches_index(kind, update_fields):
+        SearchIndex.sync(kind, [instance.pk])
+
+
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Food)
+@receiver(post_delete, sender=Ingredient)
+def remove_from_search_index(sender, instance, **kwargs):
+    """
+    Signal handler to drop a deleted catalog object from the search index
+    """
+    SearchIndex.sync(CATALOG_CHANGE_ENTITIES[sender], [instance.pk])
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_autocomplete_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Signal handler to reload the autocomplete names when a name is added, changed or removed
+    """
+    if update_fields is None or 'name' in update_fields:
+        transaction.on_commit(AutocompleteIndex.invalidate)
+
+
+@receiver(m2m_changed, sender=Food.ingredients.through)
+def update_food_ingredient_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal handler to keep Food.ingredient_mask in sync with the food's ingredients
+    """
+    if action == 'pre_clear' and reverse:
+        # post_clear doesn't say which foods lost the ingredient
+        instance._cleared_food_ids = list(
+            instance.foods.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            instance.update_ingredient_mask()
+        else:
+            IngredientService.update_food_masks(
+                pk_set or getattr(instance, '_cleared_food_ids', []))
@@ -0,0 +1,94 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.models import ApprovalPolicy, Food, FoodChange, Restaurant, User
+from core.serializers import CustomTokenObtainPairSerializer
+from core.services.approval_policy import ApprovalPolicyService
+from core.services.approval_service import ApprovalService
+
+
+def supervisor_client(user):
+    client = APIClient()
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+class ApprovalFlowTests(TestCase):
+    """Each supervisor counts once, and the threshold is crossed exactly once"""
+
+    def setUp(self):
+        # The policy rows are seeded by a migration
+        for action in (ApprovalPolicyService.FOOD_CREATE, ApprovalPolicyService.FOOD_CHANGE):
+            ApprovalPolicy.objects.update_or_create(action=action, defaults={"required_approvals": 2})
+        # The policy signal clears the cache on commit, which TestCase never reaches
+        ApprovalPolicyService.invalidate()
+        self.supervisors = [
+            User.objects.create_user(f"supervisor{number}@example.com", "password", username=f"supervisor{number}")
+            for number in range(3)
+        ]
+        self.restaurant = Restaurant.objects.create(name="Diner", image="restaurant_images/diner.jpg")
+        self.food = Food.objects.create(name="Soup", restaurant=self.restaurant, is_approved=False)
+
+    def tearDown(self):
+        ApprovalPolicyService.invalidate()
+
+    def _accept(self, user, food=None):
+        food = food or self.food
+        return supervisor_client(user).patch(f'/food/{food.id}/accept/')
+
+    def test_accept_counts_each_supervisor_once(self):
+        self.assertEqual(self._accept(self.supervisors[0]).status_code, 200)
+        self.assertEqual(self._accept(self.supervisors[0]).status_code, 403)
+
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.approval_count, 1)
+        self.assertEqual(self.food.approved_supervisors.count(), 1)
+        self.assertFalse(self.food.is_approved)
+
+    def test_accept_approves_at_threshold(self):
+        self._accept(self.supervisors[0])
+        self._accept(self.supervisors[1])
+
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.approval_count, 2)
+        self.assertTrue(self.food.is_approved)
+
+    def test_accept_rejects_non_supervisors(self):
+        user = User.objects.create_user("member@example.com", "password", username="member")
+        User.objects.filter(id=user.id).update(is_supervisor=False)
+        self.assertEqual(self._accept(user).status_code, 403)
+        self.assertEqual(supervisor_client(self.supervisors[0]).patch('/food/0/accept/').status_code, 404)
+
+    def test_threshold_is_crossed_once(self):
+        became = [ApprovalService.approve_food(self.food.id, user)[2] for user in self.supervisors]
+
+        self.assertEqual(became, [False, True, False])
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.approval_count, 3)
+
+    def test_explicit_zero_threshold_is_respected(self):
+        _, recorded, became_approved = ApprovalService.approve_food(
+            self.food.id, self.supervisors[0], required_approvals=0)
+
+        self.assertTrue(recorded)
+        self.assertTrue(became_approved)
+
+    def test_approved_change_is_applied(self):
+        self.food.is_approved = True
+        self.food.save()
+        change = FoodChange.objects.create(
+            old_version=self.food, new_restaurant=self.restaurant, new_name="Tomato soup",
+            new_is_approved=False)
+
+        for user in self.supervisors[:2]:
+            response = supervisor_client(user).patch(f'/food-changes/{change.id}/approve-change/')
+            self.assertEqual(response.status_code, 200)
+        # Approving again doesn't add to the count
+        supervisor_client(self.supervisors[0]).patch(f'/food-changes/{change.id}/approve-change/')
+
+        change.refresh_from_db()
+        self.food.refresh_from_db()
+        self.assertEqual(change.new_approval_count, 2)
+        self.assertTrue(change.new_is_approved)
+        self.assertIsNotNone(change.applied_date)
+        self.assertEqual(self.food.name, "Tomato soup")
@@ -0,0 +1,93 @@
+from django.test import TestCase
+from core.models import ApprovalPolicy, Food, FoodChange, Restaurant, User
+from core.services.approval_policy import ApprovalPolicyService
+from core.services.approval_service import ApprovalService
+from .test_approvals import supervisor_client
+
+
+class BulkApproveTests(TestCase):
+    """approvals/bulk/ has to count approvals like the one-by-one endpoints"""
+
+    def setUp(self):
+        # The policy rows are seeded by a migration
+        for action in (ApprovalPolicyService.FOOD_CREATE, ApprovalPolicyService.FOOD_CHANGE,
+                       ApprovalPolicyService.FOOD_REMOVAL):
+            ApprovalPolicy.objects.update_or_create(action=action, defaults={"required_approvals": 2})
+        # The policy signal clears the cache on commit, which TestCase never reaches
+        ApprovalPolicyService.invalidate()
+        self.first, self.second = [
+            User.objects.create_user(f"supervisor{number}@example.com", "password", username=f"supervisor{number}")
+            for number in range(2)
+        ]
+        self.restaurant = Restaurant.objects.create(name="Diner", image="restaurant_images/diner.jpg")
+        self.soup, self.stew = [
+            Food.objects.create(name=name, restaurant=self.restaurant, is_approved=False)
+            for name in ("Soup", "Stew")
+        ]
+        self.salad = Food.objects.create(name="Salad", restaurant=self.restaurant)
+        self.rename = self._change(new_name="Green salad")
+        self.removal = self._change(is_deletion=True)
+
+    def tearDown(self):
+        ApprovalPolicyService.invalidate()
+
+    def _change(self, **fields):
+        fields.setdefault('new_name', self.salad.name)
+        return FoodChange.objects.create(
+            old_version=self.salad, new_restaurant=self.restaurant, new_is_approved=False, **fields)
+
+    def _bulk(self, user, foods=(), food_changes=()):
+        response = supervisor_client(user).post(
+            '/approvals/bulk/', {"foods": list(foods), "food_changes": list(food_changes)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_reports_each_item(self):
+        ApprovalService.approve_food(self.stew.id, self.first)
+
+        result = self._bulk(self.first, foods=[self.soup.id, self.stew.id, 0], food_changes=[self.rename.id])
+
+        self.assertEqual(result["foods"], {
+            "recorded": [self.soup.id], "already_approved": [self.stew.id], "not_found": [0], "approved": [],
+        })
+        self.assertEqual(result["food_changes"]["recorded"], [self.rename.id])
+
+    def test_repeated_call_is_not_counted_twice(self):
+        self._bulk(self.first, foods=[self.soup.id], food_changes=[self.rename.id])
+        result = self._bulk(self.first, foods=[self.soup.id, self.soup.id], food_changes=[self.rename.id])
+
+        self.assertEqual(result["foods"]["recorded"], [])
+        self.assertEqual(result["foods"]["already_approved"], [self.soup.id])
+        self.soup.refresh_from_db()
+        self.rename.refresh_from_db()
+        self.assertEqual(self.soup.approval_count, 1)
+        self.assertFalse(self.soup.is_approved)
+        self.assertEqual(self.rename.new_approval_count, 1)
+
+    def test_crossing_threshold_approves_and_applies(self):
+        self._bulk(self.first, foods=[self.soup.id], food_changes=[self.rename.id])
+        result = self._bulk(self.second, foods=[self.soup.id, self.stew.id], food_changes=[self.rename.id])
+
+        self.assertEqual(result["foods"]["approved"], [self.soup.id])
+        self.assertEqual(result["food_changes"]["approved"], [self.rename.id])
+        self.soup.refresh_from_db()
+        self.stew.refresh_from_db()
+        self.salad.refresh_from_db()
+        self.rename.refresh_from_db()
+        self.assertEqual((self.soup.approval_count, self.soup.is_approved), (2, True))
+        self.assertEqual((self.stew.approval_count, self.stew.is_approved), (1, False))
+        self.assertEqual(self.soup.approved_supervisors.count(), 2)
+        self.assertIsNotNone(self.rename.applied_date)
+        self.assertEqual(self.salad.name, "Green salad")
+
+    def test_mixes_with_single_approvals(self):
+        ApprovalService.approve_change(self.removal.id, self.first)
+        result = self._bulk(self.second, food_changes=[self.removal.id])
+
+        self.assertEqual(result["food_changes"]["approved"], [self.removal.id])
+        self.assertFalse(Food.objects.filter(id=self.salad.id).exists())
+
+    def test_rejects_bad_input(self):
+        client = supervisor_client(self.first)
+        self.assertEqual(client.post('/approvals/bulk/', {"foods": "1"}, format='json').status_code, 400)
+        self.assertEqual(client.post('/approvals/bulk/', {}, format='json').status_code, 400)
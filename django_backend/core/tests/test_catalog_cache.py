@@ -0,0 +1,29 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.models import Location, Restaurant
+
+
+class CatalogCacheInvalidationTests(TestCase):
+    """Cached catalog lists have to follow changes to the data they embed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name="Old name", image="restaurant_images/old.jpg")
+        Location.objects.create(restaurant=self.restaurant, latitude=47.5, longitude=19.0)
+
+    def _restaurant_names(self):
+        response = self.client.get('/locations/')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        rows = rows.get('results', rows) if isinstance(rows, dict) else rows
+        return [row['restaurant_name'] for row in rows]
+
+    def test_restaurant_rename_invalidates_locations(self):
+        self.assertEqual(self._restaurant_names(), ["Old name"])
+
+        # Versions are bumped on commit, which TestCase only simulates
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.name = "New name"
+            self.restaurant.save()
+
+        self.assertEqual(self._restaurant_names(), ["New name"])
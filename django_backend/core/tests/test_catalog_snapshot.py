@@ -0,0 +1,60 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.models import CatalogSnapshot, Food, Ingredient, Restaurant
+
+
+class CatalogSnapshotTests(TestCase):
+    """The restaurant snapshot has to exist and follow edits made outside the approval flow"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name="Bistro", image="restaurant_images/bistro.jpg")
+        self.ingredient = Ingredient.objects.create(name="basil", hazard_level=2)
+        # Created directly as approved, the way the admin does it
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food = Food.objects.create(name="Pesto", restaurant=self.restaurant, is_approved=True,
+                                            hazard_level=2)
+            self.food.ingredients.set([self.ingredient])
+
+    def _snapshot(self, restaurant_id=None):
+        response = self.client.get(f'/catalog/restaurants/{restaurant_id or self.restaurant.id}/')
+        return response.status_code, response.json()
+
+    def test_missing_snapshot_is_built_on_request(self):
+        CatalogSnapshot.objects.all().delete()
+
+        status_code, data = self._snapshot()
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual([food['name'] for food in data['foods']], ["Pesto"])
+        self.assertTrue(CatalogSnapshot.objects.filter(kind="restaurant", key=self.restaurant.id).exists())
+
+    def test_unknown_restaurant_is_not_found(self):
+        status_code, _ = self._snapshot(self.restaurant.id + 1000)
+        self.assertEqual(status_code, 404)
+
+    def test_food_edit_refreshes_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food.name = "Basil pesto"
+            self.food.save()
+
+        _, data = self._snapshot()
+        self.assertEqual([food['name'] for food in data['foods']], ["Basil pesto"])
+
+    def test_summary_update_refreshes_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Food.objects.create(name="Salad", restaurant=self.restaurant, is_approved=True,
+                                is_organic=True, hazard_level=0)
+
+        _, data = self._snapshot()
+        self.assertEqual(data['foods_on_menu'], 2)
+        self.assertEqual(data['organic_count'], 1)
+        self.assertEqual(data['hazard_level'], 1.0)
+
+    def test_restaurant_rename_refreshes_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.name = "Trattoria"
+            self.restaurant.save()
+
+        _, data = self._snapshot()
+        self.assertEqual(data['name'], "Trattoria")
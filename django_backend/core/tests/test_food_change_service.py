@@ -0,0 +1,148 @@
+from django.db import transaction
+from django.test import TestCase
+from core.models import Food, FoodChange, Ingredient, Restaurant
+from core.services.food_change_service import FoodChangeService
+from core.services.ingredient_registry import IngredientRegistry
+from core.services.restaurant_service import RestaurantService
+
+
+def apply_one_by_one(change):
+    """
+    The per-object path FoodChangeService replaced: copy the fields, set the
+    ingredients, recompute the hazard level and save, then update the
+    summaries of the restaurants involved
+    """
+    food = Food.objects.get(id=change.old_version_id)
+    restaurant_ids = {food.restaurant_id, change.new_restaurant_id}
+    if change.is_deletion:
+        food.delete()
+    else:
+        food.name = change.new_name
+        food.restaurant = change.new_restaurant
+        food.macro_table = change.new_macro_table
+        food.serving_size = change.new_serving_size
+        food.is_organic = change.new_is_organic
+        food.is_gluten_free = change.new_is_gluten_free
+        food.is_alcohol_free = change.new_is_alcohol_free
+        food.is_lactose_free = change.new_is_lactose_free
+        if change.new_image:
+            food.image = change.new_image
+        food.ingredients.set(change.new_ingredients.all())
+        food.calculate_hazard_level()
+        food.save()
+    for restaurant_id in restaurant_ids:
+        RestaurantService.update_restaurant_hazard_level(restaurant_id)
+
+
+class FoodChangeServiceTests(TestCase):
+    """apply_changes() has to leave the catalog as the per-object path did"""
+
+    FOOD_FIELDS = (
+        'name', 'restaurant_id', 'macro_table', 'serving_size', 'is_organic', 'is_gluten_free',
+        'is_alcohol_free', 'is_lactose_free', 'image', 'hazard_level',
+    ) + tuple(Food.MACRO_COLUMNS)
+
+    def setUp(self):
+        # Images are set so saving a restaurant doesn't try to fetch one
+        self.burgers = Restaurant.objects.create(name="Burgers", image="restaurant_images/burgers.jpg")
+        self.salads = Restaurant.objects.create(name="Salads", image="restaurant_images/salads.jpg")
+        self.ingredients = [
+            Ingredient.objects.create(name=name, hazard_level=level)
+            for name, level in (("beef", 2), ("lettuce", 0), ("bacon", 3), ("tomato", 0), ("mayo", 1))
+        ]
+        # Ingredient signals clear the registry on commit, which TestCase never reaches
+        IngredientRegistry.invalidate()
+
+        self.burger = self._food("Burger", self.burgers, [0, 2, 4], calories=800)
+        self.fries = self._food("Fries", self.burgers, [4], calories=400, is_gluten_free=True)
+        self.salad = self._food("Salad", self.salads, [1, 3], calories=150, is_organic=True)
+
+    def _food(self, name, restaurant, ingredient_indexes, calories, **flags):
+        food = Food.objects.create(
+            name=name, restaurant=restaurant, is_approved=True,
+            macro_table={"energy_kcal": calories, "protein": 10}, **flags)
+        food.ingredients.set([self.ingredients[index] for index in ingredient_indexes])
+        food.calculate_hazard_level()
+        return food
+
+    def _change(self, food, ingredient_indexes=(), is_deletion=False, **fields):
+        change = FoodChange.objects.create(
+            old_version=food, is_deletion=is_deletion, new_is_approved=False,
+            new_restaurant=fields.pop('new_restaurant', food.restaurant),
+            new_name=fields.pop('new_name', food.name), **fields)
+        change.new_ingredients.set([self.ingredients[index] for index in ingredient_indexes])
+        # Approved with update() so the approval signal doesn't apply it on its own
+        FoodChange.objects.filter(id=change.id).update(new_is_approved=True)
+        change.refresh_from_db()
+        return change
+
+    def _state(self):
+        foods = {}
+        for food in Food.objects.order_by('id'):
+            foods[food.id] = {field: getattr(food, field) for field in self.FOOD_FIELDS}
+            foods[food.id]['ingredients'] = set(food.ingredients.values_list('id', flat=True))
+            foods[food.id]['ingredient_mask'] = bytes(food.ingredient_mask)
+        restaurants = {
+            restaurant.id: {field: getattr(restaurant, field) for field in RestaurantService.SUMMARY_FIELDS}
+            for restaurant in Restaurant.objects.order_by('id')
+        }
+        return foods, restaurants
+
+    def _compare_with_one_by_one(self, changes):
+        savepoint = transaction.savepoint()
+        for change in changes:
+            apply_one_by_one(change)
+        expected = self._state()
+        transaction.savepoint_rollback(savepoint)
+
+        FoodChangeService.apply_changes([change.id for change in changes])
+        self.assertEqual(self._state(), expected)
+        return expected
+
+    def test_update_matches_one_by_one(self):
+        change = self._change(
+            self.burger, ingredient_indexes=[0, 1, 3], new_name="Lean burger",
+            new_macro_table={"calories": 550, "protein": 30, "fat": 12.5, "salt": "1.2"},
+            new_serving_size=250, new_is_organic=True, new_is_lactose_free=True,
+            new_image="food_images/lean.jpg")
+
+        foods, _ = self._compare_with_one_by_one([change])
+
+        burger = foods[self.burger.id]
+        self.assertEqual(burger['name'], "Lean burger")
+        self.assertEqual(burger['ingredients'], {self.ingredients[index].id for index in (0, 1, 3)})
+        self.assertEqual(burger['hazard_level'], 0.7)
+        self.assertEqual(burger['calories'], 550)
+        self.assertEqual(burger['salt'], 1.2)
+
+    def test_restaurant_move_updates_both_summaries(self):
+        change = self._change(self.fries, ingredient_indexes=[3], new_restaurant=self.salads)
+
+        _, restaurants = self._compare_with_one_by_one([change])
+
+        self.assertEqual(restaurants[self.burgers.id]['foods_on_menu'], 1)
+        self.assertEqual(restaurants[self.salads.id]['foods_on_menu'], 2)
+        self.assertEqual(restaurants[self.salads.id]['gluten_free_count'], 0)
+
+    def test_batch_matches_one_by_one(self):
+        changes = [
+            self._change(self.burger, ingredient_indexes=[0, 4], new_name="Plain burger"),
+            self._change(self.salad, ingredient_indexes=[1, 2, 3], new_is_organic=False),
+            # A later change of the same food wins
+            self._change(self.burger, ingredient_indexes=[0], new_name="Beef patty"),
+            self._change(self.fries, is_deletion=True),
+        ]
+
+        foods, restaurants = self._compare_with_one_by_one(changes)
+
+        self.assertEqual(foods[self.burger.id]['name'], "Beef patty")
+        self.assertNotIn(self.fries.id, foods)
+        self.assertEqual(restaurants[self.burgers.id]['foods_on_menu'], 1)
+
+    def test_applying_twice_changes_nothing(self):
+        change = self._change(self.burger, ingredient_indexes=[1], new_name="Veggie burger")
+
+        self.assertEqual(FoodChangeService.apply_changes([change.id])["applied"], 1)
+        state = self._state()
+        self.assertEqual(FoodChangeService.apply_changes([change.id])["applied"], 0)
+        self.assertEqual(self._state(), state)
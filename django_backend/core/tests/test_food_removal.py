@@ -0,0 +1,43 @@
+from django.test import TestCase
+from core.models import Food, FoodChange, Restaurant, User
+from .test_approvals import supervisor_client
+
+
+class FoodRemovalProposalTests(TestCase):
+    """The unique_active_food_removal constraint allows one pending removal per food"""
+
+    def setUp(self):
+        self.supervisor = User.objects.create_user("supervisor@example.com", "password", username="supervisor")
+        self.restaurant = Restaurant.objects.create(name="Diner", image="restaurant_images/diner.jpg")
+        self.food = Food.objects.create(name="Soup", restaurant=self.restaurant)
+
+    def _propose(self, food=None):
+        food = food or self.food
+        return supervisor_client(self.supervisor).post(
+            f'/food/{food.id}/propose-removal/', {"reason": "Off the menu"}, format='json')
+
+    def test_second_removal_is_rejected(self):
+        self.assertEqual(self._propose().status_code, 201)
+        response = self._propose()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FoodChange.objects.filter(old_version=self.food, is_deletion=True).count(), 1)
+        removal = FoodChange.objects.get(old_version=self.food, is_deletion=True)
+        self.assertEqual(removal.reason, "Off the menu")
+        self.assertEqual(list(removal.new_approved_supervisors.all()), [self.supervisor])
+
+    def test_pending_update_does_not_block_removal(self):
+        FoodChange.objects.create(
+            old_version=self.food, new_restaurant=self.restaurant, new_name="Tomato soup", new_is_approved=False)
+
+        self.assertEqual(self._propose().status_code, 201)
+
+    def test_other_foods_are_independent(self):
+        stew = Food.objects.create(name="Stew", restaurant=self.restaurant)
+
+        self.assertEqual(self._propose().status_code, 201)
+        self.assertEqual(self._propose(stew).status_code, 201)
+
+    def test_unknown_food(self):
+        response = supervisor_client(self.supervisor).post('/food/0/propose-removal/', {}, format='json')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,83 @@
+import random
+import unittest
+from array import array
+from django.test import SimpleTestCase, TestCase
+from core.models import Food, Ingredient, Restaurant
+from core.services.hazard_scoring import NUMPY_AVAILABLE, HazardScoringEngine
+from core.services.ingredient_registry import IngredientRegistry
+
+
+class AggregatorTests(SimpleTestCase):
+    """The NumPy and pure Python aggregators have to agree on the same input"""
+
+    def _data(self, food_count=300, ingredient_count=80, seed=7):
+        rng = random.Random(seed)
+        # -1 marks ids without an ingredient, as in IngredientTable.hazards
+        hazards = array('b', [rng.choice((-1, 0, 1, 2, 3)) for _ in range(ingredient_count)])
+        food_ids = sorted(rng.sample(range(1, food_count * 3), food_count))
+        foods = [(food_id, 1, True, 0) for food_id in food_ids]
+        pairs = [(food_id, rng.randrange(ingredient_count + 10))
+                 for food_id in food_ids for _ in range(rng.randrange(6))]
+        # Foods created after `foods` was read: below, between and above the known ids
+        pairs += [(food_id, 1) for food_id in (0, food_ids[food_count // 2] + 1, food_count * 3 + 5)
+                  if food_id not in food_ids]
+        return foods, pairs, hazards
+
+    def test_python_aggregate(self):
+        foods = [(1, 1, True, 0), (2, 1, True, 0), (5, 1, True, 0)]
+        # Ingredient 1 is missing and 9 is past the end of the table
+        hazards = array('b', [2, -1, 3, 0])
+        # Food 7 isn't in `foods`, as if it was created after they were read
+        pairs = [(1, 0), (1, 2), (2, 1), (2, 9), (5, 3), (5, 0), (7, 2)]
+
+        sums, counts = HazardScoringEngine._aggregate_python(foods, pairs, hazards)
+
+        self.assertEqual(list(sums), [5, 0, 2])
+        self.assertEqual(list(counts), [2, 0, 2])
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is not installed")
+    def test_numpy_matches_python(self):
+        for seed in range(5):
+            foods, pairs, hazards = self._data(seed=seed)
+            python_sums, python_counts = HazardScoringEngine._aggregate_python(foods, pairs, hazards)
+            numpy_sums, numpy_counts = HazardScoringEngine._aggregate_numpy(foods, pairs, hazards)
+            self.assertEqual(list(numpy_counts), list(python_counts))
+            self.assertEqual([float(value) for value in numpy_sums], [float(value) for value in python_sums])
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is not installed")
+    def test_numpy_without_pairs(self):
+        foods, _, hazards = self._data()
+        sums, counts = HazardScoringEngine._aggregate_numpy(foods, [], hazards)
+        self.assertEqual(list(counts), [0] * len(foods))
+
+
+class HazardScoringEngineTests(TestCase):
+    """score() has to give every food the level Food.calculate_hazard_level does"""
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Diner", image="restaurant_images/diner.jpg")
+        ingredients = [Ingredient.objects.create(name=f"ingredient {number}", hazard_level=level)
+                       for number, level in enumerate((0, 1, 2, 3, 3))]
+        # Ingredient signals clear the registry on commit, which TestCase never reaches
+        IngredientRegistry.invalidate()
+        rng = random.Random(11)
+        for number in range(12):
+            food = Food.objects.create(name=f"food {number}", restaurant=self.restaurant,
+                                       is_approved=number % 4 != 0)
+            food.ingredients.set(rng.sample(ingredients, rng.randrange(len(ingredients))))
+
+    def test_food_levels_match_calculate_hazard_level(self):
+        engines = [False, True] if NUMPY_AVAILABLE else [False]
+        for use_numpy in engines:
+            result = HazardScoringEngine.score(use_numpy=use_numpy)
+            for food in Food.objects.all():
+                self.assertEqual(result.food_hazards[food.id], food.calculate_hazard_level())
+
+    def test_write_updates_restaurant_level(self):
+        Food.objects.update(hazard_level=0)
+        result = HazardScoringEngine.score(use_numpy=False)
+        HazardScoringEngine.write(result)
+
+        approved = [food.calculate_hazard_level() for food in Food.objects.filter(is_approved=True)]
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.hazard_level, round(sum(approved) / len(approved), 1))
@@ -0,0 +1,86 @@
+from unittest import mock
+from django.test import TestCase
+from core.models import Food, Ingredient, Restaurant, User
+from core.services.ingredient_registry import IngredientRegistry
+from core.views import SafeFoodsView
+from .test_approvals import supervisor_client
+
+
+class SafeFoodsTests(TestCase):
+    """foods/safe-for-me/ has to leave out every food with an avoided ingredient"""
+
+    def setUp(self):
+        self.user = User.objects.create_user("eater@example.com", "password", username="eater")
+        self.client = supervisor_client(self.user)
+        self.restaurant = Restaurant.objects.create(name="Diner", image="restaurant_images/diner.jpg")
+        # Enough ingredients for the masks to span several bytes
+        self.ingredients = [Ingredient.objects.create(name=f"ingredient {number}", hazard_level=number % 4)
+                            for number in range(20)]
+        # Ingredient signals clear the registry on commit, which TestCase never reaches
+        IngredientRegistry.invalidate()
+
+        self.peanut, self.milk = self.ingredients[17], self.ingredients[3]
+        self.foods = {}
+        for name, indexes, hazard_level in (
+                ("Satay", [0, 17], 1.5), ("Latte", [3], 1.0), ("Rice", [0], 0.0),
+                ("Salad", [1, 2, 12], 1.0), ("Curry", [5, 17, 19], 2.5), ("Stew", [], 3.0)):
+            food = Food.objects.create(name=name, restaurant=self.restaurant, hazard_level=hazard_level)
+            food.ingredients.set([self.ingredients[index] for index in indexes])
+            self.foods[name] = food
+        Food.objects.create(name="Unapproved rice", restaurant=self.restaurant, is_approved=False)
+
+    def _avoid(self, *ingredients):
+        response = self.client.put('/users/avoided-ingredients/',
+                                   {"ingredient_ids": [ingredient.id for ingredient in ingredients]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def _get(self, url='/foods/safe-for-me/', **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _names(self, page):
+        return [food['name'] for food in page['results']]
+
+    def test_without_avoided_ingredients(self):
+        self.assertEqual(self._names(self._get()), ["Satay", "Latte", "Rice", "Salad", "Curry", "Stew"])
+
+    def test_excludes_avoided_ingredients(self):
+        self._avoid(self.peanut, self.milk)
+
+        self.assertEqual(self._names(self._get()), ["Rice", "Salad", "Stew"])
+
+    def test_mask_follows_ingredient_edits(self):
+        self._avoid(self.peanut)
+        self.foods["Rice"].ingredients.add(self.peanut)
+        self.foods["Satay"].ingredients.remove(self.peanut)
+
+        self.assertEqual(self._names(self._get()), ["Satay", "Latte", "Salad", "Stew"])
+
+    def test_max_hazard(self):
+        self._avoid(self.milk)
+
+        self.assertEqual(self._names(self._get(max_hazard=1.5)), ["Satay", "Rice", "Salad"])
+        self.assertEqual(self.client.get('/foods/safe-for-me/', {"max_hazard": "nan"}).status_code, 400)
+
+    def test_pages_follow_next(self):
+        self._avoid(self.peanut)
+
+        first = self._get(limit=2)
+        self.assertEqual(self._names(first), ["Latte", "Rice"])
+        second = self._get(first['next'])
+        self.assertEqual(self._names(second), ["Salad", "Stew"])
+        self.assertIsNone(second['next'])
+
+    def test_scan_budget_continues_from_last_food(self):
+        self._avoid(self.peanut)
+
+        names = []
+        page = {'next': 'http://testserver/foods/safe-for-me/?limit=10'}
+        with mock.patch.object(SafeFoodsView, 'max_scan', 2):
+            while page['next']:
+                page = self._get(page['next'])
+                self.assertLessEqual(len(page['results']), 2)
+                names += self._names(page)
+
+        self.assertEqual(names, ["Latte", "Rice", "Salad", "Stew"])
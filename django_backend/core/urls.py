@@ -21,14 +21,20 @@ urlpatterns = [
     path('confirm-email/', ConfirmEmail.as_view(), name='confirm-email'),
     path('users/edit/', EditUserView.as_view(), name='edit-user'),
     path('users/delete/', DeleteUserView.as_view(), name='delete-user'),
+    path('users/avoided-ingredients/', AvoidedIngredientsView.as_view(),
+         name='avoided-ingredients'),
 
     path('restaurants/', RestaurantListView.as_view(), name='restaurants_list'),
+    path('restaurants/<int:pk>/macros/', RestaurantMacroSummaryView.as_view(),
+         name='restaurant-macro-summary'),
     path('locations/', ListViewLocations.as_view(), name='locations_list'),
 
     path('foods/', FoodListView.as_view(), name='foods_list'),
     path('foods/create/', FoodCreateView.as_view(), name='food_create'),
     path('food/<int:pk>/accept/', AcceptFood.as_view(), name='accept-food'),
     path('foods/approvable/', GetApprovableFoods.as_view(), name='accept-food'),
+    path('foods/safe-for-me/', SafeFoodsView.as_view(), name='safe-foods'),
+    path('foods/<int:pk>/similar/', SimilarFoodsView.as_view(), name='similar-foods'),
 
     path('food-changes/propose-change/',
          CreateFoodChange.as_view(), name='create-food-change'),
@@ -36,6 +42,9 @@ urlpatterns = [
     path('food-changes/<int:pk>/approve-change/', ApproveProposal.as_view(),
          name='create-food-change'),  # same as in approve-removal
 
+    path('approvals/bulk/', BulkApproveView.as_view(), name='bulk-approve'),
+    path('approval-policy/', ApprovalPolicyView.as_view(), name='approval-policy'),
+
     path('food/<int:food_id>/propose-removal/',
          CreateFoodRemoval.as_view(), name='propose-food-removal'),
     path('food-changes/deletions/', FoodChangeDeletionListView.as_view(),
@@ -44,6 +53,17 @@ urlpatterns = [
          ApproveProposal.as_view(), name='approve-food-change'),
 
     path('ingredients/', IngredientListView.as_view()),
+    path('search/', SearchView.as_view(), name='search'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+
+    # Pre-serialized catalog snapshot for anonymous reads
+    path('catalog/foods/', CatalogFoodPageView.as_view(),
+         name='catalog-food-page'),
+    path('catalog/restaurants/<int:pk>/', CatalogRestaurantSnapshotView.as_view(),
+         name='catalog-restaurant'),
+    path('catalog/changes/', CatalogChangesView.as_view(),
+         name='catalog-changes'),
 
 
     # GENERICS - mainly for testing purposes
@@ -10,6 +10,7 @@ from urllib.parse import urlparse, quote_plus
 from django.core.files.base import ContentFile
 from django.conf import settings
 import dotenv
+from .metrics import timed
 
 dotenv.load_dotenv()
 
@@ -184,6 +185,7 @@ def detect_and_translate_to_english(text):
         return text, False  # Return original if translation fails
 
 
+@timed("fetch_food_image")
 def fetch_food_image(food_name, restaurant_name=None):
     """
     Fetch a food image from a free API based on the food name
@@ -0,0 +1,136 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+# Upper bounds of the histogram buckets, per kind of value
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+PREFIX = "nutri_"
+
+
+def _escape(value) -> str:
+    """Label value escaping of the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of one labelled series"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+
+
+class MetricsRegistry:
+    """
+    Process-local histograms, rendered in the Prometheus text format by
+    render(). Every worker process keeps its own numbers, so a scraper
+    should scrape the workers individually (or a single-process server).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # metric name -> (help text, buckets, {label tuple: Histogram})
+        self._metrics: Dict[str, Tuple[str, Sequence[float], Dict[Tuple, Histogram]]] = {}
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None,
+                help_text: str = "", buckets: Sequence[float] = SECONDS_BUCKETS) -> None:
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = (help_text, buckets, {})
+            series = metric[2].get(key)
+            if series is None:
+                series = metric[2][key] = Histogram(metric[1])
+            series.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics = {}
+
+    @staticmethod
+    def _labels(pairs, extra=()) -> str:
+        pairs = list(pairs) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                help_text, _, series = self._metrics[name]
+                full_name = PREFIX + name
+                if help_text:
+                    lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for key in sorted(series):
+                    histogram = series[key]
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{full_name}_bucket{self._labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{full_name}_bucket{self._labels(key, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{full_name}_sum{self._labels(key)} {histogram.total}")
+                    lines.append(f"{full_name}_count{self._labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Named timer totals of the request being handled by this thread, for the
+# Server-Timing header; None outside of RequestMetricsMiddleware
+_request = threading.local()
+
+
+def start_request_timings() -> Dict[str, float]:
+    _request.timings = {}
+    return _request.timings
+
+
+def stop_request_timings() -> None:
+    _request.timings = None
+
+
+def add_request_time(name: str, seconds: float) -> None:
+    """Add to a named total of the current request, if there is one"""
+    timings = getattr(_request, 'timings', None)
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timer(name: str):
+    """Record how long the block takes as nutri_timer_seconds{name=...}"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe("timer_seconds", elapsed, {"name": name},
+                         help_text="Time spent in named code paths")
+        add_request_time(name, elapsed)
+
+
+def timed(name: str):
+    """Decorator form of timer()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,41 +1,60 @@
 import json
+import math
 import os
 import dotenv
-import random
-import string
 from datetime import datetime
 from django.utils import timezone  # Add this import
 
 from django.db import IntegrityError
-from django.db.models import Count
-from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Avg, Count, F, Max, Min, Prefetch
+from django.db.models.functions import Substr
 from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, parse_http_date_safe
 
 from .serializers import *
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import *
-from django.core.mail import send_mail, BadHeaderError
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
 import logging
-import smtplib
 from rest_framework.decorators import api_view, permission_classes
 from django.db import transaction
 import traceback
 
 # Add this import at the top of your file
 from .utils.image_fetcher import fetch_food_image
+from .utils import metrics
 
 # Add this import near the top with other imports
 from .services.restaurant_service import RestaurantService
+from .services.catalog_cache import CatalogCache
+from .services.catalog_snapshot import CatalogSnapshotService
+from .services.catalog_changes import CatalogChangeLog
+from .services.approval_service import ApprovalService
+from .services.approval_policy import ApprovalPolicyService
+from .services.ingredient_service import IngredientService
+from .services.ingredient_registry import IngredientRegistry
+from .services.search_index import SearchIndex
+from .services.autocomplete import AutocompleteIndex
+from .services.similarity_index import SimilarityIndex
+from .services.email_outbox import EmailOutbox
+from .services.confirmation_tokens import ConfirmationTokenService
+from .pagination import KeysetPagination
+from .authentication import ClaimsJWTAuthentication
 
 logger = logging.getLogger(__name__)
 
@@ -47,29 +66,23 @@ dotenv.load_dotenv()
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
 
-    def generate_token(self, length=32):
-        """Generate a random 32-character token."""
-        characters = string.ascii_letters + string.digits
-        return ''.join(random.choice(characters) for skibidi in range(length))
-
     def post(self, request, *args, **kwargs):
+        # Step 0: An earlier signup that was never confirmed and whose code
+        # expired doesn't keep the email and username taken
+        ConfirmationTokenService.release(
+            email=request.data.get("email"), username=request.data.get("username"))
+
         # Step 1: Validate and create the user
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             # Save user without sending email confirmation
             user = serializer.save()
 
-            # Step 2: Generate a 32-character token for confirmation
-            token = self.generate_token()
-
-            # Step 3: Create and save the ConfirmationToken model
-            confirmation_token = ConfirmationToken.objects.create(
-                code=token,
-                user_id=user
-            )
-
-            confirmation_token.save()
+            # Step 2: Create a 32-character confirmation token, valid for
+            # CONFIRMATION_TOKEN_TTL_HOURS
+            confirmation_token = ConfirmationTokenService.issue(user)
 
+            confirm_url = f"http://localhost:5173/confirm-email/{confirmation_token.code}"
             subject = "Confirm Your Email - Nutri"
             html_message = f"""
             <!DOCTYPE html>
@@ -127,35 +140,26 @@ class CreateUserView(generics.CreateAPIView):
                 <div class="container">
                     <h2>Welcome to Nutri!</h2>
                     <p>Click the button below to confirm your email address and activate your account.</p>
-                    <a href="http://localhost:5173/confirm-email/{confirmation_token.code}" class="button">Confirm Email</a>
+                    <a href="{confirm_url}" class="button">Confirm Email</a>
                     <p class="footer">If you didn’t request this, please ignore this email.</p>
                 </div>
             </body>
             </html>
             """
 
+            # Queued, not sent: the outbox worker delivers it and retries if the
+            # mail server is unavailable, so signup doesn't wait on SMTP
+            EmailOutbox.enqueue(
+                to=user.email,
+                subject=subject,
+                body=f"Welcome to Nutri! Confirm your email address to activate your account: {confirm_url}",
+                html_body=html_message,
+                from_email=os.getenv("EMAIL"),
+            )
 
-            from_email = os.getenv("EMAIL")  # Use the email from your settings
-            recipient_list = [user.email]  # The recipient's email address
-            try:
-                send_mail(
-                subject, 
-                None,  # Text version omitted for simplicity
-                from_email, 
-                recipient_list, 
-                html_message=html_message
-                )
-                
-                return Response({
-                    "message": "User created successfully, a confirmation token has been generated."
-                }, status=status.HTTP_201_CREATED)
-            except Exception as e:
-                user.delete()
-                print(e)
-                return Response({"message":"Failed to send email"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-
-
+            return Response({
+                "message": "User created successfully, a confirmation token has been generated."
+            }, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -171,8 +175,11 @@ class ConfirmEmail(generics.CreateAPIView):
         if not token:
             return Response({"detail": "Token is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Step 2: Find the token in the ConfirmationToken model
+        # Step 2: Find the token in the ConfirmationToken model (unique index on code)
         confirmation_token = get_object_or_404(ConfirmationToken, code=token)
+        if ConfirmationTokenService.is_expired(confirmation_token):
+            return Response({"detail": "Token has expired. Sign up again to get a new one."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         # Step 3: Check if the user is already active (avoid reactivating)
         user = confirmation_token.user_id
@@ -272,32 +279,450 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     authentication_classes = []  # must have this line
 
 
-class RestaurantListView(generics.ListAPIView):
+class CachedListMixin:
+    """
+    Serve a list endpoint from the versioned catalog cache.
+
+    The rendered JSON is cached per namespace version and request path, and
+    responses carry ETag/Last-Modified so clients can revalidate with a 304.
+    The cache is invalidated by the model signals in core/signals.py.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        path = request.get_full_path()
+        version, modified = CatalogCache.get_version(self.cache_namespace)
+        etag = CatalogCache.make_etag(self.cache_namespace, version, path)
+        last_modified = int(modified)
+
+        # Conditional request - nothing changed since the client's copy
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if (if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]) or \
+                (not if_none_match and if_modified_since and if_modified_since >= last_modified):
+            response = HttpResponseNotModified()
+        else:
+            body = CatalogCache.get_response(
+                self.cache_namespace, version, path)
+            if body is None:
+                with metrics.timer("serialize"):
+                    data = super().list(request, *args, **kwargs).data
+                    body = JSONRenderer().render(data)
+                CatalogCache.set_response(
+                    self.cache_namespace, version, path, body)
+            response = HttpResponse(body, content_type='application/json')
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class RestaurantListView(CachedListMixin, generics.ListAPIView):
     queryset = Restaurant.objects.all()
     serializer_class = RestaurantSerializer
     authentication_classes = []
+    cache_namespace = 'restaurants'
 
 
 # class ListViewExactLocations(generics.ListAPIView):
 #     queryset = ExactLocation.objects.all()
 #     serializer_class = ExactLocationSerializer
 
-class ListViewLocations(generics.ListAPIView):
-    queryset = Location.objects.all()
+class ListViewLocations(CachedListMixin, generics.ListAPIView):
+    queryset = Location.objects.select_related('restaurant')
     serializer_class = LocationSerializer
     authentication_classes = []
+    cache_namespace = 'locations'
 
 
-class IngredientListView(generics.ListAPIView):
+class IngredientListView(CachedListMixin, generics.ListAPIView):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     authentication_classes = []
+    cache_namespace = 'ingredients'
+
 
+FOOD_ORDERING_FIELDS = ('id', 'name', 'hazard_level', *Food.MACRO_COLUMNS)
 
-class FoodListView(generics.ListAPIView):
-    queryset = Food.objects.filter(is_approved=True)
+
+def filter_foods_by_macros(request, queryset):
+    """
+    Apply the macro range filters (?calories_max=500, ?protein_min=30, ...)
+    and ?ordering=calories,-protein to a Food queryset. Foods without a value
+    for a filtered macro are left out; when sorting they come last.
+    """
+    params = request.query_params
+    for column in Food.MACRO_COLUMNS:
+        for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+            param = f"{column}_{suffix}"
+            value = params.get(param)
+            if value is None:
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                value = math.nan
+            if not math.isfinite(value):
+                raise ValidationError({param: "Must be a number."})
+            queryset = queryset.filter(**{f"{column}__{lookup}": value})
+
+    ordering = params.get('ordering')
+    if ordering:
+        order_by = []
+        for term in ordering.split(','):
+            term = term.strip()
+            field = term.lstrip('-')
+            if field not in FOOD_ORDERING_FIELDS:
+                raise ValidationError(
+                    {"ordering": f"Unknown field '{field}'. Choose from: {', '.join(FOOD_ORDERING_FIELDS)}."})
+            order_by.append(F(field).desc(nulls_last=True) if term.startswith('-')
+                            else F(field).asc(nulls_last=True))
+        # id as the tie-breaker keeps the order stable between requests
+        queryset = queryset.order_by(*order_by, 'id')
+
+    return queryset
+
+
+class FoodListView(CachedListMixin, generics.ListAPIView):
+    queryset = Food.objects.filter(is_approved=True).select_related(
+        'restaurant', 'created_by').prefetch_related('ingredients')
     serializer_class = FoodSerializer
     authentication_classes = []
+    cache_namespace = 'foods'
+
+    def get_queryset(self):
+        return filter_foods_by_macros(self.request, super().get_queryset())
+
+
+class AvoidedIngredientsView(APIView):
+    """
+    The authenticated user's avoid-list. PUT {"ingredient_ids": [...]}
+    replaces the whole list.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        ingredients = request.user.avoided_ingredients.order_by('name')
+        return Response(IngredientSerializer(ingredients, many=True).data)
+
+    def put(self, request, *args, **kwargs):
+        ingredient_ids = request.data.get('ingredient_ids')
+        if not isinstance(ingredient_ids, list):
+            return Response({"error": "ingredient_ids must be a list of ingredient IDs."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        ingredients, invalid_ingredient_ids = IngredientService.resolve(ingredient_ids)
+        if invalid_ingredient_ids:
+            return Response(
+                {"error": f"Ingredients with IDs {', '.join(map(str, invalid_ingredient_ids))} are invalid or do not exist."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request.user.avoided_ingredients.set(ingredients.values())
+        logger.info(f"User {request.user.id} now avoids {len(ingredients)} ingredients")
+        return self.get(request)
+
+
+class SafeFoodsView(APIView):
+    """
+    Approved foods that contain none of the user's avoided ingredients,
+    optionally capped by ?max_hazard=. Pages through the foods by id with
+    ?after=<id>&limit=N.
+
+    Each food's ingredients are stored as a bitset (Food.ingredient_mask), so
+    excluding avoided ingredients is one AND per food instead of a join
+    against the ingredient table. At most max_scan foods are checked per
+    request; when that runs out first, the page can be short (or empty) and
+    `next` continues from the last food checked.
+    """
+    # Only the user id is needed, which the token carries
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    default_limit = 50
+    max_limit = 500
+    max_scan = 5000
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            limit = max(1, min(int(params.get('limit', self.default_limit)), self.max_limit))
+            after = int(params.get('after', 0))
+        except ValueError:
+            raise ValidationError("limit and after must be integers.")
+
+        foods = Food.objects.filter(is_approved=True, id__gt=after).order_by('id')
+        max_hazard = params.get('max_hazard')
+        if max_hazard is not None:
+            try:
+                max_hazard = float(max_hazard)
+            except ValueError:
+                max_hazard = math.nan
+            if not math.isfinite(max_hazard):
+                raise ValidationError({"max_hazard": "Must be a number."})
+            foods = foods.filter(hazard_level__lte=max_hazard)
+
+        avoid_mask = IngredientService.mask_of(User.avoided_ingredients.through.objects.filter(
+            user_id=request.user.id).values_list('ingredient_id', flat=True))
+
+        next_after = None
+        if avoid_mask:
+            # Bits past the highest avoided id can't match, so only that many
+            # bytes of each mask are read from the database
+            width = (avoid_mask.bit_length() + 7) // 8
+            prefixes = foods.annotate(prefix=Substr('ingredient_mask', 1, width)).values_list(
+                'id', 'prefix')[:self.max_scan]
+            safe_ids = []
+            scanned = 0
+            for food_id, prefix in prefixes.iterator(chunk_size=2000):
+                scanned += 1
+                if not IngredientService.decode_mask(prefix) & avoid_mask:
+                    safe_ids.append(food_id)
+                    if len(safe_ids) > limit:
+                        break
+            if len(safe_ids) <= limit and scanned == self.max_scan:
+                # Scan budget used up: continue from the last food looked at
+                next_after = food_id
+        else:
+            safe_ids = list(foods.values_list('id', flat=True)[:limit + 1])
+
+        if len(safe_ids) > limit:
+            safe_ids = safe_ids[:limit]
+            next_after = safe_ids[-1]
+        results = Food.objects.filter(id__in=safe_ids).select_related(
+            'restaurant', 'created_by').prefetch_related('ingredients').order_by('id')
+
+        return Response({
+            "next": replace_query_param(request.build_absolute_uri(), 'after', next_after)
+            if next_after is not None else None,
+            "results": FoodSerializer(results, many=True).data,
+        })
+
+
+class SimilarFoodsView(APIView):
+    """
+    Approved foods from other restaurants whose ingredients overlap the
+    given food's the most, no more hazardous than ?max_hazard= (the food's
+    own hazard level by default). ?same_restaurant=true includes its own
+    restaurant's foods; ?limit= caps the results.
+    """
+    authentication_classes = []
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request, pk, *args, **kwargs):
+        params = request.query_params
+        try:
+            limit = max(1, min(int(params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+
+        max_hazard = params.get('max_hazard')
+        if max_hazard is not None:
+            try:
+                max_hazard = float(max_hazard)
+            except ValueError:
+                max_hazard = math.nan
+            if not math.isfinite(max_hazard):
+                raise ValidationError({"max_hazard": "Must be a number."})
+
+        matches = SimilarityIndex.similar(
+            pk, limit, max_hazard,
+            other_restaurants=params.get('same_restaurant', '').lower() not in ('1', 'true', 'yes'))
+        if matches is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        foods = Food.objects.filter(id__in=[food_id for food_id, _ in matches]).select_related(
+            'restaurant', 'created_by').prefetch_related('ingredients').in_bulk()
+        return Response({
+            "food": pk,
+            "results": [
+                {"similarity": round(similarity, 3), "food": FoodSerializer(foods[food_id]).data}
+                for food_id, similarity in matches if food_id in foods
+            ],
+        })
+
+
+class RestaurantMacroSummaryView(APIView):
+    """
+    Macro statistics of a restaurant's approved foods: average, minimum and
+    maximum of every macro column plus how many foods have a value for it,
+    computed by the database in one aggregate query.
+    """
+    authentication_classes = []
+
+    def get(self, request, pk, *args, **kwargs):
+        restaurant = get_object_or_404(Restaurant.objects.only('id', 'name'), pk=pk)
+
+        aggregates = {'foods': Count('id')}
+        for column in Food.MACRO_COLUMNS:
+            aggregates[f"{column}__avg"] = Avg(column)
+            aggregates[f"{column}__min"] = Min(column)
+            aggregates[f"{column}__max"] = Max(column)
+            aggregates[f"{column}__count"] = Count(column)
+        totals = Food.objects.filter(restaurant_id=pk, is_approved=True).aggregate(**aggregates)
+
+        macros = {}
+        for column in Food.MACRO_COLUMNS:
+            average = totals[f"{column}__avg"]
+            macros[column] = {
+                "avg": round(average, 2) if average is not None else None,
+                "min": totals[f"{column}__min"],
+                "max": totals[f"{column}__max"],
+                "count": totals[f"{column}__count"],
+            }
+
+        return Response({
+            "restaurant": restaurant.id,
+            "restaurant_name": restaurant.name,
+            "foods": totals['foods'],
+            "macros": macros,
+        })
+
+
+class SearchView(APIView):
+    """
+    Ranked search over foods, restaurants and ingredients.
+    ?q= words match as prefixes, ignoring case and accents; ?type= limits the
+    results to a comma-separated list of food, restaurant and ingredient.
+    """
+    authentication_classes = []
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({"q": "This parameter is required."})
+
+        kinds = [kind.strip() for kind in request.query_params.get('type', '').split(',') if kind.strip()]
+        unknown = [kind for kind in kinds if kind not in SearchIndex.KINDS]
+        if unknown:
+            raise ValidationError(
+                {"type": f"Unknown type '{unknown[0]}'. Choose from: {', '.join(SearchIndex.KINDS)}."})
+
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        limit = max(1, min(limit, self.max_limit))
+
+        return Response({
+            "query": query,
+            "results": SearchIndex.search(query, kinds, limit),
+        })
+
+
+class AutocompleteView(APIView):
+    """
+    Name completion for the ingredient and restaurant pickers, answered from
+    the in-memory AutocompleteIndex. ?type= is ingredient or restaurant
+    (both when omitted); close misspellings fill up short result lists.
+    """
+    authentication_classes = []
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        kind = request.query_params.get('type')
+        if kind is not None and kind not in AutocompleteIndex.SOURCES:
+            raise ValidationError(
+                {"type": f"Unknown type '{kind}'. Choose from: {', '.join(AutocompleteIndex.SOURCES)}."})
+
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        limit = max(1, min(limit, self.max_limit))
+
+        return Response({
+            "query": query,
+            "results": AutocompleteIndex.complete(query, [kind] if kind else (), limit),
+        })
+
+
+class MetricsView(APIView):
+    """
+    Request and timer metrics of this process in the Prometheus text format.
+    Needs "Authorization: Bearer <METRICS_TOKEN>"; without a METRICS_TOKEN the
+    endpoint is only open with DEBUG on.
+    """
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        token = settings.METRICS_TOKEN
+        if not token:
+            if not settings.DEBUG:
+                return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+        elif not constant_time_compare(
+                request.META.get('HTTP_AUTHORIZATION', ''), f"Bearer {token}"):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(metrics.registry.render(),
+                            content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class CatalogRestaurantSnapshotView(APIView):
+    """
+    Serve a restaurant and its approved foods straight from the catalog
+    snapshot; a restaurant without one has it built on the first request
+    """
+    authentication_classes = []
+
+    def get(self, request, pk, *args, **kwargs):
+        payload = CatalogSnapshotService.get_or_build_restaurant(pk)
+        if payload is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(payload, content_type='application/json')
+
+
+class CatalogFoodPageView(APIView):
+    """Serve a page of approved foods straight from the catalog snapshot"""
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        try:
+            page = int(request.query_params.get('page', 0))
+            if page < 0:
+                raise ValueError
+        except ValueError:
+            return Response({"error": "page must be a non-negative integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload, next_page = CatalogSnapshotService.get_food_page(page)
+
+        # Wrap the stored bytes without decoding them
+        body = b'{"page":%d,"next":%s,"results":%s}' % (
+            page,
+            b'null' if next_page is None else str(next_page).encode(),
+            payload if payload is not None else b'[]',
+        )
+        return HttpResponse(body, content_type='application/json')
+
+
+class CatalogChangesView(APIView):
+    """
+    Delta sync for clients that keep a local copy of the catalog.
+    Without `since` only the current version is returned; with it, the foods,
+    restaurants and ingredients changed or deleted after that version.
+    """
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({"version": CatalogChangeLog.current_version()})
+
+        try:
+            since = int(since)
+            limit = min(int(request.query_params.get('limit', 1000)), 5000)
+            if since < 0 or limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({"error": "since must be a non-negative integer and limit a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(CatalogChangeLog.changes_since(since, limit))
 
 
 class FoodCreateView(generics.CreateAPIView):
@@ -381,25 +806,51 @@ class FoodCreateView(generics.CreateAPIView):
         return food
 
 
+def filter_by_remaining_approvals(request, queryset):
+    """
+    Apply the ?max_remaining=N filter of the approval queues to a queryset
+    annotated with remaining_approvals
+    """
+    max_remaining = request.query_params.get('max_remaining')
+    if max_remaining is None:
+        return queryset
+    try:
+        max_remaining = int(max_remaining)
+    except ValueError:
+        raise ValidationError({"max_remaining": "Must be an integer."})
+    return queryset.filter(remaining_approvals__lte=max_remaining)
+
+
 class GetApprovableFoods(generics.ListAPIView):
-    queryset = Food.objects.filter(is_approved=False).select_related(
-        'restaurant')  # Optimize query
     serializer_class = FoodSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = Food.objects.filter(is_approved=False).select_related(
+            'restaurant', 'created_by').prefetch_related(
+            'ingredients',
+            Prefetch('approved_supervisors',
+                     queryset=User.objects.filter(
+                         is_supervisor=True).only('id', 'username'),
+                     to_attr='supervisor_approvals'),
+        ).annotate(remaining_approvals=ApprovalPolicyService.remaining_food_approvals())
+        return filter_by_remaining_approvals(self.request, queryset)
+
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
         serializer = self.get_serializer(queryset, many=True)
         data = serializer.data
 
         for i, food in enumerate(queryset):
-            data[i]['approved_supervisors_count'] = food.approved_supervisors.filter(
-                is_supervisor=True).count()
+            data[i]['approved_supervisors_count'] = len(
+                food.supervisor_approvals)
+            data[i]['remaining_approvals'] = food.remaining_approvals
             # Add restaurant name
             data[i]['restaurant_name'] = food.restaurant.name
-            data[i]['approved_supervisors'] = list(food.approved_supervisors.filter(
-                is_supervisor=True).values('id', 'username'))  # Add approved supervisors list
+            data[i]['approved_supervisors'] = [
+                {'id': user.id, 'username': user.username}
+                for user in food.supervisor_approvals]  # Add approved supervisors list
 
         return Response(data)
 
@@ -411,9 +862,6 @@ class AcceptFood(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, *args, **kwargs):
-        # Get the food instance
-        food = self.get_object()
-
         # Check if the user is a supervisor
         if not request.user.is_supervisor:
             return Response(
@@ -421,33 +869,25 @@ class AcceptFood(generics.UpdateAPIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+        # Define the threshold for approval
+        REQUIRED_APPROVALS = ApprovalPolicyService.required(
+            ApprovalPolicyService.FOOD_CREATE)
+
+        # Record the approval; the service counts it atomically and marks the
+        # food approved exactly once when the threshold is met
+        try:
+            food, recorded, became_approved = ApprovalService.approve_food(
+                kwargs.get('pk'), request.user, REQUIRED_APPROVALS)
+        except Food.DoesNotExist:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
         # Check if the user has already approved this food item
-        if food.approved_supervisors.filter(id=request.user.id).exists():
+        if not recorded:
             return Response(
                 {"detail": "You have already approved this food item."},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # Add the user to the approved supervisors
-        food.approved_supervisors.add(request.user)
-
-        food.save()
-
-        approved_count = food.approved_supervisors.count()
-
-        # Define the threshold for approval
-        REQUIRED_APPROVALS = 10
-
-        # If the threshold is met, mark the food as approved
-        if approved_count >= REQUIRED_APPROVALS:
-            food.is_approved = True
-            food.save()
-
-            # Update restaurant hazard level when a food becomes approved
-            from .services.restaurant_service import RestaurantService
-            RestaurantService.update_restaurant_hazard_level(
-                food.restaurant.id)
-
         # Return a success response
         return Response(
             {"detail": "Food item approved successfully."},
@@ -539,23 +979,9 @@ class CreateFoodChange(generics.CreateAPIView):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-            # Convert ingredient IDs to integers and validate
-            valid_ingredient_ids = []
-            invalid_ingredient_ids = []
-
-            for ing_id in ingredient_ids:
-                try:
-                    # Ensure the ingredient ID is a valid integer
-                    ing_id = int(ing_id)
-                    # Check if the ingredient exists in the database
-                    Ingredient.objects.get(id=ing_id)
-                    valid_ingredient_ids.append(ing_id)
-                except (ValueError, TypeError):
-                    # Handle cases where ing_id is not a valid integer
-                    invalid_ingredient_ids.append(ing_id)
-                except ObjectDoesNotExist:
-                    # Handle cases where the ingredient does not exist
-                    invalid_ingredient_ids.append(ing_id)
+            # Validate all ingredient IDs with a single query
+            ingredients, invalid_ingredient_ids = IngredientService.resolve(
+                ingredient_ids)
 
             # If there are invalid ingredient IDs, return an error
             if invalid_ingredient_ids:
@@ -574,32 +1000,43 @@ class CreateFoodChange(generics.CreateAPIView):
             except ValueError:
                 date_obj = timezone.now().date()
 
-            # Create the FoodChange object
+            # Create the FoodChange object, its ingredients and its hazard level
+            # (computed from the ingredients fetched above) in one transaction
             try:
-                food_change = FoodChange.objects.create(
-                    old_version=food,
-                    is_deletion=convert_value(
-                        new_data.get("is_deletion", False), bool),
-                    new_restaurant=food.restaurant,
-                    new_name=new_data.get("new_name", food.name),
-                    new_serving_size=convert_value(new_data.get(
-                        "new_serving_size", food.serving_size), float),
-                    new_macro_table=parse_json(new_data.get(
-                        "new_macro_table", food.macro_table)),
-                    new_is_organic=convert_value(new_data.get(
-                        "new_is_organic", food.is_organic), bool),
-                    new_is_gluten_free=convert_value(new_data.get(
-                        "new_is_gluten_free", food.is_gluten_free), bool),
-                    new_is_alcohol_free=convert_value(new_data.get(
-                        "new_is_alcohol_free", food.is_alcohol_free), bool),
-                    new_is_lactose_free=convert_value(new_data.get(
-                        "new_is_lactose_free", food.is_lactose_free), bool),
-                    new_image=new_data.get("new_image", food.image),
-                    new_is_approved=False,
-                    date=date_obj,
-                    reason=new_data.get("reason", ""),
-                    updated_by=request.user,  # Set the authenticated user
-                )
+                with transaction.atomic():
+                    food_change = FoodChange.objects.create(
+                        old_version=food,
+                        is_deletion=convert_value(
+                            new_data.get("is_deletion", False), bool),
+                        new_restaurant=food.restaurant,
+                        new_name=new_data.get("new_name", food.name),
+                        new_serving_size=convert_value(new_data.get(
+                            "new_serving_size", food.serving_size), float),
+                        new_macro_table=parse_json(new_data.get(
+                            "new_macro_table", food.macro_table)),
+                        new_is_organic=convert_value(new_data.get(
+                            "new_is_organic", food.is_organic), bool),
+                        new_is_gluten_free=convert_value(new_data.get(
+                            "new_is_gluten_free", food.is_gluten_free), bool),
+                        new_is_alcohol_free=convert_value(new_data.get(
+                            "new_is_alcohol_free", food.is_alcohol_free), bool),
+                        new_is_lactose_free=convert_value(new_data.get(
+                            "new_is_lactose_free", food.is_lactose_free), bool),
+                        new_image=new_data.get("new_image", food.image),
+                        new_hazard_level=IngredientRegistry.average_hazard(
+                            ingredients.keys()),
+                        new_is_approved=False,
+                        date=date_obj,
+                        reason=new_data.get("reason", ""),
+                        updated_by=request.user,  # Set the authenticated user
+                    )
+
+                    ChangeIngredient = FoodChange.new_ingredients.through
+                    ChangeIngredient.objects.bulk_create([
+                        ChangeIngredient(foodchange_id=food_change.id,
+                                         ingredient_id=ingredient_id)
+                        for ingredient_id in ingredients
+                    ])
             except ValidationError as e:
                 logger.error(
                     f"Validation error while creating FoodChange: {e}")
@@ -608,16 +1045,6 @@ class CreateFoodChange(generics.CreateAPIView):
                 logger.error(f"Error creating FoodChange: {e}")
                 return Response({"error": f"Error creating FoodChange: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # Set valid ingredients if provided
-            if valid_ingredient_ids:
-                try:
-                    food_change.new_ingredients.set(valid_ingredient_ids)
-                    # Calculate the hazard level based on the new ingredients
-                    food_change.calculate_new_hazard_level()
-                except Exception as e:
-                    logger.error(f"Error setting new_ingredients: {e}")
-                    return Response({"error": f"Error setting new_ingredients: {e}"}, status=status.HTTP_400_BAD_REQUEST)
-
             # Return success response
             return Response({"message": "Food change request created successfully."}, status=status.HTTP_201_CREATED)
 
@@ -626,17 +1053,34 @@ class CreateFoodChange(generics.CreateAPIView):
             return Response({"error": f"Unexpected error: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class FoodChangeUpdateListView(generics.ListAPIView):
-    serializer_class = FoodChangeSerializer
-    authentication_classes = [JWTAuthentication]
-    permission_classes = [IsAuthenticated]
+class PendingFoodChangeQueueMixin:
+    """
+    Queue of unapproved food changes of one kind (updates or removals).
+    Each kind has a partial index on (date, id) over its unapproved rows
+    (foodchange_update_queue / foodchange_removal_queue), which serves both
+    the filter and the keyset order; the remaining approvals come from the
+    stored approval count. Pages are opt-in via ?cursor= / ?page_size=.
+    """
+    is_deletion = False
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        # Annotate the queryset with the count of new_approved_supervisors
-        queryset = FoodChange.objects.filter(is_deletion=False, new_is_approved=False).annotate(
-            new_approved_supervisors_count=Count('new_approved_supervisors')
+        queryset = FoodChange.objects.filter(
+            is_deletion=self.is_deletion, new_is_approved=False
+        ).select_related('new_restaurant', 'updated_by').prefetch_related(
+            Prefetch('new_ingredients', queryset=Ingredient.objects.only('id')),
+            Prefetch('new_approved_supervisors', queryset=User.objects.only('id')),
+        ).annotate(
+            remaining_approvals=ApprovalPolicyService.remaining_change_approvals(),
         )
-        return queryset
+        return filter_by_remaining_approvals(self.request, queryset)
+
+
+class FoodChangeUpdateListView(PendingFoodChangeQueueMixin, generics.ListAPIView):
+    serializer_class = FoodChangeSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    is_deletion = False
 
 
 class CreateFoodRemoval(generics.CreateAPIView):
@@ -652,38 +1096,33 @@ class CreateFoodRemoval(generics.CreateAPIView):
 
         food = get_object_or_404(Food, id=food_id)
 
+        # Extract reason from request
+        reason = request.data.get('reason', 'No reason provided')
+
         try:
-            # Check if a removal proposal already exists for this food item
-            existing_proposal = FoodChange.objects.filter(
-                old_version=food, is_deletion=True).first()
-            if existing_proposal:
-                raise IntegrityError(
-                    "A removal proposal is already active for this food item.")
-
-            # Extract reason from request
-            reason = request.data.get('reason', 'No reason provided')
-
-            # Create the new food change record
-            food_change = FoodChange.objects.create(
-                old_version=food,
-                is_deletion=True,
-                new_restaurant=food.restaurant,
-                new_name=food.name,
-                new_macro_table=food.macro_table,
-                new_is_organic=food.is_organic,
-                new_is_gluten_free=food.is_gluten_free,
-                new_is_alcohol_free=food.is_alcohol_free,
-                new_is_lactose_free=food.is_lactose_free,
-                new_image=food.image,
-                new_is_approved=False,
-                reason=reason,  # Add reason field
-                updated_by=request.user,  # Set the user who requested the deletion
-            )
+            # The unique_active_food_removal constraint rejects a second pending
+            # removal of the same food, so there is no separate existence check
+            with transaction.atomic():
+                food_change = FoodChange.objects.create(
+                    old_version=food,
+                    is_deletion=True,
+                    new_restaurant=food.restaurant,
+                    new_name=food.name,
+                    new_macro_table=food.macro_table,
+                    new_is_organic=food.is_organic,
+                    new_is_gluten_free=food.is_gluten_free,
+                    new_is_alcohol_free=food.is_alcohol_free,
+                    new_is_lactose_free=food.is_lactose_free,
+                    new_image=food.image,
+                    new_is_approved=False,
+                    reason=reason,  # Add reason field
+                    updated_by=request.user,  # Set the user who requested the deletion
+                )
 
-            food_change.new_ingredients.set(food.ingredients.all())
+                food_change.new_ingredients.set(food.ingredients.all())
 
-            if request.user.is_supervisor:
-                food_change.new_approved_supervisors.add(request.user)
+                if request.user.is_supervisor:
+                    food_change.new_approved_supervisors.add(request.user)
 
             return Response({"message": "Food deletion request created successfully."}, status=status.HTTP_201_CREATED)
 
@@ -692,16 +1131,11 @@ class CreateFoodRemoval(generics.CreateAPIView):
             return Response({"error": "A removal proposal is already active for this food item."}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class FoodChangeDeletionListView(generics.ListAPIView):
+class FoodChangeDeletionListView(PendingFoodChangeQueueMixin, generics.ListAPIView):
     serializer_class = FoodChangeSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
-
-    def get_queryset(self):
-        # Annotate the queryset with the count of new_approved_supervisors
-        queryset = FoodChange.objects.filter(is_deletion=True, new_is_approved=False).annotate(
-            new_approved_supervisors_count=Count('new_approved_supervisors')
-        )
-        return queryset
+    is_deletion = True
 
 
 class ApproveProposal(generics.UpdateAPIView):
@@ -710,49 +1144,85 @@ class ApproveProposal(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, *args, **kwargs):
-        # Retrieve the FoodChange instance
-        food_change = get_object_or_404(FoodChange, id=kwargs.get('pk'))
-
         # Check if the user is a supervisor
         if not request.user.is_supervisor:
             logger.warning(
                 f"User {request.user.username} attempted to approve change but is not a supervisor")
             return Response({"error": "Only supervisors can approve food changes."}, status=status.HTTP_403_FORBIDDEN)
 
-        # Add the supervisor to the new_approved_supervisors
-        food_change.new_approved_supervisors.add(request.user)
-        logger.info(
-            f"Supervisor {request.user.username} approved food change #{food_change.id} for {food_change.new_name}")
+        try:
+            # Crossing the policy threshold (food_change or food_removal) marks
+            # the change approved; the signal applies it
+            food_change, recorded, became_approved = ApprovalService.approve_change(
+                kwargs.get('pk'), request.user)
+        except FoodChange.DoesNotExist:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            # Log any errors during the approval process
+            logger.error(
+                f"Error approving food change #{kwargs.get('pk')}: {e}")
+            logger.error(traceback.format_exc())
+            return Response(
+                {"error": f"Error approving food change: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-        # Get the current count of approvals
-        approval_count = food_change.new_approved_supervisors.count()
+        if recorded:
+            required_approvals = ApprovalPolicyService.required_for_change(
+                food_change.is_deletion)
+            logger.info(
+                f"Supervisor {request.user.username} approved food change #{food_change.id} for {food_change.new_name} "
+                f"({food_change.new_approval_count}/{required_approvals} approvals)")
 
-        # Check if the FoodChange has enough approvals to be marked as approved
-        # Lower from 20 to a more reasonable number (adjust as needed)
-        required_approvals = 2
-        logger.info(
-            f"Food change #{food_change.id} has {approval_count}/{required_approvals} approvals")
+        return Response({"message": "Food change approval recorded successfully."}, status=status.HTTP_200_OK)
 
-        if approval_count >= required_approvals:
-            logger.info(
-                f"Food change #{food_change.id} has reached approval threshold!")
+
+class ApprovalPolicyView(APIView):
+    """Number of approvals each kind of proposal needs, keyed by action"""
+
+    def get(self, request, *args, **kwargs):
+        return Response(ApprovalPolicyService.thresholds())
+
+
+class BulkApproveView(APIView):
+    """
+    Approve many foods and food changes in one request:
+    {"foods": [1, 2, ...], "food_changes": [3, 4, ...]}
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_supervisor:
+            return Response({"error": "Only supervisors can approve foods and food changes."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        ids = {}
+        for key in ('foods', 'food_changes'):
+            value = request.data.get(key, [])
+            if not isinstance(value, list):
+                return Response({"error": f"'{key}' must be a list of ids."},
+                                status=status.HTTP_400_BAD_REQUEST)
             try:
-                # Simply mark as approved; the signal will handle applying the changes
-                food_change.new_is_approved = True
-                food_change.save()
-                logger.info(
-                    f"Marked food change #{food_change.id} as approved")
-            except Exception as e:
-                # Log any errors during the approval process
-                logger.error(
-                    f"Error approving food change #{food_change.id}: {e}")
-                logger.error(traceback.format_exc())
-                return Response(
-                    {"error": f"Error approving food change: {str(e)}"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+                ids[key] = [int(item) for item in value]
+            except (TypeError, ValueError):
+                return Response({"error": f"'{key}' must be a list of ids."},
+                                status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({"message": "Food change approval recorded successfully."}, status=status.HTTP_200_OK)
+        if not ids['foods'] and not ids['food_changes']:
+            return Response({"error": "No foods or food changes given."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = ApprovalService.bulk_approve(
+                request.user, food_ids=ids['foods'], change_ids=ids['food_changes'])
+        except Exception as e:
+            logger.error(f"Error in bulk approval by {request.user.username}: {e}")
+            logger.error(traceback.format_exc())
+            return Response({"error": f"Error approving items: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(result, status=status.HTTP_200_OK)
 
 
 class RestaurantWithLocationView(generics.CreateAPIView):
@@ -15,6 +15,8 @@ import dotenv
 from datetime import timedelta
 from pathlib import Path
 
+dotenv.load_dotenv("./.env")
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,6 +53,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the middleware
+    'core.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -85,12 +89,142 @@ WSGI_APPLICATION = 'django_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# The database is configured from the environment (.env) so the same code
+# runs against the local SQLite file in development and PostgreSQL in
+# production:
+#   DB_ENGINE          sqlite (default) or postgres
+#   DB_NAME            database name (SQLite: path of the database file)
+#   DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+#   DB_CONN_MAX_AGE    seconds to keep a connection open between requests
+#   DB_POOL            "true" to use the psycopg 3 connection pool (postgres only)
+#   DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE
+#   SQLITE_TUNED       "false" to fall back to SQLite's default journaling
+#   DB_BUSY_TIMEOUT_MS how long a writer waits for the lock before failing
+
+def env_bool(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite").lower()
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Applied on every new SQLite connection when SQLITE_TUNED is on. WAL lets
+# readers run while a writer holds the lock, synchronous=NORMAL is safe in WAL
+# mode and avoids an fsync per commit, and the busy timeout makes concurrent
+# writers (approvals, signals, the background image threads) queue up instead
+# of failing with "database is locked".
+SQLITE_TUNED_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;"
+    "PRAGMA synchronous=NORMAL;"
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS};"
+    "PRAGMA mmap_size=134217728;"  # 128 MB
+)
+
+if DB_ENGINE in ("postgres", "postgresql"):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DB_NAME", "nutri"),
+            'USER': os.getenv("DB_USER", "nutri"),
+            'PASSWORD': os.getenv("DB_PASSWORD", ""),
+            'HOST': os.getenv("DB_HOST", "localhost"),
+            'PORT': os.getenv("DB_PORT", "5432"),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if env_bool("DB_POOL"):
+        # Pooling needs psycopg 3 with the pool extra and replaces persistent
+        # connections, so CONN_MAX_AGE has to be 0.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            'max_size': int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            'timeout': 10,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv("DB_NAME", BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                'timeout': DB_BUSY_TIMEOUT_MS / 1000,
+            },
+        }
+    }
+    if env_bool("SQLITE_TUNED", default=True):
+        DATABASES['default']['OPTIONS'].update({
+            'init_command': SQLITE_TUNED_PRAGMAS,
+            # Take the write lock when the transaction starts instead of on the
+            # first write, so two approvals can't both read and then deadlock
+            # trying to upgrade their locks.
+            'transaction_mode': 'IMMEDIATE',
+        })
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Backs the versioned response cache of the catalog list endpoints
+# (core/services/catalog_cache.py). The version counters are kept in the
+# database, so invalidation reaches every process with any backend; the backend
+# only decides where the rendered bodies are stored. CACHE_BACKEND selects it:
+#   locmem (default)  per-process memory
+#   file              shared between processes through CACHE_LOCATION (a directory)
+#   redis             a Redis server at CACHE_LOCATION, e.g. a local redis-server
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem").lower()
+
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+        }
+    }
+elif CACHE_BACKEND == "file":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv("CACHE_LOCATION", BASE_DIR / 'cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'nutri-catalog',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
     }
-}
+
+# Seconds a cached catalog response is kept; invalidation happens through signals
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "3600"))
+
+# Number of food ids covered by one page of the pre-serialized catalog snapshot
+CATALOG_SNAPSHOT_PAGE_SIZE = int(os.getenv("CATALOG_SNAPSHOT_PAGE_SIZE", "100"))
+
+# Seconds before a catalog change log entry is handed to delta-sync clients.
+# Concurrent transactions can commit entries out of id order; SQLite has a
+# single writer, so only other databases need the delay.
+CATALOG_CHANGES_SETTLE_SECONDS = int(os.getenv(
+    "CATALOG_CHANGES_SETTLE_SECONDS", "5" if DB_ENGINE in ("postgres", "postgresql") else "0"))
+
+# Seconds each process keeps the approval thresholds before re-reading them.
+# Changes made in this process are picked up immediately through signals.
+APPROVAL_POLICY_CACHE_TTL = int(os.getenv("APPROVAL_POLICY_CACHE_TTL", "60"))
+
+# Seconds between checks of the ingredient version by each process's
+# in-memory ingredient registry; changes made in the same process are seen at once
+INGREDIENT_REGISTRY_CHECK_INTERVAL = float(os.getenv("INGREDIENT_REGISTRY_CHECK_INTERVAL", "5"))
+# The same for the autocomplete name index
+AUTOCOMPLETE_CHECK_INTERVAL = float(os.getenv("AUTOCOMPLETE_CHECK_INTERVAL", "5"))
 
 
 AUTH_USER_MODEL = 'core.User'
@@ -164,9 +298,12 @@ SIMPLE_JWT = {
 CORS_ALLOW_ALL_ORIGINS = True
 
 
-dotenv.load_dotenv("./.env")
 # Email settings for Django
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Outgoing email goes through the outbox (core.services.email_outbox). For local
+# runs and tests, EMAIL_BACKEND can be Django's console or file backend, e.g.
+# django.core.mail.backends.filebased.EmailBackend, which writes to EMAIL_FILE_PATH.
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", BASE_DIR / 'sent_emails')
 EMAIL_HOST = 'smtp.gmail.com'  # Use your email provider's SMTP server
 EMAIL_PORT = 465  # 587  # Port for Gmail, may vary based on provider
 EMAIL_USE_TLS = False  # Enable TLS for secure connection
@@ -176,6 +313,25 @@ EMAIL_USE_SSL = True
 EMAIL_HOST_USER = os.getenv("EMAIL")  # Your email address
 # Your email password (consider using environment variables for security)
 EMAIL_HOST_PASSWORD = os.getenv("PASSWORD")
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "30"))
+
+# Send queued emails from a background thread of the web process, woken when
+# an email is queued. Turn off when the send_queued_emails command runs instead.
+EMAIL_OUTBOX_IN_PROCESS = env_bool("EMAIL_OUTBOX_IN_PROCESS", True)
+# Seconds that thread sleeps between checks for retries that came due
+EMAIL_OUTBOX_POLL_INTERVAL = int(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", "30"))
+
+# Request metrics (core.middleware.RequestMetricsMiddleware), served at /metrics in
+# the Prometheus text format. /metrics requires the header
+# "Authorization: Bearer <METRICS_TOKEN>"; without a token it is only served with
+# DEBUG on. METRICS_SERVER_TIMING adds a Server-Timing header with the request's
+# timings to every response.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_SERVER_TIMING = env_bool("METRICS_SERVER_TIMING", False)
+
+# Hours a signup confirmation code stays valid. purge_confirmation_tokens deletes
+# expired codes together with the accounts that were never confirmed.
+CONFIRMATION_TOKEN_TTL_HOURS = int(os.getenv("CONFIRMATION_TOKEN_TTL_HOURS", "48"))
 
 MEDIA_URL = '/media/'
 